@@ -32,6 +32,7 @@ if hasattr(sys, 'frozen') and hasattr(sys, '_MEIPASS'):
 else:
     root_logger.debug('Running from source')
     package_dir = os.path.dirname(__file__)
+WORKING_DIRECTORY = os.getcwd()  # Directory Inlinino was started from, to resolve paths of command line
 os.chdir(package_dir)
 PATH_TO_RESOURCES = os.path.join(package_dir, 'resources')
 
@@ -49,38 +50,172 @@ root_logger.addHandler(ch_file)
 
 
 class RingBuffer:
-    # Ring buffer based on numpy.roll for np.array
+    # Ring buffer with a write index, for np.array of values (1-D) or of rows of channels (2-D, time x channel)
     # Same concept as FIFO except that the size of the numpy array does not vary
-    def __init__(self, _length, _dtype=None):
+    # Values are written twice in a storage of twice the length, so the most recent values are always contiguous
+    # and returned as a view (no copy) by get
+    def __init__(self, _length, _dtype=None, width=None):
         # initialize buffer with NaN values
         # length correspond to the size of the buffer
+        # width is the number of channels of 2-D buffers (None for 1-D)
+        self.length = _length
+        self.width = width
+        shape = (2 * _length,) if width is None else (2 * _length, width)
         if _dtype is None:
-            self.data = np.empty(_length)  # np.dtype = float64
-            self.data[:] = np.NAN
+            self._storage = np.empty(shape)  # np.dtype = float64
+            self._storage[:] = np.NAN
         else:
             # type needs to be compatible with np.NaN
-            self.data = np.empty(_length, dtype=_dtype)
-            self.data[:] = None
+            self._storage = np.empty(shape, dtype=_dtype)
+            self._storage[:] = None
+        self._index = 0  # position of next value written
+
+    @property
+    def data(self):
+        # all values in buffer, oldest first
+        return self._storage[self._index:self._index + self.length]
 
     def extend(self, _x):
-        # Add np.array at the end of the buffer
-        x = np.array(_x, copy=False)  # dtype=None
-        step = x.size
-        self.data = np.roll(self.data, -step)
-        self.data[-step:] = x
+        # Add value(s) at the end of the buffer, a row or several rows for 2-D buffers
+        x = np.asarray(_x, dtype=self._storage.dtype)
+        x = x.reshape(-1) if self.width is None else x.reshape(-1, self.width)
+        if len(x) > self.length:
+            x = x[-self.length:]
+        step, start, length = len(x), self._index, self.length
+        end = start + step
+        if end <= length:
+            self._storage[start:end] = x
+            self._storage[start + length:end + length] = x
+        else:  # Wrap around
+            k = length - start
+            self._storage[start:length] = x[:k]
+            self._storage[start + length:] = x[:k]
+            self._storage[:end - length] = x[k:]
+            self._storage[length:end] = x[k:]
+        self._index = end % length
 
     def get(self, _n=1):
-        # return the most recent n element(s) in buffer
-        return self.data[-1 * _n:]
+        # return the most recent n element(s) in buffer (view, overwritten by following extend)
+        end = self._index + self.length
+        return self._storage[end - min(_n, self.length):end]
 
     def getleft(self, _n=1):
         # return the oldest n element(s) in buffer
-        return self.data[0:_n]
+        return self._storage[self._index:self._index + min(_n, self.length)]
 
     def __str__(self):
         return str(self.data)
 
 
+class HistoryBuffer:
+    # Multi-resolution history of rows of channels (time x channel) to plot long timeseries at constant cost
+    # Level 0 keeps the most recent values at full resolution, level k keeps the min, max, and mean of bins made of
+    # `factor` bins of level k-1, hence each level has the same length but spans `factor` times longer than the previous
+    # Each bin is stamped with the timestamp of its first value
+    BATCH = 64  # values of level 0 reduced at once, the cost of numpy calls is shared by the values of a batch
+
+    def __init__(self, length, width, levels=8, factor=4):
+        self.length = length
+        self.width = width
+        self.levels = levels
+        self.factor = factor
+        self.timestamp = [RingBuffer(length) for _ in range(levels)]
+        self.min = [RingBuffer(length, width=width) for _ in range(levels)]
+        self.max = [RingBuffer(length, width=width) for _ in range(levels)]
+        self.mean = [RingBuffer(length, width=width) for _ in range(levels)]
+        self.count = [RingBuffer(length, width=width) for _ in range(levels)]  # number of values (not NaN) in bins
+        self.max[0] = self.mean[0] = self.min[0]  # Level 0 stores values only
+        self.size = [0] * levels  # number of bins in each level
+        self.pending = [0] * levels  # number of last bins of each level not yet reduced in next level
+        self._chunk = max(length // 2, 1)  # values added at once, so values pending fit in level 0
+        self._batch = max(min(self.BATCH, self._chunk), factor)
+
+    def extend(self, timestamp, data):
+        # Add row(s) of values at the end of the history
+        timestamp = np.asarray(timestamp, dtype=float).reshape(-1)
+        data = np.asarray(data, dtype=float).reshape(-1, self.width)
+        for i in range(0, len(timestamp), self._chunk):
+            self.timestamp[0].extend(timestamp[i:i + self._chunk])
+            self.min[0].extend(data[i:i + self._chunk])
+            self._reduce(0, len(timestamp[i:i + self._chunk]))
+
+    def _reduce(self, level, n):
+        # Reduce new bins of level in bins of next level, factor bins at a time
+        self.size[level] = min(self.size[level] + n, self.length)
+        if level + 1 == self.levels:
+            return
+        self.pending[level] += n
+        if level == 0 and self.pending[0] < self._batch:
+            return
+        k = self.pending[level] // self.factor
+        if k == 0:
+            return
+        m, self.pending[level] = k * self.factor, self.pending[level] % self.factor
+        shape = (k, self.factor, self.width)
+        vmin = self.min[level].get(m + self.pending[level])[:m].reshape(shape)
+        vmax = self.max[level].get(m + self.pending[level])[:m].reshape(shape)
+        if level == 0:
+            count = ~np.isnan(vmin)
+            total = np.where(count, vmin, 0).sum(axis=1)
+        else:
+            count = self.count[level].get(m + self.pending[level])[:m].reshape(shape)
+            total = np.where(count > 0, self.mean[level].get(m + self.pending[level])[:m].reshape(shape), 0)
+            total = (total * count).sum(axis=1)
+        count = count.sum(axis=1)
+        self.timestamp[level + 1].extend(self.timestamp[level].get(m + self.pending[level])[:m:self.factor])
+        self.min[level + 1].extend(np.fmin.reduce(vmin, axis=1))
+        self.max[level + 1].extend(np.fmax.reduce(vmax, axis=1))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean[level + 1].extend(total / count)
+        self.count[level + 1].extend(count)
+        self._reduce(level + 1, k)
+
+    def select_level(self, start=-np.inf, end=np.inf, max_points=1000):
+        # Return finest level spanning from start with at most max_points in [start, end]
+        # Bins of levels above 0 count for two points (min and max)
+        selected = 0
+        for level in range(self.levels):
+            n = self.size[level]
+            if n == 0:
+                break
+            selected = level
+            t = self.timestamp[level].get(n)
+            points = np.searchsorted(t, end, side='right') - np.searchsorted(t, start, side='left')
+            if (n < self.length or t[0] <= start) and points * (1 if level == 0 else 2) <= max_points:
+                break
+        return selected
+
+    def get(self, start=-np.inf, end=np.inf, max_points=1000, envelope=True):
+        # Return timestamps and values (time x channel, copies) to plot [start, end] with about max_points
+        # With envelope, bins are returned as two points (min then max), otherwise as their mean
+        # Recent bins not yet reduced in the selected level are appended from finer levels
+        level = self.select_level(start, end, max_points)
+        timestamps, values = [], []
+        for j in range(level, -1, -1):
+            n = self.size[j]
+            t = self.timestamp[j].get(n)
+            if j == level:
+                i0 = max(np.searchsorted(t, start, side='right') - 1, 0)  # Keep bin overlapping start
+                i1 = np.searchsorted(t, end, side='right')
+            else:
+                i0, i1 = n - self.pending[j], n
+            if i0 >= i1:
+                continue
+            if j == 0:
+                timestamps.append(t[i0:i1])
+                values.append(self.min[0].get(n)[i0:i1])
+            elif envelope:
+                timestamps.append(np.repeat(t[i0:i1], 2))
+                values.append(np.stack((self.min[j].get(n)[i0:i1], self.max[j].get(n)[i0:i1]),
+                                       axis=1).reshape(-1, self.width))
+            else:
+                timestamps.append(t[i0:i1])
+                values.append(self.mean[j].get(n)[i0:i1])
+        if not timestamps:
+            return np.empty(0), np.empty((0, self.width))
+        return np.concatenate(timestamps), np.concatenate(values)
+
+
 # Set Constant(s)
 COLOR_SET = ['#1f77b4',  # muted blue
              '#2ca02c',  # cooked asparagus green
@@ -6,6 +6,12 @@ from multiprocessing import freeze_support
 if __name__ == '__main__':
     freeze_support()
 
+    if '--headless' in sys.argv[1:]:
+        # Run without GUI (PyQt is not loaded)
+        from inlinino.headless import main
+        main(sys.argv[1:])
+        sys.exit()
+
     from inlinino.gui import App
     inlinino = App([])
 
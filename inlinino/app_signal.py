@@ -1,29 +1,35 @@
-from pyqtgraph.Qt import QtCore
+"""
+Signals of instruments, declared without Qt so drivers and loggers can run without PyQt (e.g. headless)
+The user interface uses the Qt adapters of these classes (inlinino.qt_signal).
+"""
+from inlinino.shared.signal import Signal
 
 
-class InstrumentSignals(QtCore.QObject):
-    status_update = QtCore.pyqtSignal()
-    packet_received = QtCore.pyqtSignal()
-    packet_corrupted = QtCore.pyqtSignal()
-    packet_logged = QtCore.pyqtSignal()
-    new_ts_data = QtCore.pyqtSignal([object, float], [object, float, bool])
-    new_spectrum_data = QtCore.pyqtSignal(list)
-    new_aux_data = QtCore.pyqtSignal(list)
-    new_meta_data = QtCore.pyqtSignal(list)
-    alarm = QtCore.pyqtSignal(bool)
-    alarm_custom = QtCore.pyqtSignal(str, str)
+class InterfaceSignals:
+    read = Signal(bytes)
+    write = Signal(bytes)
 
 
-class HyperNavSignals(InstrumentSignals):
-    toggle_command_mode = QtCore.pyqtSignal(bool)
-    new_frame = QtCore.pyqtSignal(object)
-    cfg_update = QtCore.pyqtSignal(str)
-    cmd_list = QtCore.pyqtSignal()
-    cmd_dump = QtCore.pyqtSignal(int)
-    warning = QtCore.pyqtSignal([str], [str, str], [str, str, str])
-    alarm = None  # Disable data timeout
+class InstrumentSignals:
+    status_update = Signal()
+    packet_received = Signal()
+    packet_corrupted = Signal()
+    packet_logged = Signal()
+    stats_tick = Signal(dict)  # packet counters, aux data, and metadata batched by BatchedSignals
+    new_ts_data = Signal([object, float], [object, float, bool])
+    new_spectrum_data = Signal(list)
+    new_aux_data = Signal(list)
+    new_meta_data = Signal(list)
+    alarm = Signal(bool)
+    alarm_custom = Signal(str, str)
 
 
-class InterfaceSignals(QtCore.QObject):
-    read = QtCore.pyqtSignal(bytes)
-    write = QtCore.pyqtSignal(bytes)
+class HyperNavSignals(InstrumentSignals):
+    interface_signals = InterfaceSignals  # Signals of interface spied on
+    toggle_command_mode = Signal(bool)
+    new_frame = Signal(object)
+    cfg_update = Signal(str)
+    cmd_list = Signal()
+    cmd_dump = Signal(int)
+    warning = Signal([str], [str, str], [str, str, str])
+    alarm = None  # Disable data timeout
@@ -13,32 +13,12 @@ import numpy as np
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtGui, QtCore, QtWidgets, uic
 from PyQt5 import QtMultimedia
-from pyACS.acs import ACS as ACSParser
-import pySatlantic.instrument as pySat
 
-from inlinino import RingBuffer, __version__, PATH_TO_RESOURCES, COLOR_SET
-from inlinino.app_signal import InstrumentSignals, HyperNavSignals
+from inlinino import HistoryBuffer, RingBuffer, __version__, PATH_TO_RESOURCES, COLOR_SET
+from inlinino.qt_signal import InstrumentSignals, HyperNavSignals
 from inlinino.cfg import CFG
-from inlinino.instruments import Instrument, SerialInterface, SocketInterface, USBInterface, USBHIDInterface
-from inlinino.instruments.acs import ACS
-from inlinino.instruments.apogee import ApogeeQuantumSensor
-from inlinino.instruments.dataq import DATAQ
-from inlinino.instruments.hyperbb import HyperBB
-from inlinino.instruments.hydroscat import HydroScat
-from inlinino.instruments.hypernav import HyperNav, read_manufacturer_pixel_registration
-from inlinino.instruments.lisst import LISST
-from inlinino.instruments.nmea import NMEA
-from inlinino.instruments.ontrak import Ontrak, USBADUHIDInterface
-from inlinino.instruments.satlantic import Satlantic
-from inlinino.instruments.suna import SunaV1, SunaV2
-from inlinino.instruments.taratsg import TaraTSG
-from inlinino.instruments.lisst import LISSTParser
-from inlinino.widgets.aux_data import AuxDataWidget
-from inlinino.widgets.flow_control import FlowControlWidget
-from inlinino.widgets.hypernav import HyperNavCalWidget
-from inlinino.widgets.metadata import MetadataWidget
-from inlinino.widgets.pump_control import PumpControlWidget
-from inlinino.widgets.select_channel import SelectChannelWidget
+from inlinino.instruments import SerialInterface, SocketInterface, ReplayInterface
+from inlinino.registry import get_instrument_class, get_widget_class, list_widgets, widget_enabled_attribute
 
 
 logger = logging.getLogger('GUI')
@@ -54,8 +34,10 @@ class MainWindow(QtGui.QMainWindow):
     BACKGROUND_COLOR = '#F8F8F2'
     FOREGROUND_COLOR = '#26292C'
     PEN_COLORS = COLOR_SET
-    BUFFER_LENGTH = 240
-    MAX_PLOT_REFRESH_RATE = 4   # Hz
+    HISTORY_LENGTH = 2048  # bins per level of timeseries history
+    HISTORY_LEVELS = 8     # with factor 4, last level spans 2048 * 4 ** 7 samples (~19 days at 20 Hz)
+    WATERFALL_LENGTH = 600  # spectra displayed by waterfall
+    MAX_PLOT_REFRESH_RATE = 4   # Hz, default of plot_refresh_rate in instrument configuration
 
     def __init__(self, instrument=None):
         super(MainWindow, self).__init__()
@@ -73,13 +55,27 @@ class MainWindow(QtGui.QMainWindow):
         pg.setConfigOption('foreground', pg.mkColor(self.FOREGROUND_COLOR))
         # Set figure with pyqtgraph
         # pg.setConfigOption('antialias', True)  # Lines are drawn with smooth edges at the cost of reduced performance
-        self._buffer_timestamp = None
-        self._buffer_data = []
+        self._history = HistoryBuffer(self.HISTORY_LENGTH, 0, self.HISTORY_LEVELS)  # time x variable
+        self.plot_history = None  # seconds of timeseries displayed (None for whole history)
         self.reset_ts_trace = False
-        self.last_timeseries_plot_refresh = time()
         self.timeseries_plot_widget = None
-        self.last_spectrum_plot_refresh = time()
         self.spectrum_plot_widget = None
+        self.waterfall_plot_widget = None
+        self.waterfall_image = None
+        self.waterfall_trace = None  # trace name displayed by waterfall (True for first trace)
+        self._waterfall = None  # time x wavelength
+        self._waterfall_x = None  # wavelengths of trace sorted, and order to sort spectra, to interpolate them on grid
+        self._waterfall_order = None
+        self._waterfall_grid = None  # evenly spaced wavelengths of image (None if trace already evenly spaced)
+        self._waterfall_index = 0
+        self._waterfall_dirty = False
+        # Render loop: data slots only update buffers and mark plots dirty, plots are redrawn by a timer
+        self._timeseries_dirty = False
+        self._spectrum_pending = {}  # last spectrum received by trace index
+        self.plot_refresh_rate = self.MAX_PLOT_REFRESH_RATE
+        self.signal_render = QtCore.QTimer()
+        self.signal_render.timeout.connect(self.render)
+        self.signal_render.start(int(1000 / self.plot_refresh_rate))
         # Set instrument
         if instrument:
             self.init_instrument(instrument)
@@ -127,16 +123,25 @@ class MainWindow(QtGui.QMainWindow):
     def init_instrument(self, instrument):
         self.instrument = instrument
         self.label_instrument_name.setText(self.instrument.short_name)
+        # Set plot refresh rate
+        cfg = CFG.instruments.get(self.instrument.uuid, {})
+        if 'plot_refresh_rate' in cfg.keys() and cfg['plot_refresh_rate'] > 0:
+            self.plot_refresh_rate = cfg['plot_refresh_rate']
+            self.signal_render.setInterval(int(1000 / self.plot_refresh_rate))
+        if 'plot_history' in cfg.keys() and cfg['plot_history'] > 0:
+            self.plot_history = cfg['plot_history']
+        if 'plot_waterfall' in cfg.keys() and cfg['plot_waterfall']:
+            self.waterfall_trace = cfg['plot_waterfall']
         # Set interface
         if self.instrument.interface_name.startswith('socket'):
             self.label_open_port.setText('Socket')
         elif self.instrument.interface_name.startswith('usb'):
             self.label_open_port.setText('USB Port')
+        elif self.instrument.interface_name.startswith('replay'):
+            self.label_open_port.setText('Replay')
         # Connect Signals
         self.instrument.signal.status_update.connect(self.on_status_update)
-        self.instrument.signal.packet_received.connect(self.on_packet_received)
-        self.instrument.signal.packet_corrupted.connect(self.on_packet_corrupted)
-        self.instrument.signal.packet_logged.connect(self.on_packet_logged)
+        self.instrument.signal.stats_tick.connect(self.on_stats_tick)
         self.instrument.signal.new_ts_data[object, float].connect(self.on_new_ts_data)
         self.instrument.signal.new_ts_data[object, float, bool].connect(self.on_new_ts_data)
         if self.instrument.signal.alarm is not None:
@@ -144,16 +149,11 @@ class MainWindow(QtGui.QMainWindow):
         if self.instrument.signal.alarm_custom is not None:
             self.instrument.signal.alarm_custom.connect(self.on_custom_alarm)
         # Set Widgets
-        available_widgets = {AuxDataWidget.__name__: (AuxDataWidget, False),
-                             FlowControlWidget.__name__: (FlowControlWidget, True),
-                             HyperNavCalWidget.__name__: (HyperNavCalWidget, True),
-                             MetadataWidget.__name__: (MetadataWidget, True),
-                             PumpControlWidget.__name__: (PumpControlWidget, True),
-                             SelectChannelWidget.__name__: (SelectChannelWidget, False)}
         primary_vertical_spacer, secondary_vertical_spacer = True, True
-        for widget, secondary_dock in available_widgets.values():
-            id = f'widget_{widget.__snake_name__[:-7]}_enabled'
+        for widget_key in list_widgets():  # Only import widgets enabled
+            id = widget_enabled_attribute(widget_key)
             if hasattr(self.instrument, id) and getattr(self.instrument, id):
+                widget, secondary_dock = get_widget_class(widget_key)
                 self.add_widget(widget, secondary_dock)
                 if widget.expanding:
                     if secondary_dock:
@@ -162,7 +162,7 @@ class MainWindow(QtGui.QMainWindow):
                         primary_vertical_spacer = False
         # Add same widget multiple times
         for widget_key, widget_kwargs in zip(self.instrument.widgets_to_load, self.instrument.widgets_to_load_kwargs):
-            widget, secondary_dock = available_widgets[widget_key]
+            widget, secondary_dock = get_widget_class(widget_key)
             self.add_widget(widget, secondary_dock, widget_kwargs)
             if widget.expanding:
                 if secondary_dock:
@@ -185,6 +185,11 @@ class MainWindow(QtGui.QMainWindow):
             if self.spectrum_plot_widget is None:
                 self.spectrum_plot_widget = self.create_spectrum_plot_widget(**self.instrument.spectrum_plot_axis_labels)
             self.centralwidget.layout().addWidget(self.spectrum_plot_widget)
+            if self.waterfall_trace is not None and self.waterfall_plot_widget is None:
+                self.waterfall_plot_widget, self.waterfall_image = self.create_waterfall_plot_widget(
+                    self.instrument.spectrum_plot_axis_labels.get('x_label_name', 'Wavelength'),
+                    self.instrument.spectrum_plot_axis_labels.get('x_label_units', 'nm'))
+                self.centralwidget.layout().addWidget(self.waterfall_plot_widget)
             self.set_spectrum_plot_widget()
             self.instrument.signal.new_spectrum_data.connect(self.on_new_spectrum_data)
         self.timeseries_plot_widget = self.create_timeseries_plot_widget()
@@ -222,8 +227,22 @@ class MainWindow(QtGui.QMainWindow):
         widget.plotItem.addLegend()
         return widget
 
+    @staticmethod
+    def create_waterfall_plot_widget(x_label_name='Wavelength', x_label_units='nm'):
+        widget = pg.PlotWidget(enableMenu=False)
+        widget.plotItem.setLabel('bottom', x_label_name, units=x_label_units)
+        widget.plotItem.getAxis('bottom').enableAutoSIPrefix(False)
+        widget.plotItem.setLabel('left', 'Spectra', units='#')
+        widget.plotItem.getAxis('left').enableAutoSIPrefix(False)
+        widget.plotItem.setMouseEnabled(x=True, y=False)
+        image = pg.ImageItem()
+        image.setLookupTable(pg.colormap.get('viridis').getLookupTable(nPts=256))
+        widget.plotItem.addItem(image)
+        return widget, image
+
     def set_spectrum_plot_widget(self):
         self.spectrum_plot_widget.clear()  # Remove all items (past frame headers)
+        self._spectrum_pending = {}  # Drop spectra received with previous traces
         min_x, max_x, n_x = None, None, None
         for i, (name, x) in enumerate(zip(self.instrument.spectrum_plot_trace_names,
                                           self.instrument.spectrum_plot_x_values)):
@@ -244,6 +263,25 @@ class MainWindow(QtGui.QMainWindow):
             self.spectrum_plot_widget.plotItem.setLabel('left', y_label_name, units=y_label_units)
         x_range = max_x - min_x
         self.spectrum_plot_widget.setLimits(minXRange=x_range / n_x, maxXRange=x_range)
+        if self.waterfall_plot_widget is not None:
+            self.set_waterfall_plot_widget()
+
+    def set_waterfall_plot_widget(self):
+        # Buffer spectra of trace selected, or of first trace
+        names, x_values = self.instrument.spectrum_plot_trace_names, self.instrument.spectrum_plot_x_values
+        self._waterfall_index = names.index(self.waterfall_trace) if self.waterfall_trace in names else 0
+        self._waterfall_dirty = False
+        self.waterfall_image.clear()
+        if self._waterfall_index < len(x_values) and len(x_values[self._waterfall_index]) > 0:
+            x = np.asarray(x_values[self._waterfall_index], dtype=float)
+            self._waterfall = RingBuffer(self.WATERFALL_LENGTH, np.float32, width=len(x))
+            # Image pixels are evenly spaced, so spectra are interpolated on a regular grid of wavelengths
+            self._waterfall_order = np.argsort(x, kind='stable')
+            self._waterfall_x = x[self._waterfall_order]
+            grid = np.linspace(self._waterfall_x[0], self._waterfall_x[-1], len(x))
+            self._waterfall_grid = None if np.allclose(x, grid) else grid
+        else:
+            self._waterfall = None
 
     def set_clock(self):
         zulu = gmtime(time())
@@ -264,6 +302,8 @@ class MainWindow(QtGui.QMainWindow):
                 self.label_open_port.setText('Socket')
             elif self.instrument.interface_name.startswith('usb'):
                 self.label_open_port.setText('USB Port')
+            elif self.instrument.interface_name.startswith('replay'):
+                self.label_open_port.setText('Replay')
             # Reset Plots
             self.reset_ts_trace = True  # Force update of variable names in timeseries
             if self.instrument.spectrum_plot_enabled:
@@ -313,14 +353,32 @@ class MainWindow(QtGui.QMainWindow):
                         CFG.write()
                     except IOError as e:
                         error_dialog()
-            elif issubclass(type(self.instrument._interface), USBInterface) or \
-                    issubclass(type(self.instrument._interface), USBHIDInterface) or \
-                    issubclass(type(self.instrument._interface), USBADUHIDInterface):
+            elif self.instrument.interface_name.startswith('usb'):  # usb, usb-hid, or usb-aduhid
                 # No need for dialog as automatic
                 try:
                     self.instrument.open()
                 except IOError as e:
                     error_dialog()
+            elif issubclass(type(self.instrument._interface), ReplayInterface):
+                path, selected_filter = QtGui.QFileDialog.getOpenFileName(
+                    caption='Choose log file to replay', filter='Raw Log File (*.raw *.bin)')
+                if not path:
+                    return
+                speed = CFG.interfaces.get(self.instrument.uuid, {}).get('replay_speed', 1)
+                speed, ok = QtWidgets.QInputDialog.getDouble(self, 'Inlinino: Replay ' + self.instrument.name,
+                                                             'Speed (0 for as fast as possible)', speed, 0, 1000, 1)
+                if not ok:
+                    return
+                try:
+                    self.instrument.open(path=path, speed=speed)
+                    # Save replay parameters for next time
+                    CFG.read()
+                    CFG.interfaces.setdefault(self.instrument.uuid, {})
+                    CFG.interfaces[self.instrument.uuid]['replay_path'] = path
+                    CFG.interfaces[self.instrument.uuid]['replay_speed'] = speed
+                    CFG.write()
+                except IOError as e:
+                    error_dialog()
             else:
                 logger.error('Interface not supported by GUI.')
                 return
@@ -340,7 +398,7 @@ class MainWindow(QtGui.QMainWindow):
                 self.instrument.log_start()
 
     def act_clear(self):
-        if len(self._buffer_data) > 0:
+        if self._history.width > 0:
             # Send no data which reset buffers
             self.instrument.signal.new_ts_data.emit([], time())
         if self.instrument.spectrum_plot_enabled:
@@ -394,26 +452,32 @@ class MainWindow(QtGui.QMainWindow):
         for widget in self.widgets:
             widget.counter_reset()
 
-    @QtCore.pyqtSlot()
-    def on_packet_received(self):
-        self.packets_received += 1
+    @QtCore.pyqtSlot(dict)
+    def on_stats_tick(self, tick):
+        if tick['packets_received']:
+            self.on_packet_received(tick['packets_received'])
+        if tick['packets_logged']:
+            self.on_packet_logged(tick['packets_logged'])
+        if tick['packets_corrupted']:
+            self.on_packet_corrupted(tick['packets_corrupted'])
+
+    def on_packet_received(self, n=1):
+        self.packets_received += n
         self.label_packets_received.setText(str(self.packets_received))
         if self.packets_corrupted_flag and time() - self.last_packet_corrupted_timestamp > 5:
             self.label_packets_corrupted.setStyleSheet(f'font-weight:normal;color: {self.FOREGROUND_COLOR};')
             self.packets_corrupted_flag = False
 
-    @QtCore.pyqtSlot()
-    def on_packet_logged(self):
-        self.packets_logged += 1
-        if self.packets_received < self.packets_logged < 2:  # Fix inconsistency when start logging
+    def on_packet_logged(self, n=1):
+        self.packets_logged += n
+        if self.packets_received < self.packets_logged <= n:  # Fix inconsistency when start logging
             self.packets_received = self.packets_logged
             self.label_packets_received.setText(str(self.packets_received))
         self.label_packets_logged.setText(str(self.packets_logged))
 
-    @QtCore.pyqtSlot()
-    def on_packet_corrupted(self):
+    def on_packet_corrupted(self, n=1):
         ts = time()
-        self.packets_corrupted += 1
+        self.packets_corrupted += n
         self.label_packets_corrupted.setText(str(self.packets_corrupted))
         if ts - self.last_packet_corrupted_timestamp < 5:  # seconds
             self.label_packets_corrupted.setStyleSheet('font-weight:bold;color: #e0463e;')  # red
@@ -423,7 +487,7 @@ class MainWindow(QtGui.QMainWindow):
 
     def reset_ts(self, data, reset):
         n = len(data)
-        if reset or len(self._buffer_data) != len(data) or self.reset_ts_trace:
+        if reset or self._history.width != len(data) or self.reset_ts_trace:
             self.reset_ts_trace = False
             # Init legend
             if hasattr(self.instrument, 'widget_active_timeseries_variables_selected'):
@@ -439,8 +503,7 @@ class MainWindow(QtGui.QMainWindow):
                 self.reset_ts_trace = True
                 return
             # Init buffers
-            self._buffer_timestamp = RingBuffer(self.BUFFER_LENGTH)
-            self._buffer_data = [RingBuffer(self.BUFFER_LENGTH) for i in range(len(data))]
+            self._history = HistoryBuffer(self.HISTORY_LENGTH, n, self.HISTORY_LEVELS)
             # Re-initialize Plot (need to do so when number of curve changes)
             self.timeseries_plot_widget.clear()
             # Init curves
@@ -463,7 +526,7 @@ class MainWindow(QtGui.QMainWindow):
                 finally:
                     self.instrument.active_timeseries_variables_lock.release()
             else:
-                if reset or len(self._buffer_data) != len(data) or self.reset_ts_trace:
+                if reset or self._history.width != len(data) or self.reset_ts_trace:
                     logger.warning('Unable to acquire lock to update timeseries variables.')
                     self.reset_ts_trace = True
                     return
@@ -474,42 +537,87 @@ class MainWindow(QtGui.QMainWindow):
         # Update buffers
         if n == 0: # Nothing to update (won't trigger reset)
             return
-        self._buffer_timestamp.extend(timestamp)
-        for i in range(n):
-            self._buffer_data[i].extend(data[i])
-        # Update timeseries figure
-        if time() - self.last_timeseries_plot_refresh < 1 / self.MAX_PLOT_REFRESH_RATE:
-            return
-        timestamp = self._buffer_timestamp.get(self.BUFFER_LENGTH)  # Not used anymore
-        for i in range(n):
-            y = self._buffer_data[i].get(self.BUFFER_LENGTH)
-            x = np.arange(len(y))
-            y[np.isinf(y)] = 0
-            nsel = np.isnan(y)
-            if not np.all(nsel):
-                sel = np.logical_not(nsel)
-                y[nsel] = np.interp(x[nsel], x[sel], y[sel])
-                # self.timeseries_widget.plotItem.items[i].setData(y, connect="finite")
-                self.timeseries_plot_widget.plotItem.items[i].setData(timestamp[sel], y[sel], connect="finite")
-        self.timeseries_plot_widget.plotItem.enableAutoRange(x=True)  # Needed as somehow the user disable sometimes
-        self.last_timeseries_plot_refresh = time()
+        self._history.extend(timestamp, data)
+        self._timeseries_dirty = True
 
     @QtCore.pyqtSlot(list)
     def on_new_spectrum_data(self, data):
-        # Does not support MAX_PLOT_REFRESH_RATE as in some instances two spectrum are received back to back
-        # followed by a lapse of time permanently preventing to display one spectrum.
-        # This was an issue for the HyperPro.
+        # Keep last spectrum of each trace until rendered, so spectra received back to back (e.g. HyperPro frames
+        # updating distinct traces) are all displayed
         for i, y in enumerate(data):
-            if y is None or i > len(self.instrument.spectrum_plot_x_values):
+            if y is not None:
+                self._spectrum_pending[i] = y
+        # Waterfall keeps every spectrum
+        if self._waterfall is not None and self._waterfall_index < len(data):
+            y = data[self._waterfall_index]
+            if y is not None and len(y) == self._waterfall.width:
+                if self._waterfall_grid is not None:
+                    y = np.interp(self._waterfall_grid, self._waterfall_x, np.asarray(y)[self._waterfall_order])
+                self._waterfall.extend(y)
+                self._waterfall_dirty = True
+
+    def render(self):
+        if not self.isVisible() or self.isMinimized():
+            return  # Buffers keep being updated, plots are rendered once the window is shown
+        if self._timeseries_dirty:
+            self._timeseries_dirty = False
+            self.render_timeseries()
+        if self._spectrum_pending:
+            pending, self._spectrum_pending = self._spectrum_pending, {}
+            self.render_spectrum(pending)
+        if self._waterfall_dirty:
+            self._waterfall_dirty = False
+            self.render_waterfall()
+
+    def render_timeseries(self):
+        items = self.timeseries_plot_widget.plotItem.items
+        if self._history.width != len(items):
+            return  # Curves being reset
+        # Level of history matching width of plot, about two points per pixel
+        start = self._history.timestamp[0].get()[0] - self.plot_history if self.plot_history else -np.inf
+        max_points = 2 * max(int(self.timeseries_plot_widget.plotItem.getViewBox().width()), 100)
+        timestamp, buffer = self._history.get(start, max_points=max_points)
+        for i in range(self._history.width):
+            y = buffer[:, i]
+            sel = np.logical_not(np.isnan(y))
+            if np.any(sel):
+                y = y[sel]  # Copy
+                y[np.isinf(y)] = 0
+                # self.timeseries_widget.plotItem.items[i].setData(y, connect="finite")
+                items[i].setData(timestamp[sel], y, connect="finite")
+        self.timeseries_plot_widget.plotItem.enableAutoRange(x=True)  # Needed as somehow the user disable sometimes
+
+    def render_spectrum(self, spectra):
+        items = self.spectrum_plot_widget.plotItem.items
+        for i, y in spectra.items():
+            if i >= len(self.instrument.spectrum_plot_x_values) or i >= len(items):
                 continue
             x = self.instrument.spectrum_plot_x_values[i]
             # Replace NaN and Inf by interpolated values
             nsel = np.logical_or(np.isinf(y), np.isnan(y))
-            sel = np.logical_not(nsel)
-            y[nsel] = np.interp(x[nsel], x[sel], y[sel])
+            if np.any(nsel):
+                sel = np.logical_not(nsel)
+                if not np.any(sel):
+                    continue
+                y = np.array(y, dtype=float)  # Copy as array is owned by instrument
+                y[nsel] = np.interp(x[nsel], x[sel], y[sel])
             # TODO Check with real instrument if really need trick above
-            self.spectrum_plot_widget.plotItem.items[i].setData(x, y, connect="finite")
-        self.last_spectrum_plot_refresh = time()
+            items[i].setData(x, y, connect="finite")
+
+    def render_waterfall(self):
+        image = self._waterfall.data  # View, oldest spectrum first
+        sel = np.isfinite(image)
+        if not np.any(sel):
+            return
+        # Levels adjusted to spectra displayed, NaN and Inf displayed as lowest level
+        low, high = np.min(image, where=sel, initial=np.inf), np.max(image, where=sel, initial=-np.inf)
+        image = np.where(sel, image, low)
+        self.waterfall_image.setImage(image.T, autoLevels=False, levels=(low, high if high > low else low + 1))
+        # Wavelengths in x (pixels centered on grid), most recent spectrum on top at 0
+        min_x, max_x, n = self._waterfall_x[0], self._waterfall_x[-1], len(self._waterfall_x)
+        step = (max_x - min_x) / (n - 1) if n > 1 and max_x > min_x else 1
+        self.waterfall_image.setRect(QtCore.QRectF(min_x - step / 2, -self.WATERFALL_LENGTH,
+                                                   max_x - min_x + step, self.WATERFALL_LENGTH))
 
     @QtCore.pyqtSlot(bool)
     def on_data_timeout(self, active):
@@ -730,6 +838,7 @@ class DialogInstrumentSetup(QtGui.QDialog):
                 item.layout().setParent(None)
         # Update selection of immersed files
         if is_sip:
+            import pySatlantic.instrument as pySat
             self.tdf_files = file_names[0]
             file_names = [f for f in zipfile.ZipFile(self.tdf_files, 'r').namelist()
                           if os.path.splitext(f)[1].lower() in pySat.Instrument.VALID_CAL_EXTENSIONS
@@ -957,6 +1066,7 @@ class DialogInstrumentSetup(QtGui.QDialog):
         elif self.cfg['module'] == 'acs':
             self.cfg['manufacturer'] = 'WetLabs'
             try:
+                from pyACS.acs import ACS as ACSParser
                 # serial number in ACSParser is given in hexadecimal and preceded by 2 bytes indicating meter type
                 foo = ACSParser(self.cfg['device_file']).serial_number
                 if foo[:4] == '0x53':
@@ -976,6 +1086,7 @@ class DialogInstrumentSetup(QtGui.QDialog):
             self.cfg['manufacturer'] = 'Sequoia'
             self.cfg['model'] = 'LISST100X'
             try:
+                from inlinino.instruments.lisst import LISSTParser
                 self.cfg['serial_number'] = str(LISSTParser(self.cfg['device_file'], self.cfg['ini_file'],
                                                             self.cfg['dcal_file'], self.cfg['zsc_file']).serial_number)
             except:
@@ -1049,6 +1160,8 @@ class DialogInstrumentSetup(QtGui.QDialog):
                 self.notification('Starboard serial number must be an integer.')
                 return
             try:
+                import pySatlantic.instrument as pySat
+                from inlinino.instruments.hypernav import read_manufacturer_pixel_registration
                 for path in (self.cfg['px_reg_path_prt'], self.cfg['px_reg_path_sbd']):
                     if not path:
                         continue
@@ -1253,6 +1366,7 @@ class DialogInstrumentUpdate(DialogInstrumentSetup):
                     raise ValueError('Expect list or str for tdf_files')
                 # Update local file list
                 if is_sip:
+                    import pySatlantic.instrument as pySat
                     self.tdf_files = self.cfg['tdf_files']
                     tmp_files = [f for f in zipfile.ZipFile(self.tdf_files, 'r').namelist()
                                  if os.path.splitext(f)[1].lower() in pySat.Instrument.VALID_CAL_EXTENSIONS
@@ -1508,17 +1622,13 @@ class App(QtGui.QApplication):
         instrument_loaded = False
         while not instrument_loaded:
             try:
-                instrument_class = {'generic': Instrument, 'acs': ACS, 'apogee': ApogeeQuantumSensor,
-                                    'dataq': DATAQ, 'hydroscat': HydroScat, 'hyperbb': HyperBB, 'hypernav': HyperNav,
-                                    'lisst': LISST, 'nmea': NMEA,
-                                    'ontrak': Ontrak,
-                                    'satlantic': Satlantic,
-                                    'sunav1': SunaV1, 'sunav2': SunaV2, 'taratsg': TaraTSG}
-                instrument_signal = HyperNavSignals if instrument_module_name == 'hypernav' else InstrumentSignals
-                if instrument_module_name not in instrument_class.keys():
+                try:
+                    instrument_class = get_instrument_class(instrument_module_name)  # Only import driver used
+                except ValueError:
                     logger.critical('Instrument module not supported')
                     sys.exit(-1)
-                self.main_window.init_instrument(instrument_class[instrument_module_name](
+                instrument_signal = HyperNavSignals if instrument_module_name == 'hypernav' else InstrumentSignals
+                self.main_window.init_instrument(instrument_class(
                     instrument_uuid, CFG.instruments[instrument_uuid].copy(), instrument_signal()
                 ))
                 instrument_loaded = True
@@ -0,0 +1,245 @@
+"""
+Run several instruments in one process without Graphical User Interface
+
+Instruments are loaded from inlinino_cfg.json and connected with the interface parameters saved by the GUI
+(section "interfaces" of the configuration file). Logging starts as soon as an instrument is connected.
+A supervisor re-opens instruments that closed due to a communication error and reports periodically
+the resources used by each instrument.
+    python -m inlinino --headless --all
+    python -m inlinino --headless <uuid> [<uuid> ...]
+    python -m inlinino --headless --reactor --all
+"""
+import argparse
+import logging
+import os
+import sys
+from threading import Event
+from time import time
+
+from inlinino.app_signal import InstrumentSignals, HyperNavSignals
+from inlinino.cfg import CFG
+from inlinino.registry import get_instrument_class
+from inlinino.shared.reactor import get_reactor
+from inlinino.shared.file_utils import sizeof_fmt
+
+
+logger = logging.getLogger('Headless')
+
+
+def get_rss():
+    """
+    Resident memory of process in bytes, None if not available on platform
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, kilobytes on Linux and bytes on macOS
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except ImportError:
+        return None
+
+
+def get_thread_cpu_time(native_id):
+    """
+    CPU time (user + system) used by thread in seconds, None if not available on platform
+    """
+    try:
+        with open(f'/proc/self/task/{native_id}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')  # utime + stime
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class SupervisedInstrument:
+    def __init__(self, uuid, reactor=False):
+        self.uuid = uuid
+        self.reactor = reactor
+        self.cfg = CFG.instruments[uuid]
+        self.name = self.cfg['model'] + ' ' + self.cfg['serial_number']
+        self.instrument = None
+        self.rss_on_load = None
+        self.restarts = 0
+        self.failed_attempts = 0
+        self.next_attempt = 0
+        self.packets_received = 0
+        self.packets_corrupted = 0
+        self._cpu_time = 0
+        self._cpu_time_timestamp = time()
+
+    def load(self):
+        instrument_class = get_instrument_class(self.cfg['module'])
+        signal = HyperNavSignals() if self.cfg['module'] == 'hypernav' else InstrumentSignals()
+        signal.stats_tick.connect(self.on_stats_tick)
+        rss = get_rss()
+        self.instrument = instrument_class(self.uuid, self.cfg.copy(), signal)
+        if self.reactor:
+            self.instrument.reactor_enabled = True
+        if rss is not None:
+            self.rss_on_load = get_rss() - rss
+
+    def on_stats_tick(self, tick):
+        self.packets_received += tick['packets_received']
+        self.packets_corrupted += tick['packets_corrupted']
+
+    def get_interface_kwargs(self):
+        from inlinino.instruments import SerialInterface, SocketInterface, ReplayInterface
+        cfg = CFG.interfaces.get(self.uuid, {})
+        interface = self.instrument._interface
+        if isinstance(interface, SerialInterface):
+            if 'port' not in cfg.keys():
+                raise ValueError(f'No serial port saved for {self.name}, connect instrument once with the GUI.')
+            kwargs = {'port': cfg['port'],
+                      'baudrate': getattr(self.instrument, 'default_serial_baudrate', 19200),
+                      'timeout': getattr(self.instrument, 'default_serial_timeout', 2)}
+            for k in ('baudrate', 'bytesize', 'parity', 'stopbits', 'timeout'):
+                if k in cfg.keys():
+                    kwargs[k] = cfg[k]
+            return kwargs
+        elif isinstance(interface, SocketInterface):
+            if 'socket_ip' not in cfg.keys() or 'socket_port' not in cfg.keys():
+                raise ValueError(f'No socket saved for {self.name}, connect instrument once with the GUI.')
+            return {'ip': cfg['socket_ip'], 'port': cfg['socket_port']}
+        elif isinstance(interface, ReplayInterface):
+            if 'replay_path' not in cfg.keys():
+                raise ValueError(f'No log file to replay saved for {self.name}.')
+            return {'path': cfg['replay_path'], 'speed': cfg.get('replay_speed', 1)}
+        return {}  # USB interfaces are found automatically
+
+    def start(self):
+        if self.instrument is None:
+            self.load()
+        self.instrument.open(**self.get_interface_kwargs())
+        self.instrument.log_start()
+
+    def stop(self):
+        if self.instrument is not None and self.instrument.alive:
+            self.instrument.close()
+
+    @property
+    def finished(self) -> bool:
+        """
+        Replay of log files is complete, instrument should not be restarted
+        """
+        return self.instrument is not None and not self.instrument.alive and \
+            getattr(self.instrument._interface, 'end_of_replay', False)
+
+    def cpu_usage(self):
+        """
+        CPU used by threads of instrument since last call in percent
+        """
+        if self.instrument is None:
+            return None
+        cpu_time = 0
+        for thread in self.instrument.threads:
+            t = get_thread_cpu_time(thread.native_id)
+            if t is None:
+                return None
+            cpu_time += t
+        timestamp = time()
+        # Thread restarted if cpu time decreased
+        usage = max(0., cpu_time - self._cpu_time) / (timestamp - self._cpu_time_timestamp) * 100
+        self._cpu_time, self._cpu_time_timestamp = cpu_time, timestamp
+        return usage
+
+
+class Supervisor:
+    CHECK_INTERVAL = 1  # seconds
+    RESTART_DELAY = 5  # seconds, doubled after each failed attempt
+    MAX_RESTART_DELAY = 300  # seconds
+
+    def __init__(self, uuids, report_interval=60, reactor=False):
+        self.instruments = [SupervisedInstrument(uuid, reactor) for uuid in uuids]
+        self.report_interval = report_interval
+        self._stop = Event()
+        self._reactor_cpu_time = 0
+        self._reactor_cpu_time_timestamp = time()
+
+    def start_instrument(self, supervised):
+        try:
+            supervised.start()
+            logger.info(f'Started {supervised.name}')
+            supervised.failed_attempts, supervised.next_attempt = 0, 0
+        except Exception as e:
+            delay = min(self.RESTART_DELAY * 2 ** supervised.failed_attempts, self.MAX_RESTART_DELAY)
+            supervised.failed_attempts += 1
+            supervised.next_attempt = time() + delay
+            logger.error(f'Unable to start {supervised.name}, next attempt in {delay} seconds. {e}')
+
+    def report(self):
+        rss = get_rss()
+        logger.info(f'Process memory: {sizeof_fmt(rss) if rss is not None else "n/a"}')
+        reactor = get_reactor()
+        if reactor.alive:
+            cpu_time, timestamp = get_thread_cpu_time(reactor.thread.native_id), time()
+            if cpu_time is not None:
+                usage = max(0., cpu_time - self._reactor_cpu_time) / \
+                    (timestamp - self._reactor_cpu_time_timestamp) * 100
+                self._reactor_cpu_time, self._reactor_cpu_time_timestamp = cpu_time, timestamp
+            logger.info(f'Reactor: {len(reactor)} instruments, '
+                        f'cpu {"n/a" if cpu_time is None else "%.1f%%" % usage}')
+        for s in self.instruments:
+            cpu = s.cpu_usage()
+            status = 'off' if s.instrument is None else str(s.instrument)
+            logger.info(f'{s.name}: {status}, packets received {s.packets_received}, '
+                        f'corrupted {s.packets_corrupted}, restarts {s.restarts}, '
+                        f'cpu {"n/a" if cpu is None else "%.1f%%" % cpu}, '
+                        f'memory on load {"n/a" if s.rss_on_load is None else sizeof_fmt(s.rss_on_load)}')
+
+    def run(self):
+        for s in self.instruments:
+            self.start_instrument(s)
+        last_report = time()
+        try:
+            while not self._stop.wait(self.CHECK_INTERVAL):
+                if all(s.finished for s in self.instruments):
+                    logger.info('Replay complete')
+                    break
+                for s in self.instruments:
+                    if s.finished:
+                        continue
+                    if (s.instrument is None or not s.instrument.alive) and time() > s.next_attempt:
+                        if s.instrument is not None and s.failed_attempts == 0:
+                            logger.warning(f'{s.name} closed, restarting.')
+                            s.restarts += 1
+                        self.start_instrument(s)
+                if self.report_interval and time() - last_report >= self.report_interval:
+                    self.report()
+                    last_report = time()
+        except KeyboardInterrupt:
+            logger.info('Interrupted')
+        finally:
+            self.stop_all()
+
+    def stop(self):
+        self._stop.set()
+
+    def stop_all(self):
+        for s in self.instruments:
+            try:
+                s.stop()
+            except Exception as e:
+                logger.warning(f'Unable to close {s.name}. {e}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='inlinino', description='Run instruments without user interface.')
+    parser.add_argument('--headless', action='store_true', help='start without graphical user interface')
+    parser.add_argument('--all', action='store_true', help='load all instruments configured')
+    parser.add_argument('--report-interval', type=float, default=60,
+                        help='seconds between resources reports (0 to disable)')
+    parser.add_argument('--reactor', action='store_true',
+                        help='read serial and socket interfaces from a single thread')
+    parser.add_argument('uuids', nargs='*', help='uuid of instruments to load')
+    args = parser.parse_args(argv)
+    uuids = list(CFG.instruments.keys()) if args.all else args.uuids
+    if not uuids:
+        parser.error('Specify --all or uuid(s) of instrument(s) to load.')
+    for uuid in uuids:
+        if uuid not in CFG.instruments.keys():
+            parser.error(f'Instrument {uuid} not found in configuration.')
+    Supervisor(uuids, args.report_interval, args.reactor).run()
@@ -1,15 +1,20 @@
 import os
 import platform
 import socket
-from threading import Thread
+from threading import Thread, Event
 from time import time
 
 import serial
-import usb.core
-import usb.backend.libusb1
-import hid
 
-from inlinino.log import Log, LogText
+from inlinino.log import Log, LogText, LogColumnar, FSYNC_NEVER, FSYNC_POLICIES, LOG_FORMAT_CSV, \
+    LOG_FORMAT_COLUMNAR, LOG_FORMATS
+from inlinino.shared.frame_splitter import FrameSplitter
+from inlinino.shared.pipeline import Stage, LogWriter, QueuedLogProxy, call_handler, \
+    BLOCK, DROP_OLDEST, OVERFLOW_POLICIES
+from inlinino.shared.reactor import get_reactor
+from inlinino.shared.signal import BatchedSignals
+from inlinino.shared.log_reader import read_log, list_logs
+from inlinino.shared.stats import InstrumentStats, TimedLogProxy, write_stats
 from inlinino import PATH_TO_RESOURCES
 import logging
 
@@ -32,11 +37,40 @@ class Instrument:
         self._interface = SerialInterface()
         self._terminator = None
         self._buffer = bytearray()
+        self._frame_splitter = FrameSplitter(None)
         self._max_buffer_length = 16384
 
         # Thread
         self._thread = None
         self.alive = False  # Might be replaced by Thread.is_alive()
+        self._data_timeout_flag = False
+        self._data_received_timestamp = None
+
+        # Reactor (optional): interface is read by a thread shared with other instruments instead of its own thread
+        self.reactor_enabled = False
+        self._reactor = None
+
+        # Pipeline (optional): reader thread only timestamps chunks, parsing and logging run in their own thread
+        self.pipeline_enabled = False
+        self.pipeline_queue_size = 1024
+        self.pipeline_overflow = DROP_OLDEST
+        self._parse_stage = None
+        self._log_stage = None
+
+        # Asynchronous logging (optional): rows are written by a writer thread flushing files periodically
+        self.log_async = False
+        self.log_queue_size = 4096
+        self.log_flush_interval = 1  # seconds
+        self.log_buffer_size = 2 ** 20  # bytes
+        self.log_fsync = FSYNC_NEVER
+        self.log_prod_format = LOG_FORMAT_CSV  # or columnar (binary, spectra as float32 blocks)
+        self.log_index_interval = 0  # seconds between entries of log index files, 0 disables index
+
+        # Statistics: counters and latency histograms of each stage, optionally appended to file periodically
+        self._stats = InstrumentStats()
+        self._chunk_read = None  # Time at which chunk being handled was read
+        self.stats_interval = 0  # seconds, 0 disables stats file
+        self._stats_written = 0
 
         # Logger
         self._log_raw = None
@@ -50,8 +84,9 @@ class Instrument:
         self.variable_columns = None
         self.variable_types = None
 
-        # User Interface
-        self.signal = signal
+        # User Interface: packet counters, aux data, and metadata are published periodically by a single signal
+        self.signal = BatchedSignals(signal) if signal is not None else None
+        self.stats_tick_rate = 4  # Hz
         self.model = ''
         self.serial_number = ''
         self.variable_names = None
@@ -120,7 +155,11 @@ class Instrument:
                     raise ValueError('%s invalid length' % k)
         # Communication Interface (for retro-compatibility: default interface is serial)
         self.setup_interface(cfg)
+        self.setup_pipeline(cfg)
         self._terminator = cfg['terminator']
+        self._frame_splitter = FrameSplitter(self._terminator)
+        if isinstance(self._interface, ReplayInterface):
+            self._interface.terminator = self._terminator
         # Logger
         self.model = cfg['model']
         self.serial_number = cfg['serial_number']
@@ -128,11 +167,15 @@ class Instrument:
         for k in ['length', 'variable_names', 'variable_units', 'variable_precision']:
             if k in cfg.keys():
                 log_cfg[k] = cfg[k]
+        prod_logger = LogColumnar if self.log_prod_format == LOG_FORMAT_COLUMNAR else Log
         if not self._log_raw:
             self.logger.debug('Init loggers')
             self._log_raw = raw_logger(log_cfg, self.signal.status_update)
-            self._log_prod = Log(log_cfg, self.signal.status_update)
+            self._log_prod = prod_logger(log_cfg, self.signal.status_update)
         else:
+            if type(self._log_prod) is not prod_logger:
+                self._log_prod.close()
+                self._log_prod = prod_logger(log_cfg, self.signal.status_update)
             self.log_update_cfg(log_cfg)
         self._log_active = False  # Needed in case thread doesn't join during self.close()
         self.log_raw_enabled = cfg['log_raw']
@@ -164,18 +207,85 @@ class Instrument:
             elif cfg['interface'] == 'usb':
                 if not isinstance(self._interface, USBInterface):
                     self._interface = USBInterface()
+            elif cfg['interface'] == 'replay':
+                if not isinstance(self._interface, ReplayInterface):
+                    self._interface = ReplayInterface()
             else:
                 raise ValueError(f'Invalid communication interface {cfg["interface"]}')
 
+    def setup_pipeline(self, cfg):
+        if 'stats_interval' in cfg.keys():
+            self.stats_interval = float(cfg['stats_interval'])
+            if self.stats_interval < 0:
+                raise ValueError('Stats interval must be positive.')
+        if 'stats_tick_rate' in cfg.keys():
+            self.stats_tick_rate = float(cfg['stats_tick_rate'])
+            if not 2 <= self.stats_tick_rate <= 10:
+                raise ValueError('Stats tick rate must be between 2 and 10 Hz.')
+        if 'reactor' in cfg.keys():
+            self.reactor_enabled = bool(cfg['reactor'])
+        if 'pipeline' in cfg.keys():
+            self.pipeline_enabled = bool(cfg['pipeline'])
+        if 'pipeline_queue_size' in cfg.keys():
+            self.pipeline_queue_size = int(cfg['pipeline_queue_size'])
+            if self.pipeline_queue_size < 1:
+                raise ValueError('Pipeline queue size must be strictly positive.')
+        if 'pipeline_overflow' in cfg.keys():
+            if cfg['pipeline_overflow'] not in OVERFLOW_POLICIES:
+                raise ValueError(f'Invalid pipeline overflow policy {cfg["pipeline_overflow"]}')
+            self.pipeline_overflow = cfg['pipeline_overflow']
+        if 'log_async' in cfg.keys():
+            self.log_async = bool(cfg['log_async'])
+        if 'log_queue_size' in cfg.keys():
+            self.log_queue_size = int(cfg['log_queue_size'])
+            if self.log_queue_size < 1:
+                raise ValueError('Log queue size must be strictly positive.')
+        if 'log_flush_interval' in cfg.keys():
+            self.log_flush_interval = float(cfg['log_flush_interval'])
+            if self.log_flush_interval <= 0:
+                raise ValueError('Log flush interval must be strictly positive.')
+        if 'log_buffer_size' in cfg.keys():
+            self.log_buffer_size = int(cfg['log_buffer_size'])
+        if 'log_fsync' in cfg.keys():
+            if cfg['log_fsync'] not in FSYNC_POLICIES:
+                raise ValueError(f'Invalid log fsync policy {cfg["log_fsync"]}')
+            self.log_fsync = cfg['log_fsync']
+        if 'log_index_interval' in cfg.keys():
+            self.log_index_interval = float(cfg['log_index_interval'])
+            if self.log_index_interval < 0:
+                raise ValueError('Log index interval must be positive.')
+        if 'log_products_format' in cfg.keys():
+            if cfg['log_products_format'] not in LOG_FORMATS:
+                raise ValueError(f'Invalid log products format {cfg["log_products_format"]}')
+            self.log_prod_format = cfg['log_products_format']
+
     def open(self, **kwargs):
         if not self.alive:
             # Open serial connection
             self._interface.open(**kwargs)
             self.alive = True
-            # Start reading/writing thread
-            self._thread = Thread(name=self.name, target=self.run)
-            self._thread.daemon = True
-            self._thread.start()
+            self._stats.reset()
+            self._stats_written = time()
+            self.signal.rate = self.stats_tick_rate
+            for log in (self._log_raw, self._log_prod):
+                log.buffer_size = self.log_buffer_size if self.log_async else -1
+                log.fsync = self.log_fsync
+                log.index_interval = self.log_index_interval
+            if self.pipeline_enabled or self.log_async:
+                self.pipeline_start()
+            else:
+                self._log_raw = TimedLogProxy(self._log_raw, self._stats)
+                self._log_prod = TimedLogProxy(self._log_prod, self._stats)
+            if self.reactor_enabled and self.reactor_compatible:
+                # Share reading/writing thread with other instruments
+                if self.start_interface():
+                    self._reactor = get_reactor()
+                    self._reactor.register(self)
+            else:
+                # Start reading/writing thread
+                self._thread = Thread(name=self.name, target=self.run)
+                self._thread.daemon = True
+                self._thread.start()
             # Signal to UI
             self.signal.status_update.emit()
 
@@ -183,58 +293,32 @@ class Instrument:
         if self.alive:
             self.alive = False
             self.signal.status_update.emit()
+            if self._reactor is not None:
+                self._reactor.unregister(self)
+                self._reactor = None
             self._interface.stop()
-            if wait_thread_join:
+            if wait_thread_join and self._thread is not None:
                 timeout = self._interface.timeout if self._interface.timeout is not None else 1
                 self._thread.join(2*timeout)  # Need time to read and write
                 if self._thread.is_alive():
                     self.logger.warning('Thread did not join.')
+            self.pipeline_stop()  # Process chunks and rows queued before closing log files
             self.log_stop()
+            if isinstance(self._log_raw, TimedLogProxy):
+                self._log_raw, self._log_prod = self._log_raw.log, self._log_prod.log
+            if self.stats_interval:
+                self.write_stats(force=True)
             self._interface.close()
             self._buffer = bytearray()
 
     def run(self):
-        if self._interface.is_open:
-            try:
-                # Initialize interface (typically empty buffers)
-                self._interface.init()
-                # Send init frame to instrument
-                self.init_interface()
-            except IOError as e:
-                self.logger.error(e)
-                if self.signal.alarm is not None:
-                    self.signal.alarm.emit(True)
-                self.close(wait_thread_join=False)
-                return
-            # Set data timeout flag
-            data_timeout_flag = False
-            data_received = None
+        if self._interface.is_open and not self.start_interface():
+            return
         while self.alive and self._interface.is_open:
             try:
                 # read all that is there or wait for one byte (blocking)
                 data = self._interface.read()
-                timestamp = time()
-                if data:
-                    try:
-                        self.data_received(data, timestamp)
-                        if len(self._buffer) > self._max_buffer_length:
-                            self.logger.warning('Buffer exceeded maximum length. Buffer emptied to prevent overflow')
-                            self._buffer = bytearray()
-                        data_received = timestamp
-                        if data_timeout_flag:
-                            data_timeout_flag = False
-                            if self.signal.alarm is not None:
-                                self.signal.alarm.emit(False)
-                    except Exception as e:
-                        self.logger.warning(e)
-                        # raise e
-                else:
-                    if data_received is not None and \
-                            timestamp - data_received > self.DATA_TIMEOUT and data_timeout_flag is False:
-                        self.logger.error(f'No data received during the past {timestamp - data_received:.2f} seconds')
-                        data_timeout_flag = True
-                        if self.signal.alarm is not None:
-                            self.signal.alarm.emit(True)
+                self.dispatch_chunk(data, self._interface.timestamp)
                 # give instrument opportunity to write (e.g. commands) to interface
                 self.write_to_interface()
             except IOError as e:
@@ -249,10 +333,173 @@ class Instrument:
             if self.signal.alarm is not None:
                 self.signal.alarm.emit(True)
 
+    def start_interface(self) -> bool:
+        """
+        Initialize interface and instrument, run once connection is opened
+        :return: False if instrument could not be initialized (instrument is closed)
+        """
+        try:
+            # Initialize interface (typically empty buffers)
+            self._interface.init()
+            # Send init frame to instrument
+            self.init_interface()
+        except IOError as e:
+            self.logger.error(e)
+            if self.signal.alarm is not None:
+                self.signal.alarm.emit(True)
+            self.close(wait_thread_join=False)
+            return False
+        # Reset data timeout flag
+        self._data_timeout_flag = False
+        self._data_received_timestamp = None
+        return True
+
+    def dispatch_chunk(self, data, timestamp):
+        """
+        Handle chunk read from interface, either directly or through the parser stage of the pipeline
+        """
+        if data:
+            try:
+                self._stats.bytes_read += len(data)
+                self._stats.chunks_read += 1
+                if self._parse_stage is None:
+                    self.handle_chunk(data, timestamp)
+                else:
+                    self._parse_stage.put((data, timestamp, time()))
+                self._data_received_timestamp = timestamp
+                if self._data_timeout_flag:
+                    self._data_timeout_flag = False
+                    if self.signal.alarm is not None:
+                        self.signal.alarm.emit(False)
+            except Exception as e:
+                self.logger.warning(e)
+                # raise e
+        else:
+            self.check_data_timeout(timestamp)
+        if self.stats_interval:
+            self.write_stats()
+
+    def check_data_timeout(self, timestamp):
+        if self._data_received_timestamp is not None and self._data_timeout_flag is False and \
+                timestamp - self._data_received_timestamp > self.DATA_TIMEOUT:
+            self.logger.error(f'No data received during the past '
+                              f'{timestamp - self._data_received_timestamp:.2f} seconds')
+            self._data_timeout_flag = True
+            if self.signal.alarm is not None:
+                self.signal.alarm.emit(True)
+
+    def handle_chunk(self, data, timestamp, read_time=None):
+        self._chunk_read = read_time if read_time is not None else time()
+        n = len(self._buffer) + len(data)
+        if n > self._stats.buffer_high_water_mark:
+            self._stats.buffer_high_water_mark = n
+        self.data_received(data, timestamp)
+        n = len(self._buffer)
+        if n > self._max_buffer_length:
+            self.logger.warning('Buffer exceeded maximum length. Buffer emptied to prevent overflow')
+            self._stats.bytes_dropped += n
+            self._buffer = bytearray()
+
+    def _handle_queued_chunk(self, item):
+        self.handle_chunk(*item)
+
+    def pipeline_start(self):
+        """
+        Start logger stage, and parser stage if pipeline is enabled
+        Log files are written by the logger stage until pipeline_stop is called.
+        """
+        if self._log_stage is not None:
+            return
+        # Logger stage applies back-pressure on parser stage instead of dropping rows,
+        #   chunks are dropped by the parser stage following the overflow policy
+        if self.log_async:
+            self._log_stage = LogWriter(self.name + ' writer', self.log_queue_size, self.logger,
+                                        self._stats.latency['emit_log'], self.log_flush_interval)
+            self._log_stage.register(self._log_raw)
+            self._log_stage.register(self._log_prod)
+        else:
+            self._log_stage = Stage(self.name + ' logger', call_handler,
+                                    self.pipeline_queue_size, BLOCK, self.logger, self._stats.latency['emit_log'])
+        if self.pipeline_enabled:
+            self._parse_stage = Stage(self.name + ' parser', self._handle_queued_chunk,
+                                      self.pipeline_queue_size, self.pipeline_overflow, self.logger)
+        self._log_raw = QueuedLogProxy(self._log_raw, self._log_stage)
+        self._log_prod = QueuedLogProxy(self._log_prod, self._log_stage)
+        self._log_stage.start()
+        if self._parse_stage is not None:
+            self._parse_stage.start()
+
+    def pipeline_stop(self):
+        if self._log_stage is None:
+            return
+        if self._parse_stage is not None:
+            self._parse_stage.stop()  # Flush parser first as it feeds logger
+        self._log_stage.stop()
+        self._log_raw, self._log_prod = self._log_raw.log, self._log_prod.log
+        self._parse_stage, self._log_stage = None, None
+
+    @property
+    def reactor_compatible(self) -> bool:
+        """
+        Interface can be multiplexed and instrument relies on the default reading loop
+        """
+        return self._interface.fileno() is not None and type(self).run is Instrument.run
+
+    @property
+    def threads(self) -> list:
+        """
+        Threads started by instrument (reader and pipeline stages if any)
+        The reactor thread is not included as it is shared with other instruments.
+        """
+        threads = [s.thread for s in (self._parse_stage, self._log_stage) if s is not None]
+        if self._thread is not None:
+            threads.insert(0, self._thread)
+        return [t for t in threads if t is not None and t.is_alive()]
+
+    @property
+    def pipeline_stats(self) -> dict:
+        """
+        Occupancy of each pipeline stage queue (empty if pipeline is not running)
+        """
+        stats = {}
+        if self._parse_stage is not None:
+            stats['parser'] = self._parse_stage.stats
+        if self._log_stage is not None:
+            stats['logger'] = self._log_stage.stats
+        return stats
+
+    @property
+    def stats(self) -> dict:
+        """
+        Counters and latency histograms (milliseconds) of instrument since opened or stats reset
+        Occupancy of pipeline stages is included if pipeline is running.
+        """
+        stats = self._stats.summary()
+        if self._log_stage is not None:
+            stats['pipeline'] = self.pipeline_stats
+        return stats
+
+    def reset_stats(self):
+        self._stats.reset()
+
+    @property
+    def stats_filename(self) -> str:
+        return os.path.join(self.log_path, self.bare_log_prefix + '_stats.jsonl')
+
+    def write_stats(self, force=False):
+        """
+        Append stats to stats file if stats interval elapsed since stats were last written
+        """
+        if not force and time() - self._stats_written < self.stats_interval:
+            return
+        self._stats_written = time()
+        try:
+            write_stats(self.stats_filename, self.name, self.stats)
+        except OSError as e:
+            self.logger.warning(f'Unable to write stats: {e}')
+
     def data_received(self, data, timestamp):
-        self._buffer.extend(data)
-        while self._terminator in self._buffer:
-            packet, self._buffer = self._buffer.split(self._terminator, 1)
+        for packet in self._frame_splitter.split(self._buffer, data):
             try:
                 self.handle_packet(packet, timestamp)
             except IndexError:
@@ -272,13 +519,21 @@ class Instrument:
                 # raise e
 
     def handle_packet(self, packet, timestamp):
+        stats = self._stats
+        stats.frames += 1
+        stats.latency['read_parse'].record(time() - (self._chunk_read if self._chunk_read is not None else timestamp))
         self.signal.packet_received.emit()
         if self.log_raw_enabled and self._log_active:
             self._log_raw.write(packet, timestamp)
             self.signal.packet_logged.emit()
+        start = time()
         data = self.parse(packet)
+        parsed = time()
+        stats.latency['parse_calibrate'].record(parsed - start)
         if data:
+            log_write_time = stats.log_write_time
             self.handle_data(data, timestamp)
+            stats.latency['calibrate_emit'].record(time() - parsed - (stats.log_write_time - log_write_time))
 
     def handle_data(self, data, timestamp):
         self.signal.new_ts_data.emit(data, timestamp)
@@ -372,6 +627,11 @@ class Interface:
     def name(self) -> str:
         raise NotImplementedError
 
+    @property
+    def timestamp(self) -> float:
+        # Time at which data returned by last read was received
+        return time()
+
     def open(self, **kwargs):
         pass
 
@@ -392,6 +652,10 @@ class Interface:
     def write(self, data):
         pass
 
+    def fileno(self):
+        # File descriptor to wait on with selectors, None if interface cannot be multiplexed
+        return None
+
 
 class SerialInterface(Interface):
     def __init__(self):
@@ -456,6 +720,15 @@ class SerialInterface(Interface):
     def read_until(self, expected=b'\n', size=None):
         return self._serial.read_until(expected=expected, size=size)
 
+    def fileno(self):
+        # Only serial ports of POSIX platforms are file descriptors
+        if self.is_open:
+            try:
+                return self._serial.fileno()
+            except (OSError, AttributeError):  # io.UnsupportedOperation is an OSError
+                pass
+        return None
+
     def write(self, data):
         self._serial.write(data)
 
@@ -499,6 +772,9 @@ class SocketInterface(Interface):
     def write(self, data):
         self._socket.send(data)
 
+    def fileno(self):
+        return self._socket.fileno() if self.is_open else None
+
 
 class USBInterface(Interface):
     """
@@ -508,7 +784,7 @@ class USBInterface(Interface):
     """
 
     def __init__(self):
-        self._device: usb.core.Device = None
+        self._device = None  # usb.core.Device, pyusb is imported when opening interface
         self._timeout = 200  # ms
         self._linux_kernel_drive_was_active = False
         self.read_endpoint, self.write_endpoint = 0x81, 0x01
@@ -533,6 +809,9 @@ class USBInterface(Interface):
             return f'usb'
 
     def open(self, vendor_id, product_id):
+        import usb.core
+        import usb.backend.libusb1
+        import usb.util
         try:
             # Load backend (Windows dll)
             backend = None
@@ -566,6 +845,7 @@ class USBInterface(Interface):
 
     def close(self):
         if self.is_open:
+            import usb.util
             usb.util.release_interface(self._device, 0)
             if self._linux_kernel_drive_was_active:
                 self._device.attach_kernel_driver(0)
@@ -587,6 +867,7 @@ class USBHIDInterface(Interface):
     """
 
     def __init__(self):
+        import hid
         self._device = hid.device()
         self._is_open = False
         self._timeout = 200  # ms
@@ -611,6 +892,7 @@ class USBHIDInterface(Interface):
             return f'usb-hid'
 
     def open(self, vendor_id, product_id):
+        import hid
         try:
             self._device = hid.device()
             self._device.open(vendor_id, product_id)
@@ -633,6 +915,125 @@ class USBHIDInterface(Interface):
         return self._device.write(data)
 
 
+class ReplayInterface(Interface):
+    """
+    Stream raw log files recorded by Inlinino (.raw or .bin) as if data was received from the instrument
+    Time between packets is preserved, scaled by speed (e.g. speed=10 replays 10 times faster than real time),
+    packets are streamed as fast as possible if speed is 0. Timestamps recorded are returned by default so that
+    products logged while replaying are identical to the original ones.
+    The interface closes itself at the end of the last file.
+    """
+    READ_TIMEOUT = 1  # seconds, read returns empty bytes if next packet is not due yet
+
+    def __init__(self):
+        self.terminator = b'\r\n'  # Updated by instrument, registration bytes for binary logs
+        self.speed = 1
+        self.original_timestamps = True
+        self._files = []
+        self._file_index = 0
+        self._records = iter(())
+        self._next_record = None
+        self._timestamp = None
+        self._first_timestamp = None
+        self._start_time = None
+        self._is_open = False
+        self._end_of_replay = False
+        self._stop = Event()
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    @property
+    def timeout(self) -> int:
+        return self.READ_TIMEOUT
+
+    @property
+    def name(self) -> str:
+        if self.is_open and self._file_index < len(self._files):
+            return f'replay:{os.path.basename(self._files[self._file_index])}'
+        else:
+            return 'replay'
+
+    @property
+    def timestamp(self) -> float:
+        return self._timestamp if self.original_timestamps and self._timestamp is not None else time()
+
+    @property
+    def end_of_replay(self) -> bool:
+        return self._end_of_replay
+
+    def open(self, path=None, speed=1, original_timestamps=True, prefix=''):
+        """
+        :param path: raw log file or directory containing raw log files
+        :param speed: factor applied to the recorded time between packets, 0 for as fast as possible
+        :param original_timestamps: return timestamps recorded (True) or time at which packet is replayed (False)
+        :param prefix: only replay files starting with prefix if path is a directory
+        """
+        if path is None:
+            raise ValueError('ReplayInterface requires a path.')
+        if speed < 0:
+            raise ValueError('Replay speed must be positive.')
+        try:
+            self._files = list_logs(path, prefix)
+        except (ValueError, OSError) as e:
+            raise InterfaceException(e)
+        if not self._files:
+            raise InterfaceException(f'No log file to replay in {path}.')
+        self.speed = speed
+        self.original_timestamps = original_timestamps
+        self._file_index = -1
+        self._records = iter(())
+        self._next_record = None
+        self._timestamp, self._first_timestamp, self._start_time = None, None, None
+        self._end_of_replay = False
+        self._stop.clear()
+        self._is_open = True
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self._is_open = False
+        self._records = iter(())
+
+    def _get_next_record(self):
+        while True:
+            try:
+                return next(self._records)
+            except StopIteration:
+                self._file_index += 1
+                if self._file_index >= len(self._files):
+                    return None
+                try:
+                    self._records = read_log(self._files[self._file_index], self.terminator)
+                except OSError as e:
+                    raise InterfaceException(e)
+
+    def read(self, size=None):
+        if self._next_record is None:
+            self._next_record = self._get_next_record()
+            if self._next_record is None:
+                self._end_of_replay = True
+                self._is_open = False
+                return b''
+        data, timestamp = self._next_record
+        if self._first_timestamp is None:
+            self._first_timestamp, self._start_time = timestamp, time()
+        if self.speed:
+            delay = self._start_time + (timestamp - self._first_timestamp) / self.speed - time()
+            if delay > 0:
+                if self._stop.wait(min(delay, self.READ_TIMEOUT)) or delay > self.READ_TIMEOUT:
+                    return b''
+        self._next_record = None
+        self._timestamp = timestamp
+        return data
+
+    def write(self, data):
+        # Commands sent to instrument are discarded
+        pass
+
+
 def get_spy_interface(interface: Interface, echo=True):
     class Spy(interface):
         def __init__(self, signal, max_buffer=2 ** 20):
@@ -1,7 +1,7 @@
 from inlinino.instruments import Instrument
 from inlinino.log import LogBinary
 from pyACS.acs import ACS as ACSParser
-from pyACS.acs import ACSError
+from pyACS.acs import ACSError, CalibratedFrameContainer
 from time import time
 import numpy as np
 from threading import Lock
@@ -20,6 +20,13 @@ class ACS(Instrument):
         # ACS Specific attributes
         self._parser = None
         self._timestamp_flag_out_T_cal = 0
+        # Micro-batches: frames received together (or within frame_batch_window) are calibrated at once (optional)
+        self._calibrator = None
+        self.frame_batch_enabled = False
+        self.frame_batch_window = 0  # seconds, 0 calibrates frames of each chunk read together
+        self._batch = []  # frames (packet, timestamp) waiting to be calibrated
+        self._batch_started = 0
+        self._batch_lock = Lock()
         # Default serial communication parameters (needs to be before setup)
         self.default_serial_baudrate = 115200
         self.default_serial_timeout = 1
@@ -47,15 +54,19 @@ class ACS(Instrument):
         if 'device_file' not in cfg.keys():
             raise ValueError('Missing field device file')
         self._parser = ACSParser(cfg['device_file'])
+        self._calibrator = ACSCalibrator(self._parser)
         if 'force_parsing' in cfg.keys():
             self.force_parsing = cfg['force_parsing']
+        if 'frame_batch' in cfg.keys():
+            self.frame_batch_enabled = bool(cfg['frame_batch'])
+        if 'frame_batch_window' in cfg.keys():
+            self.frame_batch_window = float(cfg['frame_batch_window'])
+            if self.frame_batch_window < 0:
+                raise ValueError('Frame batch window must be positive.')
+        self._batch = []
         self.default_serial_baudrate = self._parser.baudrate
         # Overload cfg with ACS specific parameters
-        cfg['variable_names'] = ['acs_timestamp', 'c', 'a', 'T_int', 'T_ext', 'flag_outside_calibration_range']
-        cfg['variable_units'] = ['ms', '1/m', '1/m', 'deg_C', 'deg_C', 'bool']
-        cfg['variable_units'][1] = '1/m\tlambda=' + ' '.join('%s' % x for x in self._parser.lambda_c)
-        cfg['variable_units'][2] = '1/m\tlambda=' + ' '.join('%s' % x for x in self._parser.lambda_a)
-        cfg['variable_precision'] = ['%d', '%s', '%s', '%.2f', '%.2f', '%s']
+        cfg['variable_names'], cfg['variable_units'], cfg['variable_precision'] = product_variables(self._parser)
         cfg['terminator'] = self.REGISTRATION_BYTES
         # Set standard configuration and check cfg input
         super().setup(cfg, LogBinary)
@@ -76,6 +87,7 @@ class ACS(Instrument):
 
     def data_received(self, data, timestamp):
         self._buffer.extend(data)
+        packets = []
         frame = True
         while frame:
             # Get Frame
@@ -85,13 +97,84 @@ class ACS(Instrument):
                 if self.log_raw_enabled and self._log_active:
                     self._log_raw.write(unknown_bytes)
             if frame and valid:
-                self.handle_packet(frame, timestamp)
+                if self.frame_batch_enabled:
+                    self.receive_packet(frame, timestamp)
+                    packets.append((bytes(frame), timestamp))
+                else:
+                    self.handle_packet(frame, timestamp)
             if frame and not valid:
                 # Warn user
                 # Log only registration bytes as rest will be logged by unknown_bytes
                 self.signal.packet_corrupted.emit()
                 if self.log_raw_enabled and self._log_active:
                     self._log_raw.write(self._parser.REGISTRATION_BYTES)
+        if packets:
+            self.queue_packets(packets)
+
+    def receive_packet(self, packet, timestamp):
+        # Count and log raw packet as handle_packet does, parsing is deferred to handle_batch
+        self._stats.frames += 1
+        self.signal.packet_received.emit()
+        if self.log_raw_enabled and self._log_active:
+            self._log_raw.write(packet, timestamp)
+            self.signal.packet_logged.emit()
+
+    def queue_packets(self, packets):
+        # Calibrate packets with frames waiting, once frame_batch_window elapsed since first frame waiting
+        with self._batch_lock:
+            if not self._batch:
+                self._batch_started = time()
+            self._batch.extend(packets)
+            if time() - self._batch_started >= self.frame_batch_window:
+                batch, self._batch = self._batch, []
+                self.handle_batch(batch)
+
+    def flush_batch(self):
+        # Calibrate frames waiting
+        with self._batch_lock:
+            if not self._batch:
+                return
+            batch, self._batch = self._batch, []
+            self.handle_batch(batch)
+
+    def check_data_timeout(self, timestamp):
+        super().check_data_timeout(timestamp)
+        # No data read (interface timeout or reactor tick), calibrate frames once frame_batch_window elapsed, so
+        # batches are handled by the thread reading the instrument instead of waiting for the next frame
+        if self._batch and time() - self._batch_started >= self.frame_batch_window:
+            self.flush_batch()
+
+    def handle_batch(self, batch):
+        stats = self._stats
+        start = time()
+        for _, timestamp in batch:
+            stats.latency['read_parse'].record(start - (self._chunk_read if self._chunk_read is not None else timestamp))
+        raw = self._calibrator.unpack(b''.join(p for p, _ in batch))
+        for k in np.flatnonzero(~self._calibrator.check(raw)):
+            self.signal.packet_corrupted.emit()
+            self.logger.warning('Frame type incorrect (not AC-S) or serial number incorrect.')
+            self.logger.debug(batch[k][0])
+        cal = self._calibrator.calibrate(raw)
+        parsed = time()
+        for _ in batch:
+            stats.latency['parse_calibrate'].record((parsed - start) / len(batch))
+        # Fan out frames to plots, aux data, and log
+        for k, (packet, timestamp) in enumerate(batch):
+            if np.isnan(cal.internal_temperature[k]):
+                self.signal.packet_corrupted.emit()
+                self.logger.warning('Internal temperature invalid.')
+                self.logger.debug(packet)
+                continue
+            log_write_time, handled = stats.log_write_time, time()
+            self.handle_data((int(raw['timestamp'][k]), CalibratedFrameContainer(
+                c=cal.c[k], a=cal.a[k], internal_temperature=cal.internal_temperature[k],
+                external_temperature=cal.external_temperature[k],
+                flag_outside_calibration_range=bool(cal.flag_outside_calibration_range[k]))), timestamp)
+            stats.latency['calibrate_emit'].record(time() - handled - (stats.log_write_time - log_write_time))
+
+    def log_stop(self):
+        self.flush_batch()  # Process frames waiting before closing log files
+        super().log_stop()
 
     def parse(self, packet):
         data_raw = self._parser.unpack_frame(packet)
@@ -102,7 +185,7 @@ class ACS(Instrument):
             self.logger.warning(e)
             self.logger.debug(self.REGISTRATION_BYTES + packet)
         data_cal = self._parser.calibrate_frame(data_raw, get_external_temperature=True)
-        return data_raw.time_stamp, data_cal
+        return data_raw.timestamp, data_cal
 
     def handle_data(self, data, timestamp):
         # Update timeseries plot
@@ -130,8 +213,8 @@ class ACS(Instrument):
         # Log parsed data
         if self.log_prod_enabled and self._log_active:
             self._log_prod.write([data[0],  # Instrument timestamp
-                                  np.array2string(data[1].c, threshold=np.inf, max_line_width=np.inf),  # pre-format np.array
-                                  np.array2string(data[1].a, threshold=np.inf, max_line_width=np.inf),  # pre-format np.array
+                                  self._log_prod.format_array(data[1].c),  # np.array formatted by logger
+                                  self._log_prod.format_array(data[1].a),  # np.array formatted by logger
                                   data[1].internal_temperature, data[1].external_temperature,
                                   data[1].flag_outside_calibration_range], timestamp)
             if not self.log_raw_enabled:
@@ -159,3 +242,67 @@ class ACS(Instrument):
         self.widget_active_timeseries_variables_selected = \
             ['c(%s)' % wl for wl in self._parser.lambda_c[self.active_timeseries_c_wavelengths]] + \
             ['a(%s)' % wl for wl in self._parser.lambda_a[self.active_timeseries_a_wavelengths]]
+
+
+def product_variables(parser: ACSParser):
+    # Names, units, and precision of columns of product logs
+    units = ['ms', '1/m\tlambda=' + ' '.join('%s' % x for x in parser.lambda_c),
+             '1/m\tlambda=' + ' '.join('%s' % x for x in parser.lambda_a), 'deg_C', 'deg_C', 'bool']
+    return (['acs_timestamp', 'c', 'a', 'T_int', 'T_ext', 'flag_outside_calibration_range'], units,
+            ['%d', '%s', '%s', '%.2f', '%.2f', '%s'])
+
+
+class ACSCalibrator:
+    """
+    Vectorised unpacking and calibration of ACS frames, equivalent to pyACS unpack_frame, check_data, and
+    calibrate_frame applied frame by frame. Frames (including registration bytes) are viewed as a numpy structured
+    array, and calibrated with the water offsets and temperature corrections of the device file.
+    """
+    def __init__(self, parser: ACSParser):
+        self.parser = parser
+        fields = [('registration', 'S%d' % parser.REGISTRATION_BYTES_LENGTH), ('frame_len', '>u2'),
+                  ('frame_type', 'u1'), ('reserved_1', 'u1'), ('serial_number', '>u4'), ('a_ref_dark', '>u2'),
+                  ('p', '>u2'), ('a_sig_dark', '>u2'), ('t_ext', '>u2'), ('t_int', '>u2'), ('c_ref_dark', '>u2'),
+                  ('c_sig_dark', '>u2'), ('timestamp', '>u4'), ('reserved_2', 'u1'), ('output_wavelength', 'u1'),
+                  ('counts', '>u2', (parser.output_wavelength, 4))]  # c_ref, a_ref, c_sig, and a_sig
+        if parser.CHECKSUM_LENGTH:
+            fields.append(('checksum', '>u2'))
+        if parser.PAD_BYTE_LENGTH:
+            fields.append(('pad_byte', 'u1'))
+        if parser.EXTERNAL_TIMESTAMP_LENGTH:
+            fields.append(('external_timestamp', '>f8'))
+        self.dtype = np.dtype(fields)
+        if self.dtype.itemsize != parser.frame_length:
+            raise ValueError('Frame length of device file not supported.')
+        self.serial_number = int(parser.serial_number, 16)
+
+    def unpack(self, frames) -> np.ndarray:
+        """
+        :param frames: bytes of consecutive frames, each starting with registration bytes
+        :return: structured array of frames (view of frames)
+        """
+        return np.frombuffer(frames, dtype=self.dtype)
+
+    def check(self, raw) -> np.ndarray:
+        # Frames passing pyACS check_data
+        return (raw['frame_type'] >= 3) & (raw['serial_number'] == self.serial_number)
+
+    def calibrate(self, raw) -> CalibratedFrameContainer:
+        """
+        :param raw: structured array of frames (from unpack)
+        :return: c and a (frame x wavelength), and temperatures and flags of frames
+        """
+        p = self.parser
+        volts = 5 * raw['t_int'].astype(float) / 65535
+        with np.errstate(divide='ignore', invalid='ignore'):  # NaN if out of thermistor range (pyACS raises error)
+            resistance = np.log(10000 * volts / (4.516 - volts))
+        t_int = 1 / (0.00093135 + 0.000221631 * resistance + 0.000000125741 * resistance ** 3) - 273.15
+        t_ext = p.compute_external_temperature(raw['t_ext'].astype(float))
+        counts = raw['counts'].astype(float)
+        delta_t_c = np.asarray(p.f_delta_t_c(t_int)).reshape(p.output_wavelength, -1).T
+        delta_t_a = np.asarray(p.f_delta_t_a(t_int)).reshape(p.output_wavelength, -1).T
+        with np.errstate(divide='ignore', invalid='ignore'):  # counts can be zero
+            c = (p.offset_c - (1 / p.x) * np.log(counts[:, :, 2] / counts[:, :, 0])) - delta_t_c
+            a = (p.offset_a - (1 / p.x) * np.log(counts[:, :, 3] / counts[:, :, 1])) - delta_t_a
+        return CalibratedFrameContainer(c=c, a=a, internal_temperature=t_int, external_temperature=t_ext,
+                                        flag_outside_calibration_range=(t_int < p.t[0]) | (p.t[-1] < t_int))
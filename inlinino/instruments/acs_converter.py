@@ -0,0 +1,219 @@
+"""
+Convert raw ACS logs (.bin written by LogBinary) to products in bulk, without going through the driver frame by frame
+Each file is memory mapped, frames are located with a vectorised search of the registration bytes (validated with the
+checksum and the timestamp following each frame), viewed as a structured array with numpy.frombuffer, and calibrated
+by chunks with ACSCalibrator. Products are written next to the raw file name in the output directory, in the same
+format as the ACS driver logs them: csv (.csv) or columnar (.npc, read with read_columnar_log). Files are processed in
+parallel by a pool of processes.
+Usage: python -m inlinino.instruments.acs_converter [-h] [--format {csv,columnar}] [--workers N]
+                                                    device_file output_path path [path ...]
+"""
+import argparse
+import json
+import logging
+import os
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from time import perf_counter
+
+import numpy as np
+
+from inlinino import WORKING_DIRECTORY
+from inlinino.instruments.acs import ACSParser, ACSCalibrator, product_variables
+from inlinino.log import Log, LogColumnar, TimestampEncoder
+from inlinino.shared.log_reader import list_logs, TIMESTAMP_MIN, TIMESTAMP_MAX
+
+
+CHUNK_SIZE = 4096  # frames calibrated (or checksummed) at once
+SEARCH_CHUNK_SIZE = 2 ** 24  # bytes searched at once for registration bytes, bounds memory used on large files
+TIMESTAMP_DTYPE = np.dtype('>f8')  # LogBinary.format_timestamp
+FORMATS = ('csv', 'columnar')
+
+logger = logging.getLogger('ACSConverter')
+
+
+@lru_cache(maxsize=None)
+def get_calibrator(device_file) -> ACSCalibrator:
+    return ACSCalibrator(ACSParser(device_file))
+
+
+def find_frames(buffer, calibrator: ACSCalibrator) -> np.ndarray:
+    """
+    Offsets of frames followed by their timestamp in buffer of LogBinary file
+    Registration bytes found in the data of a frame (or of bytes logged without timestamp) are discarded as their
+    checksum or timestamp is invalid, or as they overlap the previous frame.
+    """
+    p = calibrator.parser
+    length = p.frame_length + TIMESTAMP_DTYPE.itemsize
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if len(data) < length:
+        return np.empty(0, dtype=np.int64)
+    registration = np.frombuffer(p.REGISTRATION_BYTES, dtype=np.uint8)
+    n, offsets = len(data) - length + 1, []
+    for start in range(0, n, SEARCH_CHUNK_SIZE):
+        stop = min(start + SEARCH_CHUNK_SIZE, n)
+        candidates = data[start:stop] == registration[0]
+        for k, b in enumerate(registration[1:], 1):
+            candidates &= data[start + k:stop + k] == b
+        offsets.append(np.flatnonzero(candidates) + start)
+    offsets = np.concatenate(offsets)
+    # Timestamp following frame
+    timestamps = data[offsets[:, np.newaxis] + p.frame_length + np.arange(TIMESTAMP_DTYPE.itemsize)]
+    timestamps = timestamps.copy().view(TIMESTAMP_DTYPE).ravel()
+    offsets = offsets[(TIMESTAMP_MIN <= timestamps) & (timestamps <= TIMESTAMP_MAX)]
+    # Checksum: unsigned 16 bit sum of bytes of frame preceding checksum
+    if p.CHECKSUM_LENGTH:
+        end = p.frame_length - p.CHECKSUM_LENGTH - p.PAD_BYTE_LENGTH - p.EXTERNAL_TIMESTAMP_LENGTH
+        computed, span = np.empty(len(offsets), dtype=np.int64), np.arange(end)
+        for k in range(0, len(offsets), CHUNK_SIZE):  # Only bytes of candidate frames, by chunk
+            computed[k:k + CHUNK_SIZE] = data[offsets[k:k + CHUNK_SIZE, np.newaxis] + span].sum(axis=1, dtype=np.int64)
+        computed %= 2 ** 16
+        received = data[offsets + end].astype(np.int64) * 256 + data[offsets + end + 1]
+        offsets = offsets[computed == received]
+    # Frames overlapping previous frame
+    if np.any(np.diff(offsets) < length):
+        selected, next_offset = [], 0
+        for o in offsets.tolist():
+            if o >= next_offset:
+                selected.append(o)
+                next_offset = o + length
+        offsets = np.array(selected, dtype=np.int64)
+    return offsets
+
+
+def read_frames(buffer, offsets, calibrator: ACSCalibrator):
+    """
+    Frames (structured array) and timestamps at offsets of buffer
+    Consecutive frames are viewed in buffer (no copy), others are gathered first
+    """
+    length = calibrator.parser.frame_length + TIMESTAMP_DTYPE.itemsize
+    dtype = np.dtype([('frame', calibrator.dtype), ('timestamp', TIMESTAMP_DTYPE)])
+    if len(offsets) and offsets[-1] - offsets[0] == (len(offsets) - 1) * length:
+        records = np.frombuffer(buffer, dtype=dtype, count=len(offsets), offset=int(offsets[0]))
+    else:
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        records = np.frombuffer(data[offsets[:, np.newaxis] + np.arange(length)].tobytes(), dtype=dtype)
+    return records['frame'], records['timestamp']
+
+
+class ProductWriter:
+    """
+    Write products of ACS in one file, in the format of the product logs of the ACS driver
+    """
+    def __init__(self, filename, parser: ACSParser, fmt='csv'):
+        if fmt not in FORMATS:
+            raise ValueError(f'Invalid products format {fmt}')
+        self.format = fmt
+        self.names, self.units, self.precision = product_variables(parser)
+        self._file = open(filename, 'w' if fmt == 'csv' else 'wb')
+        self._timestamp_encoder = TimestampEncoder()
+        if fmt == 'csv':
+            self._file.write('time,' + ','.join(self.names) + '\n')
+            self._file.write('yyyy/mm/dd HH:MM:SS.fff,' + ','.join(self.units) + '\n')
+        else:
+            columns = [{'name': 'time', 'units': 'seconds since 1970-01-01 00:00:00 UTC', 'dtype': 'float64'}]
+            for name, units, dtype, width in zip(self.names, self.units,
+                                                 ('float64', 'float32', 'float32', 'float64', 'float64', 'bool'),
+                                                 (None, len(parser.lambda_c), len(parser.lambda_a), None, None, None)):
+                columns.append({'name': name, 'units': units, 'dtype': dtype})
+                if width is not None:
+                    columns[-1]['width'] = width
+            schema = {'format': LogColumnar.SCHEMA_FORMAT, 'version': LogColumnar.SCHEMA_VERSION, 'columns': columns}
+            np.save(self._file, np.array(json.dumps(schema)), allow_pickle=False)
+
+    def write(self, timestamps, raw, cal):
+        if self.format == 'csv':
+            text = self._timestamp_encoder.text
+            for row in zip(timestamps.tolist(), raw['timestamp'].tolist(), cal.c, cal.a,
+                           cal.internal_temperature.tolist(), cal.external_temperature.tolist(),
+                           cal.flag_outside_calibration_range.tolist()):
+                self._file.write(text(row[0]) + ',' + ','.join(
+                    p % d for p, d in zip(self.precision, (row[1], Log.format_array(row[2]),
+                                                           Log.format_array(row[3]), *row[4:]))) + '\n')
+        else:
+            for column in (timestamps.astype(np.float64), raw['timestamp'].astype(np.float64),
+                           cal.c.astype(np.float32), cal.a.astype(np.float32),
+                           cal.internal_temperature, cal.external_temperature,
+                           cal.flag_outside_calibration_range.astype(bool)):
+                np.save(self._file, column, allow_pickle=False)
+
+    def close(self):
+        self._file.close()
+
+
+def convert_file(filename, device_file, output_path, fmt='csv'):
+    """
+    Convert one raw log file to products
+    :return: summary of conversion (dict): bytes read, frames written, frames corrupted, and seconds elapsed
+    """
+    start = perf_counter()
+    calibrator = get_calibrator(device_file)
+    summary = {'filename': filename, 'bytes': os.path.getsize(filename), 'frames': 0, 'corrupted': 0}
+    product_filename = os.path.join(output_path, os.path.splitext(os.path.basename(filename))[0] +
+                                    ('.csv' if fmt == 'csv' else '.' + LogColumnar.FILE_EXT))
+    writer = ProductWriter(product_filename, calibrator.parser, fmt)
+    try:
+        if summary['bytes'] == 0:
+            return summary
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offsets = find_frames(buffer, calibrator)
+            for i in range(0, len(offsets), CHUNK_SIZE):
+                raw, timestamps = read_frames(buffer, offsets[i:i + CHUNK_SIZE], calibrator)
+                cal = calibrator.calibrate(raw)
+                valid = ~np.isnan(cal.internal_temperature)  # pyACS raises an error on these frames
+                summary['corrupted'] += int(np.sum(~valid | ~calibrator.check(raw)))
+                if not np.all(valid):
+                    raw, timestamps = raw[valid], timestamps[valid]
+                    cal = cal._replace(**{k: v[valid] for k, v in cal._asdict().items()})
+                writer.write(timestamps, raw, cal)
+                summary['frames'] += len(raw)
+                del raw, timestamps  # Release views of buffer before closing it
+    finally:
+        writer.close()
+        summary['seconds'] = perf_counter() - start
+    return summary
+
+
+def convert(paths, device_file, output_path, fmt='csv', workers=None):
+    """
+    Convert raw log files (or directories of raw log files) in parallel
+    :return: summaries of files converted and seconds elapsed
+    """
+    start = perf_counter()
+    filenames = [f for p in paths for f in list_logs(p) if f.endswith('.bin')]
+    os.makedirs(output_path, exist_ok=True)
+    if workers == 1 or len(filenames) < 2:
+        summaries = [convert_file(f, device_file, output_path, fmt) for f in filenames]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            summaries = list(executor.map(convert_file, filenames, [device_file] * len(filenames),
+                                          [output_path] * len(filenames), [fmt] * len(filenames)))
+    return summaries, perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='inlinino.instruments.acs_converter',
+                                     description='Convert raw ACS logs (.bin) to products.')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='format of products (default: csv)')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: number of cpu)')
+    parser.add_argument('device_file', help='device file of ACS')
+    parser.add_argument('output_path', help='directory in which products are written')
+    parser.add_argument('paths', nargs='+', help='raw log files or directories of raw log files')
+    args = parser.parse_args(argv)
+    def resolve(path):
+        return os.path.join(WORKING_DIRECTORY, path)  # Inlinino changes working directory on import
+
+    summaries, elapsed = convert([resolve(p) for p in args.paths], resolve(args.device_file),
+                                 resolve(args.output_path), args.format, args.workers)
+    for s in summaries:
+        print(f"{os.path.basename(s['filename'])}: {s['frames']} frames ({s['corrupted']} corrupted), "
+              f"{s['bytes'] / 2 ** 20 / s['seconds']:.1f} MB/s")
+    total = sum(s['bytes'] for s in summaries)
+    print(f"{len(summaries)} files, {sum(s['frames'] for s in summaries)} frames, {total / 2 ** 20:.1f} MB "
+          f"in {elapsed:.2f} s ({total / 2 ** 20 / elapsed:.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
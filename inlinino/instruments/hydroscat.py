@@ -1,7 +1,7 @@
 import os
 
 from inlinino.instruments import Instrument
-from inlinino.log import Log
+from inlinino.log import Log, LOG_FORMAT_COLUMNAR
 
 try:
     from aquasense.hydroscat import HydroScat as ASHydroScat
@@ -131,7 +131,11 @@ class HydroScat(Instrument):
 
         super().setup(cfg)
 
-        # Set prod logger
+        # Set prod logger, columnar logger is set by Instrument.setup (calibration header is only written in csv)
+        if self.log_prod_format == LOG_FORMAT_COLUMNAR:
+            if self.output_cal_header:
+                self.logger.warning('Calibration header not written in columnar product logs.')
+            return
         log_cfg = {'path': cfg['log_path'], 'filename_prefix': self.bare_log_prefix}
         for k in ['length', 'variable_names', 'variable_units', 'variable_precision']:
             if k in cfg.keys():
@@ -142,6 +146,7 @@ class HydroScat(Instrument):
         else:
             header_lines = []
 
+        self._log_prod.close()
         self._log_prod = ProdLogger(header_lines, log_cfg, self.signal.status_update)
 
     # State machine
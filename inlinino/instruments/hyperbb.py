@@ -1,12 +1,12 @@
 import os.path
-from time import sleep
+from time import sleep, time
 
 from typing import Optional
 from threading import Lock
 
 import numpy as np
 from scipy.io import loadmat
-from scipy.interpolate import interp2d, splrep, splev  # , pchip_interpolate
+from scipy.interpolate import splrep, splev  # , pchip_interpolate
 
 from inlinino.instruments import Instrument
 
@@ -23,6 +23,12 @@ class HyperBB(Instrument):
         self._parser: Optional[HyperBBParser] = None
         self.signal_reconstructed = None
         self.invalid_packet_alarm_triggered = False
+        # Scan assembly: frames of a wavelength scan are calibrated together (optional)
+        self.scan_batch_enabled = False
+        self.scan_latency_cap = 30  # seconds, partial scans are processed after this delay
+        self._scan = []  # frames (raw, timestamp) of scan being assembled
+        self._scan_started = 0
+        self._scan_lock = Lock()
         # Default serial communication parameters
         self.default_serial_baudrate = 19200
         self.default_serial_timeout = 1
@@ -53,7 +59,14 @@ class HyperBB(Instrument):
             raise ValueError('Missing calibration temperature file (*.mat)')
         if 'data_format' not in cfg.keys():
             cfg['data_format'] = 'advanced'
+        if 'scan_batch' in cfg.keys():
+            self.scan_batch_enabled = bool(cfg['scan_batch'])
+        if 'scan_latency_cap' in cfg.keys():
+            self.scan_latency_cap = float(cfg['scan_latency_cap'])
+            if self.scan_latency_cap <= 0:
+                raise ValueError('Scan latency cap must be strictly positive.')
         self._parser = HyperBBParser(cfg['plaque_file'], cfg['temperature_file'], cfg['data_format'])
+        self._scan = []
         self.signal_reconstructed = np.empty(len(self._parser.wavelength)) * np.nan
         # Overload cfg with received data
         prod_var_names = ['beta_u', 'bb']
@@ -101,6 +114,12 @@ class HyperBB(Instrument):
         self._interface.init()
 
     def handle_data(self, raw, timestamp):
+        if self.scan_batch_enabled:
+            self.assemble_scan(raw, timestamp)
+        else:
+            self.handle_frame(raw, timestamp)
+
+    def handle_frame(self, raw, timestamp):
         beta_u, bb, wl, gain, net_ref_zero_flag = self._parser.calibrate(np.array([raw], dtype=float))
         signal = np.empty(len(self._parser.wavelength)) * np.nan
         try:
@@ -131,6 +150,71 @@ class HyperBB(Instrument):
             if not self.log_raw_enabled:
                 self.signal.packet_logged.emit()
 
+    def assemble_scan(self, raw, timestamp):
+        # Keep frames until the scan is complete, a scan ends when the scan index changes or a wavelength repeats,
+        # partial scans are processed once scan_latency_cap elapsed since their first frame
+        with self._scan_lock:
+            scan = []
+            if self._scan and (raw[self._parser.idx_ScanIdx] != self._scan[0][0][self._parser.idx_ScanIdx] or
+                               raw[self._parser.idx_wl] in (f[self._parser.idx_wl] for f, _ in self._scan) or
+                               time() - self._scan_started >= self.scan_latency_cap):
+                scan, self._scan = self._scan, []
+            if not self._scan:
+                self._scan_started = time()
+            self._scan.append((raw, timestamp))
+            if scan:
+                self.handle_scan(scan)
+
+    def flush_scan(self):
+        # Process scan being assembled
+        with self._scan_lock:
+            if not self._scan:
+                return
+            scan, self._scan = self._scan, []
+            self.handle_scan(scan)
+
+    def check_data_timeout(self, timestamp):
+        super().check_data_timeout(timestamp)
+        # No data read (interface timeout or reactor tick), process partial scan once scan_latency_cap elapsed, so
+        # scans are handled by the thread reading the instrument
+        if self._scan and time() - self._scan_started >= self.scan_latency_cap:
+            self.flush_scan()
+
+    def handle_scan(self, scan):
+        raw = [f for f, _ in scan]
+        beta_u, bb, wl, gain, net_ref_zero_flag = self._parser.calibrate(np.array(raw, dtype=float))
+        # Spectrum of scan, NaN for wavelengths not in scan
+        signal = np.empty(len(self._parser.wavelength)) * np.nan
+        k = np.minimum(np.searchsorted(self._parser.wavelength, wl), len(signal) - 1)
+        sel = self._parser.wavelength[k] == wl
+        signal[k[sel]] = bb[sel]
+        timestamp = scan[-1][1]
+        # Update plots
+        if self.active_timeseries_variables_lock.acquire(timeout=0.125):
+            try:
+                self.signal.new_ts_data[object, float, bool].emit(signal[self.active_timeseries_wavelength], timestamp,
+                                                                  self.active_timeseries_variables_reset)
+                self.active_timeseries_variables_reset = False
+            finally:
+                self.active_timeseries_variables_lock.release()
+        else:
+            self.logger.error('Unable to acquire lock to update timeseries plot')
+        last_gain = 'High' if gain[-1] == 3 else 'Low' if gain[-1] == 2 else 'None'
+        self.signal.new_aux_data.emit([int(wl[-1]), last_gain, raw[-1][self._parser.idx_LedTemp],
+                                       raw[-1][self._parser.idx_WaterTemp], raw[-1][self._parser.idx_Depth],
+                                       net_ref_zero_flag])
+        self.signal.new_spectrum_data.emit([signal])
+        # Log frames with their timestamp
+        if self.log_prod_enabled and self._log_active:
+            for (r, t), b, x in zip(scan, beta_u, bb):
+                self._log_prod.write(np.concatenate((r, [b, x])), t)
+                if not self.log_raw_enabled:
+                    self.signal.packet_logged.emit()
+
+    def log_stop(self):
+        self.flush_scan()  # Process partial scan before closing log files
+        super().log_stop()
+
     def update_active_timeseries_variables(self, name, state):
         if not ((state and name not in self.widget_active_timeseries_variables_selected) or
                 (not state and name in self.widget_active_timeseries_variables_selected)):
@@ -153,6 +237,123 @@ LEGACY_DATA_FORMAT = 0
 ADVANCED_DATA_FORMAT = 1
 LIGHT_DATA_FORMAT = 2
 
+# Grids of temperature correction
+LED_TEMPERATURE_RANGE = (-10, 70)  # deg C
+LED_TEMPERATURE_RESOLUTION = 0.1  # deg C
+WAVELENGTH_RESOLUTION = 1  # nm
+
+
+class DarkOffsetTable:
+    # Dark offsets of the scattering channels on the (gain, wavelength) grid of the plaque calibration
+    # Frames with a gain and a wavelength of the grid are looked up directly, others are interpolated bilinearly
+    # and added to the lookup table
+    # Values outside of the grid are the ones of the nearest edge of the grid (same as interp2d)
+    CACHE_SIZE = 8192  # maximum number of (gain, wavelength) in lookup table, including off-grid values
+
+    def __init__(self, gain, wavelength, *dark):
+        # dark: one table (wavelength x gain) per channel
+        self.gain = np.asarray(gain, dtype=float)
+        self.wavelength = np.asarray(wavelength, dtype=float)
+        if len(self.gain) < 2 or len(self.wavelength) < 2:
+            raise ValueError('Dark calibration grid must have at least two gains and two wavelengths.')
+        if np.any(np.diff(self.gain) <= 0) or np.any(np.diff(self.wavelength) <= 0):
+            raise ValueError('Dark calibration grid must be strictly increasing.')
+        self.table = np.stack([np.asarray(d, dtype=float) for d in dark], axis=-1)  # wavelength x gain x channel
+        if self.table.shape[:2] != (len(self.wavelength), len(self.gain)):
+            raise ValueError('Dark calibration tables don\'t match gain and wavelength grid.')
+        self._lut = {(g, w): self.table[i, j]
+                     for i, w in enumerate(self.wavelength.tolist()) for j, g in enumerate(self.gain.tolist())}
+
+    def __call__(self, gain, wl):
+        """
+        :param gain: <n np.ndarray> PMT gain of frames
+        :param wl: <n np.ndarray> wavelength of frames (nm)
+        :return: <n x channel np.ndarray> dark offsets of frames
+        """
+        gain, wl = np.asarray(gain, dtype=float).reshape(-1), np.asarray(wl, dtype=float).reshape(-1)
+        keys = list(zip(gain.tolist(), wl.tolist()))
+        rows = [self._lut.get(k) for k in keys]
+        missing = [i for i, r in enumerate(rows) if r is None]
+        if missing:
+            # Off-grid values are interpolated once and cached, as gains and wavelengths of an instrument repeat
+            for i, r in zip(missing, self.interpolate(gain[missing], wl[missing])):
+                rows[i] = r
+                if len(self._lut) < self.CACHE_SIZE:
+                    self._lut[keys[i]] = r
+        return np.array(rows).reshape(-1, self.table.shape[2])
+
+    def interpolate(self, gain, wl):
+        # Bilinear interpolation of frames, vectorised
+        ig, fg = self._locate(self.gain, gain)
+        iw, fw = self._locate(self.wavelength, wl)
+        fg, fw = fg[:, np.newaxis], fw[:, np.newaxis]
+        return (self.table[iw, ig] * (1 - fg) + self.table[iw, ig + 1] * fg) * (1 - fw) + \
+               (self.table[iw + 1, ig] * (1 - fg) + self.table[iw + 1, ig + 1] * fg) * fw
+
+    @staticmethod
+    def _locate(grid, x):
+        # Index of lower node of grid and fraction of the cell for each value of x, clipped to the grid
+        i = np.minimum(np.maximum(np.searchsorted(grid, x, side='right') - 1, 0), len(grid) - 2)
+        return i, np.minimum(np.maximum((x - grid[i]) / (grid[i + 1] - grid[i]), 0), 1)
+
+
+class TemperatureCorrectionTable:
+    # Temperature correction of the LED precomputed over the operating range of temperature and the range of
+    # wavelengths of the temperature calibration, on regular grids, so frames are corrected with a gather and a linear
+    # interpolation in each dimension. Temperatures outside of the range, and wavelengths past the last node of the
+    # grid (span of calibration not a multiple of wl_resolution), are computed from the coefficients.
+    def __init__(self, wavelength, coefficients, t_range=LED_TEMPERATURE_RANGE,
+                 t_resolution=LED_TEMPERATURE_RESOLUTION, wl_resolution=WAVELENGTH_RESOLUTION):
+        # coefficients: polynomial coefficients of each wavelength (wavelength x degree + 1)
+        wavelength, coefficients = np.asarray(wavelength, dtype=float), np.atleast_2d(coefficients)
+        if len(wavelength) != len(coefficients):
+            raise ValueError('Temperature calibration coefficients don\'t match wavelengths.')
+        if len(wavelength) < 2 or np.any(np.diff(wavelength) <= 0):
+            raise ValueError('Temperature calibration wavelengths must be at least two and strictly increasing.')
+        self.t = np.arange(t_range[0], t_range[1] + t_resolution / 2, t_resolution)
+        self.wavelength = np.arange(wavelength[0], wavelength[-1] + wl_resolution / 2, wl_resolution)
+        if self.wavelength[-1] > wavelength[-1]:
+            self.wavelength = self.wavelength[:-1]
+        # Correction is linear in coefficients, so coefficients are interpolated on the wavelength grid
+        self._cal_wavelength, self._cal_coefficients = wavelength, coefficients
+        self.table = np.polyval(self.interpolate_coefficients(self.wavelength)[:, :, np.newaxis], self.t)
+        self._t_start, self._t_step = self.t[0], t_resolution
+        self._wl_start, self._wl_step = self.wavelength[0], wl_resolution
+
+    def __call__(self, wl, t):
+        """
+        :param wl: <n np.ndarray> wavelength of frames (nm)
+        :param t: <n np.ndarray> LED temperature of frames (deg C)
+        :return: <n np.ndarray> temperature correction of frames
+        """
+        iw, fw = self._locate(wl, self._wl_start, self._wl_step, self.table.shape[0])
+        it, ft = self._locate(t, self._t_start, self._t_step, self.table.shape[1])
+        correction = (self.table[iw, it] * (1 - ft) + self.table[iw, it + 1] * ft) * (1 - fw) + \
+                     (self.table[iw + 1, it] * (1 - ft) + self.table[iw + 1, it + 1] * ft) * fw
+        if np.min(t) < self.t[0] or np.max(t) > self.t[-1] or np.max(wl) > self.wavelength[-1]:  # Outside of table
+            wl, t = np.broadcast_arrays(np.asarray(wl, dtype=float).reshape(-1), np.asarray(t, dtype=float).reshape(-1))
+            out = (t < self.t[0]) | (t > self.t[-1]) | (wl > self.wavelength[-1])  # NaN stay NaN
+            correction[out] = self.compute(wl[out], t[out])
+        return correction
+
+    def compute(self, wl, t):
+        """
+        Temperature correction computed from the coefficients (slower than the table, for any temperature)
+        """
+        return np.polyval(self.interpolate_coefficients(wl), np.asarray(t, dtype=float))
+
+    def interpolate_coefficients(self, wl):
+        # Coefficients linearly interpolated at wavelengths wl (degree + 1 x n), nearest outside of calibration
+        return np.array([np.interp(wl, self._cal_wavelength, c) for c in self._cal_coefficients.T])
+
+    @staticmethod
+    def _locate(x, start, step, n):
+        # Index of lower node and fraction of the cell on a regular grid, clipped to the grid (NaN stays NaN)
+        x = np.minimum(np.maximum((np.asarray(x, dtype=float).reshape(-1) - start) / step, 0), n - 1)
+        i = np.minimum(np.nan_to_num(x).astype(int), n - 2)
+        return i, x - i
+
+
 class HyperBBParser():
     def __init__(self, plaque_cal_file, temperature_cal_file, data_format='advanced'):
         # Frame Parser
@@ -224,6 +425,7 @@ class HyperBBParser():
         t = loadmat(temperature_cal_file, simplify_cells=True)
         self.wavelength = t['cal_temp']['wl']
         self.cal_t_coef = t['cal_temp']['coeff']
+        self.temperature_correction = TemperatureCorrectionTable(self.wavelength, self.cal_t_coef)
 
         # Load plaque calibration file
         p = loadmat(plaque_cal_file, simplify_cells=True)
@@ -237,13 +439,10 @@ class HyperBBParser():
                 np.any(p['cal']['darkCalWavelength'] != t['cal_temp']['wl']):
             raise ValueError('Wavelength from calibration files don\'t match.')
 
-        # Prepare interpolation tables for dark offsets
-        self.f_dark_cal_scat_1 = interp2d(p['cal']['darkCalPmtGain'], p['cal']['darkCalWavelength'],
-                                          p['cal']['darkCalScat1'], kind='linear')
-        self.f_dark_cal_scat_2 = interp2d(p['cal']['darkCalPmtGain'], p['cal']['darkCalWavelength'],
-                                          p['cal']['darkCalScat2'], kind='linear')
-        self.f_dark_cal_scat_3 = interp2d(p['cal']['darkCalPmtGain'], p['cal']['darkCalWavelength'],
-                                          p['cal']['darkCalScat3'], kind='linear')
+        # Prepare lookup table of dark offsets
+        self.dark_offsets = DarkOffsetTable(p['cal']['darkCalPmtGain'], p['cal']['darkCalWavelength'],
+                                            p['cal']['darkCalScat1'], p['cal']['darkCalScat2'],
+                                            p['cal']['darkCalScat3'])
         # mu calibration corrected for temperature
         self.mu = p['cal']['muFactors'] * self.compute_temperature_coefficients(p['cal']['muWavelengths'],
                                                                                p['cal']['muLedTemp'])
@@ -261,14 +460,8 @@ class HyperBBParser():
         self.Xp = float(splev(self.theta, splrep(theta_ref, Xp_ref)))
 
     def compute_temperature_coefficients(self, wl, t):
-        # Generate temperature correction grid
-        led_t = np.arange(np.min(t), np.max(t) + 0.1001, 0.1) # TODO optimize by creating grid for extensive range of value once
-        t_correction = np.empty((len(self.wavelength), len(led_t)))
-        for k in range(len(self.wavelength)):
-            t_correction[k, :] = np.polyval(self.cal_t_coef[k, :], led_t)
-        # mu temperature correction
-        t_correction = interp2d(led_t, self.wavelength, t_correction, kind='linear')(t, wl)
-        return np.diag(t_correction) if t_correction.ndim > 1 else t_correction
+        # Temperature correction of each frame from wavelength and LED temperature
+        return self.temperature_correction(wl, t)
 
     def parse(self, raw):
         tmp = raw.decode().split()
@@ -334,16 +527,17 @@ class HyperBBParser():
             gain[raw[:, self.idx_ChSaturated] == 2] = 1
             gain[raw[:, self.idx_ChSaturated] == 1] = 0  # All signals saturated
         # Subtract dark offset
-        scat1_dark_removed = scat1 - self.f_dark_cal_scat_1(raw[:, self.idx_PmtGain], wl)
-        scat2_dark_removed = scat2 - self.f_dark_cal_scat_2(raw[:, self.idx_PmtGain], wl)
-        scat3_dark_removed = scat3 - self.f_dark_cal_scat_3(raw[:, self.idx_PmtGain], wl)
+        dark = self.dark_offsets(raw[:, self.idx_PmtGain], wl)
+        scat1_dark_removed = scat1 - dark[:, 0]
+        scat2_dark_removed = scat2 - dark[:, 1]
+        scat3_dark_removed = scat3 - dark[:, 2]
         # Apply PMT and front end gain factors
         g_pmt = (raw[:, self.idx_PmtGain] / self.pmt_ref_gain) ** self.pmt_gamma
         scat1_gain_corrected = scat1_dark_removed * self.gain12 * self.gain23 * g_pmt
         scat2_gain_corrected = scat2_dark_removed * self.gain23 * g_pmt
         scat3_gain_corrected = scat3_dark_removed * g_pmt
         # Apply temperature Correction
-        t_correction = self.compute_temperature_coefficients(wl, raw[:, self.idx_LedTemp])
+        t_correction = self.temperature_correction(wl, raw[:, self.idx_LedTemp])
         scat1_t_corrected = scat1_gain_corrected * t_correction
         scat2_t_corrected = scat2_gain_corrected * t_correction
         scat3_t_corrected = scat3_gain_corrected * t_correction
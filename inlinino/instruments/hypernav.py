@@ -11,8 +11,8 @@ import pySatlantic.instrument as pySat
 
 from inlinino.shared.tree import QFileItem
 from inlinino.instruments import get_spy_interface, SerialInterface
-from inlinino.instruments.satlantic import Satlantic, SatPacket, ProdLogger
-from inlinino.app_signal import HyperNavSignals, InterfaceSignals
+from inlinino.instruments.satlantic import Satlantic, SatPacket
+from inlinino.app_signal import HyperNavSignals
 
 
 class HyperNav(Satlantic):
@@ -43,7 +43,7 @@ class HyperNav(Satlantic):
     def __init__(self, uuid, cfg, signal: HyperNavSignals, *args, **kwargs):
         super().__init__(uuid, cfg, signal, setup=False, *args, **kwargs)
         # Custom serial interface
-        self._interface = get_spy_interface(SerialInterface, echo=False)(InterfaceSignals())
+        self._interface = get_spy_interface(SerialInterface, echo=False)(signal.interface_signals())
         # Widget variables
         self.widget_hypernav_cal_enabled = True
         self.widget_metadata_enabled = False  # Already included in hypernav_cal widget
@@ -501,7 +501,7 @@ class HyperNav(Satlantic):
         # Log Parsed Data
         if self.log_prod_enabled and self._log_active:
             self._log_prod.write(SatPacket(
-                [*data.frame[:idx_start], ProdLogger.format_core_variable(spectra), *data.frame[idx_end:]],
+                [*data.frame[:idx_start], self._log_prod.format_core_variable(spectra), *data.frame[idx_end:]],
                 data.frame_header
             ), timestamp)
             if not self.log_raw_enabled:
@@ -1,6 +1,7 @@
 from collections import namedtuple
 
 from inlinino.instruments import Instrument
+from inlinino.log import LOG_FORMAT_COLUMNAR
 import numpy as np
 
 
@@ -83,6 +84,10 @@ class SunaV2(Instrument):
         super().setup(cfg)
         # Suna Specific named tuple maker
         self.df_maker = namedtuple('SunaDataFrame', self.variable_names)
+        if self.log_prod_format == LOG_FORMAT_COLUMNAR:  # Log channels in a single column
+            s, e = self.CHANNELS_START_IDX, self.CHANNELS_END_IDX
+            self._log_prod.update_cfg({'variable_names': [*self.VARIABLE_NAMES[:s], 'channel', *self.VARIABLE_NAMES[e:]],
+                                       'variable_units': [*self.VARIABLE_UNITS[:s], 'counts', *self.VARIABLE_UNITS[e:]]})
 
     def register_wavelengths(self, calibration_filename):
         # Read polynomial coefficients for wavelength calculation from pixel value
@@ -132,7 +137,11 @@ class SunaV2(Instrument):
             return
         # Log raw data
         if self.log_prod_enabled and self._log_active:
-            self._log_prod.write(list(raw), timestamp)
+            if self.log_prod_format == LOG_FORMAT_COLUMNAR:
+                s, e = self.CHANNELS_START_IDX, self.CHANNELS_END_IDX
+                self._log_prod.write([*raw[:s], np.array(raw[s:e]), *raw[e:]], timestamp)
+            else:
+                self._log_prod.write(list(raw), timestamp)
             if not self.log_raw_enabled:
                 self.signal.packet_logged.emit()
 
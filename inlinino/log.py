@@ -1,8 +1,66 @@
+import io
+import json
 import os
 from time import gmtime, strftime, time
-from struct import pack
+from struct import pack, Struct
 import logging
 import atexit
+from threading import Lock
+
+import numpy as np
+
+from inlinino.shared.scheduler import get_scheduler
+
+
+FSYNC_NEVER = 'never'
+FSYNC_FLUSH = 'flush'
+FSYNC_CLOSE = 'close'
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE)
+
+LOG_FORMAT_CSV = 'csv'
+LOG_FORMAT_COLUMNAR = 'columnar'
+LOG_FORMATS = (LOG_FORMAT_CSV, LOG_FORMAT_COLUMNAR)
+
+PRE_OPEN_LEAD = 5  # seconds before rollover at which the next file is created in background
+
+INDEX_EXT = '.idx'
+INDEX_RECORD = Struct('!dQ16s')  # timestamp, byte offset of frame in log file, frame header
+
+
+class TimestampEncoder:
+    """
+    Format timestamps of log files, caching the date and time of the current second
+    Loggers receive timestamps in increasing order, so the date and time are only formatted once per second and
+    only the milliseconds are formatted for each row. Not thread safe, each logger has its own encoder.
+    """
+    def __init__(self):
+        self._text_second = None
+        self._text_prefix = ''
+        self._satlantic_second = None
+        self._satlantic_datetag = b''
+        self._satlantic_timetag = 0
+
+    def text(self, timestamp: float) -> str:
+        """
+        Format timestamp as yyyy/mm/dd HH:MM:SS.fff
+        """
+        second = int(timestamp)
+        if second != self._text_second:
+            self._text_second = second
+            self._text_prefix = strftime('%Y/%m/%d %H:%M:%S', gmtime(second))
+        return self._text_prefix + ("%.3f" % timestamp)[-4:]
+
+    def satlantic(self, timestamp: float) -> bytes:
+        """
+        Pack timestamp as Satlantic DATETAG (yyyyddd on 3 bytes) and TIMETAG (HHMMSSfff on 4 bytes)
+        """
+        s, ms = divmod(timestamp, 1)
+        if s != self._satlantic_second:
+            t = gmtime(s)
+            self._satlantic_second = s
+            self._satlantic_datetag = pack('!i', t.tm_year * 1000 + t.tm_yday)[1:]
+            self._satlantic_timetag = (t.tm_hour * 10000 + t.tm_min * 100 + t.tm_sec) * 1000
+        return self._satlantic_datetag + pack('!i', self._satlantic_timetag + int(ms * 1000))
 
 
 class Log:
@@ -26,11 +84,17 @@ class Log:
             cfg['variable_units'] = []
         if 'variable_precision' not in cfg.keys():
             cfg['variable_precision'] = []
+        if 'index_interval' not in cfg.keys():
+            cfg['index_interval'] = 0  # seconds, 0 disables index
 
         self._file = type('obj', (object,), {'closed': True})
         self._file_timestamp = None
+        # Rotation: file is used while rollover_start <= timestamp < rollover_deadline (empty interval when closed)
+        self._rollover_start, self._rollover_deadline = float('inf'), float('-inf')
+        self._pre_opened = None  # (file_timestamp, filename, file, index) created in background before deadline
+        self._pre_open_lock = Lock()
         # self.file_mode_binary = cfg['mode_binary']
-        self.file_length = cfg['length'] * 60  # seconds
+        self._file_length = cfg['length'] * 60  # seconds
         self.filename_prefix = cfg['filename_prefix']
         self.filename_suffix = cfg['filename_suffix']
         self.filename = None
@@ -40,7 +104,18 @@ class Log:
 
         self.variable_names = cfg['variable_names']
         self.variable_units = cfg['variable_units']
+        self._row_format = None
         self.variable_precision = cfg['variable_precision']
+        self._timestamp_encoder = TimestampEncoder()
+
+        self.buffer_size = -1  # bytes buffered before writing to disk, -1 for system default
+        self.fsync = FSYNC_NEVER  # fsync file on flush and close, on close only, or never
+        self._flushed_position = 0
+
+        # Index (optional): sidecar file with timestamp and byte offset of a frame every index_interval seconds
+        self.index_interval = cfg['index_interval']
+        self._index = None
+        self._next_index = float('inf')
 
         atexit.register(self.close)
 
@@ -50,53 +125,183 @@ class Log:
             setattr(self, k, cfg[k])
         self.set_filename()
 
-    def set_filename(self, timestamp=None):
+    @property
+    def variable_precision(self):
+        return self._variable_precision
+
+    @variable_precision.setter
+    def variable_precision(self, value):
+        # Compile precision of each variable into a single format string, so rows are formatted in one operation
+        self._variable_precision = value
+        self._row_format = ',' + ','.join(value) + '\n' if value else None
+
+    @property
+    def file_length(self):
+        return self._file_length
+
+    @file_length.setter
+    def file_length(self, value):
+        self._file_length = value
+        if self._file_timestamp is not None:
+            self._rollover_start, self._rollover_deadline = self.get_rollover_window(self._file_timestamp)
+
+    def get_rollover_window(self, file_timestamp):
+        """
+        Interval of timestamps logged in file opened at file_timestamp, files end at file_length or end of UTC day
+        """
+        day = file_timestamp - file_timestamp % 86400
+        return day, min(file_timestamp + self._file_length, day + 86400)
+
+    def set_filename(self):
         suffix = '_' + self.filename_suffix if self.filename_suffix else ''
-        if timestamp:
-            if not os.path.exists(self.path):
-                os.makedirs(self.path)
-            self.filename = self.filename_prefix + '_' + strftime('%Y%m%d_%H%M%S', gmtime(timestamp)) + \
-                            suffix + '.' + self.FILE_EXT
-            suffix_id = 0
-            while os.path.exists(os.path.join(self.path, self.filename)):
-                self.filename = self.filename_prefix + '_' + strftime('%Y%m%d_%H%M%S', gmtime(timestamp)) + \
-                                '_' + str(suffix_id) + suffix + '.' + self.FILE_EXT
+        self.filename = self.filename_prefix + '_<date>_<time>' + suffix + '.' + self.FILE_EXT
+
+    def _create_file(self, timestamp):
+        """
+        Create file named after timestamp, a number is appended to the name if the file already exists
+        :return: filename, file object, and index file object (None if index is disabled)
+        """
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        suffix = '_' + self.filename_suffix if self.filename_suffix else ''
+        prefix = self.filename_prefix + '_' + strftime('%Y%m%d_%H%M%S', gmtime(timestamp))
+        filename, suffix_id = prefix + suffix + '.' + self.FILE_EXT, 0
+        while True:
+            try:  # Exclusive creation instead of checking if file exists before opening it
+                file = open(os.path.join(self.path, filename), 'xb', self.buffer_size)
+                break
+            except FileExistsError:
+                filename = prefix + '_' + str(suffix_id) + suffix + '.' + self.FILE_EXT
                 suffix_id += 1
-        else:
-            self.filename = self.filename_prefix + '_<date>_<time>' + suffix + '.' + self.FILE_EXT
+        index = self._open_index(filename)
+        if 'b' not in self.FILE_MODE:
+            # Indexed text is encoded straight into the binary buffer, so offsets are known without flushing the file
+            file = io.TextIOWrapper(file, write_through=index is not None)
+        return filename, file, index
 
     def get_file_timestamp(self):
         return self._file_timestamp
 
+    @staticmethod
+    def format_array(array):
+        """
+        Format spectrum (np.array) as written in a cell of the file
+        """
+        return np.array2string(array, threshold=np.inf, max_line_width=np.inf)
+
     def write_header(self):
         if self.variable_names:
             self._file.write('time,' + ','.join(x for x in self.variable_names) + '\n')
             self._file.write('yyyy/mm/dd HH:MM:SS.fff,' + ','.join(x for x in self.variable_units) + '\n')
 
+    def write_footer(self):
+        pass
+
     def open(self, timestamp):
-        self.set_filename(timestamp)
-        # Create File
         # TODO add exception in case can't open file
-        # TODO specify number of bytes in buffer depending on instrument
-        self._file = open(os.path.join(self.path, self.filename), self.FILE_MODE)
+        self.filename, file, index = self._create_file(timestamp)
+        self._use_file(file, index, timestamp)
+
+    def _open_index(self, filename):
+        if not self.index_interval:
+            return None
+        return open(os.path.join(self.path, filename + INDEX_EXT), 'wb')
+
+    def _use_file(self, file, index, timestamp):
+        self._file = file
+        self._index = index
+        self._next_index = float('-inf') if index is not None else float('inf')
+        self._flushed_position = 0
         self.__logger.info('Open file %s' % self.filename)
         # Write header
         self.write_header()
         # Time file open
         self._file_timestamp = timestamp
+        self._rollover_start, self._rollover_deadline = self.get_rollover_window(timestamp)
+        if time() < self._rollover_deadline:  # Live data, prepare next file (not needed when replaying old data)
+            get_scheduler().call_at(self._rollover_deadline - PRE_OPEN_LEAD, self._pre_open, self._rollover_deadline)
         if self.signal_new_file:
             self.signal_new_file.emit()
 
+    def _pre_open(self, file_timestamp):
+        """
+        Create file following current file (run by scheduler thread)
+        Files are named after their first row, so the file is named after the deadline and only used if the first row
+        following the deadline is in the same second (see _rollover), otherwise it is removed and a file is opened.
+        """
+        if self._rollover_deadline != file_timestamp or self._pre_opened is not None:
+            return  # File closed or rotated since scheduled
+        # File is created without holding the lock, so the writer never waits on the file system to rotate
+        try:
+            pre_opened = (file_timestamp, *self._create_file(file_timestamp))
+        except OSError as e:
+            self.__logger.warning(f'Unable to prepare next file: {e}')
+            return
+        with self._pre_open_lock:
+            stale = self._rollover_deadline != file_timestamp or self._pre_opened is not None
+            if not stale:
+                self._pre_opened = pre_opened
+        if stale:  # File closed or rotated while creating next file
+            self._remove_empty_file(*pre_opened[1:])
+
+    def _discard_pre_opened(self):
+        with self._pre_open_lock:
+            pre_opened, self._pre_opened = self._pre_opened, None
+        if pre_opened is not None:
+            get_scheduler().call_soon(self._remove_empty_file, *pre_opened[1:])
+
+    def _remove_empty_file(self, filename, file, index):
+        empty = file.tell() == 0
+        file.close()
+        if empty:
+            os.remove(os.path.join(self.path, filename))
+        if index is not None:
+            index.close()
+            if empty:
+                os.remove(os.path.join(self.path, filename + INDEX_EXT))
+
+    def _close_file(self, filename, file, index):
+        for f in (file, index) if index is not None else (file,):
+            if self.fsync != FSYNC_NEVER:
+                f.flush()
+                os.fsync(f.fileno())
+            f.close()
+        self.__logger.debug('Close file %s' % filename)
+
+    def write_index(self, timestamp, header=b''):
+        """
+        Add position of frame about to be written to index, called by write when timestamp >= _next_index
+        :param header: frame header (e.g. Satlantic frame header), truncated to 16 bytes
+        """
+        # tell() of a text file flushes it, the binary buffer underneath only adds the bytes it holds to its position
+        position = self._file.buffer.tell() if isinstance(self._file, io.TextIOWrapper) else self._file.tell()
+        self._index.write(INDEX_RECORD.pack(timestamp, position, header))
+        self._next_index = timestamp - timestamp % self.index_interval + self.index_interval
+
     def _smart_open(self, timestamp):
         # Open file if necessary
-        if self._file.closed or \
-                gmtime(self._file_timestamp).tm_mday != gmtime(timestamp).tm_mday or \
-                timestamp - self._file_timestamp >= self.file_length:
-            # Close previous file if open
-            if not self._file.closed:
-                self.close()
-            # Create new file
-            self.open(timestamp)
+        if not self._rollover_start <= timestamp < self._rollover_deadline:
+            self._rollover(timestamp)
+
+    def _rollover(self, timestamp):
+        with self._pre_open_lock:
+            pre_opened, self._pre_opened = self._pre_opened, None
+        if pre_opened is not None:
+            file_timestamp, filename, file, index = pre_opened
+            # Name of file prepared is that of a file opened at timestamp, if timestamp is in same second as deadline
+            if file_timestamp <= timestamp < int(file_timestamp) + 1 and not self._file.closed:
+                # Swap to file prepared in background, previous file is closed in background
+                self.write_footer()
+                get_scheduler().call_soon(self._close_file, self.filename, self._file, self._index)
+                self.filename = filename
+                self._use_file(file, index, timestamp)
+                return
+            get_scheduler().call_soon(self._remove_empty_file, filename, file, index)
+        # Close previous file if open
+        if not self._file.closed:
+            self.close()
+        # Create new file
+        self.open(timestamp)
 
     def write(self, data, timestamp, file_timestamp=None):
         """
@@ -106,21 +311,46 @@ class Log:
         :return:
         """
         self._smart_open(file_timestamp if file_timestamp else timestamp)
-        if self.variable_precision:
-            self._file.write(strftime('%Y/%m/%d %H:%M:%S', gmtime(timestamp)) + ("%.3f" % timestamp)[-4:] +
+        if timestamp >= self._next_index:
+            self.write_index(timestamp)
+        if self._row_format is not None and len(data) == len(self._variable_precision):
+            if isinstance(data, np.ndarray):  # All numeric, python scalars are faster to format than numpy scalars
+                data = data.tolist()
+            self._file.write(self._timestamp_encoder.text(timestamp) + self._row_format % tuple(data))
+        elif self.variable_precision:
+            self._file.write(self._timestamp_encoder.text(timestamp) +
                              ',' + ','.join(p % d for p, d in zip(self.variable_precision, data)) + '\n')
         else:
-            self._file.write(strftime('%Y/%m/%d %H:%M:%S', gmtime(timestamp)) + ("%.3f" % timestamp)[-4:] +
+            self._file.write(self._timestamp_encoder.text(timestamp) +
                              ',' + ','.join(str(d) for d in data) + '\n')
 
+    def flush(self) -> int:
+        """
+        Write buffer of file to disk, and fsync file if fsync policy is flush
+        :return: number of bytes written to disk since last flush
+        """
+        if self._file.closed:
+            return 0
+        if self._index is not None:
+            self._index.flush()
+        self._file.flush()
+        if self.fsync == FSYNC_FLUSH:
+            os.fsync(self._file.fileno())
+        position = os.lseek(self._file.fileno(), 0, os.SEEK_CUR)
+        n, self._flushed_position = position - self._flushed_position, position
+        return n
+
     def close(self):
         if not self._file.closed:
-            self._file.close()
-            self.__logger.debug('Close file %s' % self.filename)
+            self.write_footer()
+            self._close_file(self.filename, self._file, self._index)
+            self._index, self._next_index = None, float('inf')
             self.set_filename()
             if self.signal_new_file:
                 self.signal_new_file.emit()
         self._file_timestamp = None
+        self._rollover_start, self._rollover_deadline = float('inf'), float('-inf')
+        self._discard_pre_opened()
 
 
 class LogBinary(Log):
@@ -137,9 +367,11 @@ class LogBinary(Log):
     def format_timestamp(timestamp):
         return pack('!d', timestamp)
 
-    def write(self, data, timestamp=None):
+    def write(self, data, timestamp=None, header=b''):
         if timestamp:
             self._smart_open(timestamp)
+            if timestamp >= self._next_index:
+                self.write_index(timestamp, header)
             self._file.write(data + self.format_timestamp(timestamp))
         else:
             # Open file only if doesn't exist (keep in same file as previous bytes logged)
@@ -169,5 +401,125 @@ class LogText(Log):
         :return:
         """
         self._smart_open(timestamp)
-        self._file.write(strftime('%Y/%m/%d %H:%M:%S', gmtime(timestamp)) + ("%.3f" % timestamp)[-4:] +
+        if timestamp >= self._next_index:
+            self.write_index(timestamp)
+        self._file.write(self._timestamp_encoder.text(timestamp) +
                          ',' + self.registration + data.decode(self.ENCODING, self.UNICODE_HANDLING) + '\n')
+
+
+class LogColumnar(Log):
+    """
+    Log products in chunked columnar binary files, read back with inlinino.shared.log_reader.read_columnar_log
+    Files are a sequence of numpy arrays (.npy format) starting with the schema (json string listing name, units,
+    and type of each column) followed by chunks of rows. Each chunk is one array per column: time (float64),
+    numbers (float64), flags (bool), text (unicode), and spectra (float32 block of shape rows x width).
+    Rows are buffered and written every chunk_size rows, every chunk_interval seconds, and when the file is closed.
+    """
+    FILE_EXT = 'npc'
+    FILE_MODE = 'wb'
+    SCHEMA_FORMAT = 'inlinino-columnar'
+    SCHEMA_VERSION = 1
+
+    def __init__(self, cfg, signal_new_file=None):
+        if 'chunk_size' not in cfg.keys():
+            cfg['chunk_size'] = 256  # rows
+        if 'chunk_interval' not in cfg.keys():
+            cfg['chunk_interval'] = 60  # seconds
+        self.chunk_size = cfg['chunk_size']
+        self.chunk_interval = cfg['chunk_interval']
+        self._rows = []
+        self._timestamps = []
+        self._schema = None
+        super().__init__(cfg, signal_new_file)
+
+    @staticmethod
+    def format_array(array):
+        return array
+
+    def write_header(self):
+        self._schema = None  # Written with first chunk as type of columns is inferred from first row
+
+    def make_schema(self, row) -> dict:
+        columns = [{'name': 'time', 'units': 'seconds since 1970-01-01 00:00:00 UTC', 'dtype': 'float64'}]
+        for i, value in enumerate(row):
+            column = {'name': self.variable_names[i] if i < len(self.variable_names) else f'column_{i}',
+                      'units': self.variable_units[i] if i < len(self.variable_units) else ''}
+            if isinstance(value, (np.ndarray, list, tuple)):
+                column['dtype'], column['width'] = 'float32', int(np.size(value))
+            elif isinstance(value, (bool, np.bool_)):
+                column['dtype'] = 'bool'
+            elif isinstance(value, (int, float, np.number)):
+                column['dtype'] = 'float64'
+            else:
+                column['dtype'] = 'str'
+            columns.append(column)
+        return {'format': self.SCHEMA_FORMAT, 'version': self.SCHEMA_VERSION, 'columns': columns}
+
+    @staticmethod
+    def make_column(values, column) -> np.ndarray:
+        if column['dtype'] == 'float32':
+            try:
+                array = np.asarray(values, dtype=np.float32)
+                if array.shape == (len(values), column['width']):
+                    return array
+            except (TypeError, ValueError):
+                pass
+            # Spectra of variable length are truncated or padded with nan
+            array = np.full((len(values), column['width']), np.nan, dtype=np.float32)
+            for i, v in enumerate(values):
+                try:
+                    v = np.asarray(v, dtype=np.float32).ravel()[:column['width']]
+                    array[i, :len(v)] = v
+                except (TypeError, ValueError):
+                    pass
+            return array
+        elif column['dtype'] == 'float64':
+            try:
+                return np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                return np.array([LogColumnar.to_float(v) for v in values], dtype=np.float64)
+        elif column['dtype'] == 'bool':
+            return np.asarray(values, dtype=bool)
+        return np.array([str(v) for v in values], dtype=str)
+
+    @staticmethod
+    def to_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float('nan')
+
+    def write_chunk(self):
+        """
+        Write rows buffered to file, one array per column
+        """
+        if not self._rows:
+            return
+        if self._schema is None:
+            self._schema = self.make_schema(self._rows[0])
+            np.save(self._file, np.array(json.dumps(self._schema)), allow_pickle=False)
+        np.save(self._file, np.asarray(self._timestamps, dtype=np.float64), allow_pickle=False)
+        n = len(self._schema['columns']) - 1
+        columns = zip(*(row[:n] if len(row) >= n else list(row) + [None] * (n - len(row)) for row in self._rows))
+        for values, column in zip(columns, self._schema['columns'][1:]):
+            np.save(self._file, self.make_column(values, column), allow_pickle=False)
+        self._rows, self._timestamps = [], []
+
+    def write(self, data, timestamp, file_timestamp=None):
+        """
+        Buffer data, written to file by chunk
+        :param data: list of values, spectra are passed as np.array
+        :param timestamp: date and time associated with the data frame
+        :return:
+        """
+        self._smart_open(file_timestamp if file_timestamp else timestamp)
+        self._rows.append(data)
+        self._timestamps.append(timestamp)
+        if len(self._rows) >= self.chunk_size or timestamp - self._timestamps[0] >= self.chunk_interval:
+            self.write_chunk()
+
+    def write_footer(self):
+        self.write_chunk()
+
+    def _open_index(self, filename):
+        return None  # Not indexed, each chunk starts with the timestamps of its rows
@@ -0,0 +1,24 @@
+"""
+Qt adapters of instrument signals (inlinino.app_signal), used by the user interface
+Each adapter is a QObject with a pyqtSignal for each Signal of the pure python class, so slots of widgets connected
+to signals emitted by instrument threads are called from the Qt event loop.
+"""
+from pyqtgraph.Qt import QtCore
+
+from inlinino import app_signal
+from inlinino.shared.signal import list_signals
+
+
+def to_qt_signals(cls, **attributes):
+    """
+    Build QObject subclass declaring a pyqtSignal for each signal of cls
+    """
+    namespace = {name: None if signal is None else QtCore.pyqtSignal(*signal.types)
+                 for name, signal in list_signals(cls).items()}
+    namespace.update(attributes)
+    return type(QtCore.QObject)(cls.__name__, (QtCore.QObject,), namespace)
+
+
+InterfaceSignals = to_qt_signals(app_signal.InterfaceSignals)
+InstrumentSignals = to_qt_signals(app_signal.InstrumentSignals)
+HyperNavSignals = to_qt_signals(app_signal.HyperNavSignals, interface_signals=InterfaceSignals)
@@ -0,0 +1,92 @@
+"""
+Registry of instrument drivers and widgets
+
+Drivers and widgets are imported only when used, so loading one instrument does not import the dependencies of all
+the others (e.g. pyACS, pySatlantic, scipy, pynmea2). Other packages can register drivers and widgets with entry points
+of the groups `inlinino.instruments` and `inlinino.widgets`, for example in their setup.py:
+    entry_points={'inlinino.instruments': ['mysensor = mypackage.mysensor:MySensor'],
+                  'inlinino.widgets': ['MySensorWidget = mypackage.widgets:MySensorWidget']}
+The name of an instrument entry point is the `module` of the instrument configuration, and the name of a widget entry
+point is its class name. Widgets are loaded when the instrument has `widget_<snake_name>_enabled` set.
+"""
+import importlib
+import re
+from functools import lru_cache
+from importlib.metadata import entry_points
+
+
+INSTRUMENT_ENTRY_POINTS = 'inlinino.instruments'
+WIDGET_ENTRY_POINTS = 'inlinino.widgets'
+
+# Module name: (python module, class name)
+INSTRUMENT_MODULES = {'generic': ('inlinino.instruments', 'Instrument'),
+                      'acs': ('inlinino.instruments.acs', 'ACS'),
+                      'apogee': ('inlinino.instruments.apogee', 'ApogeeQuantumSensor'),
+                      'dataq': ('inlinino.instruments.dataq', 'DATAQ'),
+                      'hydroscat': ('inlinino.instruments.hydroscat', 'HydroScat'),
+                      'hyperbb': ('inlinino.instruments.hyperbb', 'HyperBB'),
+                      'hypernav': ('inlinino.instruments.hypernav', 'HyperNav'),
+                      'lisst': ('inlinino.instruments.lisst', 'LISST'),
+                      'nmea': ('inlinino.instruments.nmea', 'NMEA'),
+                      'ontrak': ('inlinino.instruments.ontrak', 'Ontrak'),
+                      'satlantic': ('inlinino.instruments.satlantic', 'Satlantic'),
+                      'sunav1': ('inlinino.instruments.suna', 'SunaV1'),
+                      'sunav2': ('inlinino.instruments.suna', 'SunaV2'),
+                      'taratsg': ('inlinino.instruments.taratsg', 'TaraTSG')}
+
+# Widget class name: (python module, secondary dock), in order of display
+WIDGET_MODULES = {'AuxDataWidget': ('inlinino.widgets.aux_data', False),
+                  'FlowControlWidget': ('inlinino.widgets.flow_control', True),
+                  'HyperNavCalWidget': ('inlinino.widgets.hypernav', True),
+                  'MetadataWidget': ('inlinino.widgets.metadata', True),
+                  'PumpControlWidget': ('inlinino.widgets.pump_control', True),
+                  'SelectChannelWidget': ('inlinino.widgets.select_channel', False)}
+
+
+@lru_cache(maxsize=None)
+def get_entry_points(group: str) -> dict:
+    eps = entry_points()
+    if hasattr(eps, 'select'):  # Python >= 3.10
+        return {ep.name: ep for ep in eps.select(group=group)}
+    return {ep.name: ep for ep in eps.get(group, [])}
+
+
+def list_instrument_modules() -> list:
+    return list(INSTRUMENT_MODULES.keys()) + \
+        [k for k in get_entry_points(INSTRUMENT_ENTRY_POINTS).keys() if k not in INSTRUMENT_MODULES.keys()]
+
+
+def get_instrument_class(module_name):
+    if module_name in INSTRUMENT_MODULES.keys():
+        module, name = INSTRUMENT_MODULES[module_name]
+        return getattr(importlib.import_module(module), name)
+    eps = get_entry_points(INSTRUMENT_ENTRY_POINTS)
+    if module_name in eps.keys():
+        return eps[module_name].load()
+    raise ValueError(f'Instrument module {module_name} not supported')
+
+
+def list_widgets() -> list:
+    return list(WIDGET_MODULES.keys()) + \
+        [k for k in get_entry_points(WIDGET_ENTRY_POINTS).keys() if k not in WIDGET_MODULES.keys()]
+
+
+def get_widget_class(name):
+    """
+    :return: widget class and whether it goes in the secondary dock
+    """
+    if name in WIDGET_MODULES.keys():
+        module, secondary_dock = WIDGET_MODULES[name]
+        return getattr(importlib.import_module(module), name), secondary_dock
+    eps = get_entry_points(WIDGET_ENTRY_POINTS)
+    if name in eps.keys():
+        widget = eps[name].load()
+        return widget, getattr(widget, 'secondary_dock', True)
+    raise ValueError(f'Widget {name} not supported')
+
+
+def widget_enabled_attribute(name) -> str:
+    """
+    Attribute of instrument enabling widget, same as GenericWidget.__snake_name__ without importing widget
+    """
+    return f"widget_{re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()[:-7]}_enabled"
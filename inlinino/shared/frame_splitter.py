@@ -0,0 +1,51 @@
+class FrameSplitter:
+    """
+    Split a stream of bytes into frames delimited by a terminator
+
+    The splitter keeps track of the position up to which the buffer was already searched, so bytes are never scanned
+    twice by Python, and the buffer is compacted only once per call (instead of once per frame with bytearray.split).
+    All complete frames are cut at once with bytes.split and returned as bytes, reads that cannot end a frame return
+    immediately. The buffer is owned by the caller, which can empty or replace it at any time (e.g. on overflow), the
+    scan offset is reset when that happens.
+    """
+
+    def __init__(self, terminator: bytes):
+        self.terminator = terminator
+        self._n = len(terminator) if terminator is not None else 0
+        self._last = terminator[-1] if terminator else None  # int, faster membership test than bytes
+        self._scan_offset = 0   # position in buffer from which to look for the next terminator
+        self._length = 0        # length of buffer when last compacted
+
+    def reset(self):
+        self._scan_offset = 0
+        self._length = 0
+
+    def split(self, buffer: bytearray, data: bytes = b'') -> list:
+        """
+        Append data to buffer and return complete frames (without terminator)
+        :param buffer: bytearray holding incomplete frame from previous call, compacted in place
+        :param data: bytes to append to buffer
+        :return: list of bytes
+        """
+        length = len(buffer)
+        buffer.extend(data)
+        if length != self._length:
+            # Buffer was modified outside of splitter
+            offset = 0
+        elif self._last not in data:
+            # Fast path: no terminator can end in data, hence no new frame
+            self._length = len(buffer)
+            return []
+        else:
+            offset = self._scan_offset
+        terminator, n = self.terminator, self._n
+        if buffer.find(terminator, offset) == -1:
+            frames = []
+        else:
+            frames = bytes(buffer).split(terminator)
+            del buffer[:len(buffer) - len(frames.pop())]  # keep incomplete frame
+        # Terminator could be split between two reads, hence scan again last bytes
+        length = len(buffer)
+        self._scan_offset = length - n + 1 if length >= n else 0
+        self._length = length
+        return frames
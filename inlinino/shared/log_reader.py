@@ -0,0 +1,267 @@
+"""
+Read raw log files written by Inlinino, yielding (data, timestamp) records
+    LogText (.raw): one packet per line prefixed by its timestamp, the terminator of the instrument is not logged
+    LogBinary (.bin): packets starting with registration bytes followed by their timestamp packed as double
+    RawLogger (Satlantic .raw): SatView header then frames followed by their DATETAG and TIMETAG
+Bytes logged without timestamp are returned with the next timestamped packet.
+Product logs written by LogColumnar (.npc) are read column by column with read_columnar_log.
+Logs with an index (sidecar .idx file listing timestamp and byte offset of frames) are read by time range with
+read_log_range without scanning the whole file.
+"""
+import io
+import json
+import os
+from calendar import timegm
+from struct import unpack
+
+import numpy as np
+
+
+SATLANTIC_HEADER = b'SATHDR'
+SATLANTIC_HEADER_LENGTH = 128  # bytes per header sentence
+SATLANTIC_REGISTRATION = b'SAT'
+INDEX_EXT = '.idx'
+INDEX_DTYPE = np.dtype([('timestamp', '>f8'), ('offset', '>u8'), ('header', 'S16')])  # Same as log.INDEX_RECORD
+TIMESTAMP_MIN, TIMESTAMP_MAX = 946684800, 4102444800  # 2000-01-01, 2100-01-01
+
+
+def get_log_type(filename):
+    """
+    Guess type of log file from its extension and first bytes
+    :return: 'text', 'binary', or 'satlantic'
+    """
+    if filename.endswith('.bin'):
+        return 'binary'
+    with open(filename, 'rb') as f:
+        if f.read(len(SATLANTIC_HEADER)) == SATLANTIC_HEADER:
+            return 'satlantic'
+    return 'text'
+
+
+def parse_text_timestamp(line: bytes, cache=None):
+    """
+    Parse timestamp 'yyyy/mm/dd HH:MM:SS.fff' at beginning of line
+    :param cache: optional dict of seconds already parsed, {b'yyyy/mm/dd HH:MM:SS': seconds}
+    :return: timestamp or None if line does not start with timestamp
+    """
+    if len(line) < 24 or line[23:24] != b',' or line[19:20] != b'.' or line[4:5] != b'/':
+        return None
+    prefix = line[:19]
+    try:
+        if cache is not None and prefix in cache:
+            seconds = cache[prefix]
+        else:
+            seconds = timegm((int(line[0:4]), int(line[5:7]), int(line[8:10]),
+                              int(line[11:13]), int(line[14:16]), int(line[17:19])))
+            if cache is not None:
+                cache.clear()  # Timestamps are increasing, only keep last one
+                cache[prefix] = seconds
+        return seconds + int(line[20:23]) / 1000
+    except ValueError:
+        return None
+
+
+def read_text_log(filename, terminator=b'\r\n'):
+    """
+    Read packets of LogText file, appending terminator as sent by instrument
+    Packets spanning several lines (terminator containing new line) are joined.
+    """
+    with open(filename, 'rb') as f:
+        yield from split_text_log(f, terminator)
+
+
+def split_text_log(lines, terminator=b'\r\n'):
+    """
+    Join lines of LogText file into packets
+    :param lines: iterable of lines (bytes)
+    """
+    cache, data, timestamp = {}, None, None
+    terminator = terminator if terminator else b''
+    for line in lines:
+        line = line[:-1] if line.endswith(b'\n') else line
+        ts = parse_text_timestamp(line, cache)
+        if ts is None:
+            if data is not None:
+                data += b'\n' + line  # Continuation of packet
+            continue  # or header
+        if data is not None:
+            yield data if data.startswith(terminator) else data + terminator, timestamp
+        data, timestamp = line[24:], ts
+    if data is not None:
+        yield data if data.startswith(terminator) else data + terminator, timestamp
+
+
+def decode_binary_timestamp(tail):
+    ts = unpack('!d', tail)[0]
+    return ts if TIMESTAMP_MIN <= ts <= TIMESTAMP_MAX else None
+
+
+def decode_satlantic_timestamp(tail):
+    datetag = int.from_bytes(tail[:3], 'big')
+    timetag = int.from_bytes(tail[3:], 'big')
+    year, doy = divmod(datetag, 1000)
+    hh, mm, ss, ms = timetag // 10000000, timetag // 100000 % 100, timetag // 1000 % 100, timetag % 1000
+    if not (2000 <= year < 2100 and 1 <= doy <= 366 and hh < 24 and mm < 60 and ss < 61):
+        return None
+    return timegm((year, 1, 1, hh, mm, ss)) + (doy - 1) * 86400 + ms / 1000
+
+
+def split_binary_log(buffer, registration, timestamp_length, decode_timestamp):
+    """
+    Split content of binary log on registration bytes and strip timestamp following each packet
+    """
+    if not registration:
+        raise ValueError('Registration bytes required to read binary log.')
+    pending, timestamp = b'', None
+    start, end = 0, buffer.find(registration, 1)
+    while start < len(buffer):
+        if end == -1:
+            end = len(buffer)
+        record = buffer[start:end]
+        ts = decode_timestamp(record[-timestamp_length:]) if len(record) > timestamp_length else None
+        if ts is None:
+            pending += record  # Bytes logged without timestamp (e.g. corrupted or unknown frames)
+        else:
+            yield pending + record[:-timestamp_length], ts
+            pending, timestamp = b'', ts
+        start, end = end, buffer.find(registration, end + 1)
+    if pending and timestamp is not None:
+        yield pending, timestamp
+
+
+def read_binary_log(filename, registration):
+    """
+    Read packets of LogBinary file, packets start with registration bytes (e.g. ACS)
+    """
+    with open(filename, 'rb') as f:
+        buffer = f.read()
+    yield from split_binary_log(buffer, registration, 8, decode_binary_timestamp)
+
+
+def read_satlantic_log(filename):
+    """
+    Read frames of Satlantic RawLogger file (SatView format)
+    """
+    with open(filename, 'rb') as f:
+        buffer = f.read()
+    start = 0
+    while buffer.startswith(SATLANTIC_HEADER, start):
+        start += SATLANTIC_HEADER_LENGTH
+    yield from split_binary_log(buffer[start:], SATLANTIC_REGISTRATION, 7, decode_satlantic_timestamp)
+
+
+def read_log(filename, terminator=b'\r\n'):
+    """
+    Read packets of any raw log file
+    :param filename: path to .raw or .bin file
+    :param terminator: terminator (text) or registration bytes (binary) of instrument
+    :return: generator of (data, timestamp)
+    """
+    log_type = get_log_type(filename)
+    if log_type == 'binary':
+        return read_binary_log(filename, terminator)
+    elif log_type == 'satlantic':
+        return read_satlantic_log(filename)
+    return read_text_log(filename, terminator)
+
+
+def read_index(filename):
+    """
+    Read index of log file (sidecar file filename.idx), an incomplete record at the end of the index is ignored
+    :param filename: path to log file
+    :return: structured array with fields timestamp, offset, and header, or None if log has no index
+    """
+    if not os.path.isfile(filename + INDEX_EXT):
+        return None
+    with open(filename + INDEX_EXT, 'rb') as f:
+        buffer = f.read()
+    return np.frombuffer(buffer, dtype=INDEX_DTYPE, count=len(buffer) // INDEX_DTYPE.itemsize)
+
+
+def get_range_offsets(index, start=None, end=None):
+    """
+    Byte offsets of the part of a log file containing frames from start to end
+    :return: offset to seek to, and offset to stop reading at (None for end of file)
+    """
+    begin, stop = 0, None
+    if index is not None and len(index):
+        if start is not None:
+            i = np.searchsorted(index['timestamp'], start, side='right') - 1
+            if i >= 0:
+                begin = int(index['offset'][i])
+        if end is not None:
+            i = np.searchsorted(index['timestamp'], end, side='right')
+            if i < len(index):
+                stop = int(index['offset'][i])
+    return begin, stop
+
+
+def read_log_range(filename, start=None, end=None, terminator=b'\r\n'):
+    """
+    Read packets of raw log file with timestamp between start and end (included)
+    Only the part of the file containing the time range is read if the log was indexed, otherwise the whole file is.
+    :param filename: path to .raw or .bin file
+    :param start: timestamp of first packet (seconds since epoch), None for beginning of file
+    :param end: timestamp of last packet, None for end of file
+    :param terminator: terminator (text) or registration bytes (binary) of instrument
+    :return: generator of (data, timestamp)
+    """
+    log_type = get_log_type(filename)
+    begin, stop = get_range_offsets(read_index(filename), start, end)
+    with open(filename, 'rb') as f:
+        f.seek(begin)
+        buffer = f.read() if stop is None else f.read(stop - begin)
+    if log_type == 'binary':
+        records = split_binary_log(buffer, terminator, 8, decode_binary_timestamp)
+    elif log_type == 'satlantic':
+        offset = 0
+        while buffer.startswith(SATLANTIC_HEADER, offset):
+            offset += SATLANTIC_HEADER_LENGTH
+        records = split_binary_log(buffer[offset:], SATLANTIC_REGISTRATION, 7, decode_satlantic_timestamp)
+    else:
+        records = split_text_log(io.BytesIO(buffer), terminator)
+    for data, timestamp in records:
+        if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+            yield data, timestamp
+
+
+def read_columnar_log(filename):
+    """
+    Read product log written by LogColumnar, chunks are concatenated
+    An incomplete chunk at the end of the file (e.g. power loss while writing) is ignored.
+    :return: schema (dict), and dict of columns {name: np.array}, spectra are 2D arrays (rows x width)
+    """
+    with open(filename, 'rb') as f:
+        schema = json.loads(str(np.load(f, allow_pickle=False)))
+        n = len(schema['columns'])
+        chunks = [[] for _ in range(n)]
+        while True:
+            chunk = []
+            try:
+                for _ in range(n):
+                    chunk.append(np.load(f, allow_pickle=False))
+            except (EOFError, ValueError, OSError):
+                break
+            for c, a in zip(chunks, chunk):
+                c.append(a)
+    data = {}
+    for column, c in zip(schema['columns'], chunks):
+        if c:
+            data[column['name']] = np.concatenate(c)
+        elif 'width' in column:
+            data[column['name']] = np.empty((0, column['width']), dtype=column['dtype'])
+        else:
+            data[column['name']] = np.empty(0, dtype=column['dtype'])
+    return schema, data
+
+
+def list_logs(path, prefix=''):
+    """
+    List raw log files sorted by name (hence by time), path can be a file or a directory
+    """
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        raise ValueError(f'No such file or directory {path}')
+    return [os.path.join(path, f) for f in sorted(os.listdir(path))
+            if f.startswith(prefix) and os.path.splitext(f)[1] in ('.raw', '.bin')]
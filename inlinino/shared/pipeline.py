@@ -0,0 +1,270 @@
+import logging
+from collections import deque
+from threading import Thread, Event, current_thread
+from time import time
+
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class BoundedQueue:
+    """
+    Single producer, single consumer bounded queue
+    Relies on the atomicity of deque.append and deque.popleft so that neither the producer nor the consumer
+    needs to acquire a lock. The consumer is woken up with an event only when it is waiting for items, and with the
+    block overflow policy, the producer is woken up with an event when the consumer makes room in the queue.
+    """
+
+    def __init__(self, maxsize=1024, overflow=DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Invalid overflow policy {overflow}')
+        if maxsize < 1:
+            raise ValueError('Queue size must be strictly positive.')
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._deque = deque(maxlen=maxsize if overflow == DROP_OLDEST else None)
+        self._not_empty = Event()
+        self._not_full = Event()
+        # Counters
+        self.put_count = 0
+        self.dropped = 0
+        self.high_water_mark = 0
+
+    def __len__(self):
+        return len(self._deque)
+
+    @property
+    def occupancy(self) -> float:
+        return len(self._deque) / self.maxsize
+
+    def put(self, item, timeout=None) -> bool:
+        """
+        Add item to queue, applying the overflow policy if the queue is full
+        :return: True if item was queued, False if it was dropped
+        """
+        n = len(self._deque)
+        if n >= self.maxsize:
+            if self.overflow == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            elif self.overflow == DROP_OLDEST:
+                self.dropped += 1  # oldest item is discarded by deque
+            else:  # BLOCK
+                deadline = time() + timeout if timeout is not None else None
+                while True:
+                    self._not_full.clear()
+                    if len(self._deque) < self.maxsize:  # Consumer could have made room before event was cleared
+                        break
+                    remaining = deadline - time() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        self.dropped += 1
+                        return False
+                    self._not_full.wait(remaining)
+        self._deque.append(item)
+        self.put_count += 1
+        n = len(self._deque)
+        if n > self.high_water_mark:
+            self.high_water_mark = n
+        self._not_empty.set()
+        return True
+
+    def get(self, timeout=None):
+        """
+        Get oldest item from queue
+        :raise IndexError: if queue is still empty after timeout
+        """
+        try:
+            item = self._deque.popleft()
+        except IndexError:
+            self._not_empty.clear()
+            if not self._deque:  # Producer could have added an item before the event was cleared
+                self._not_empty.wait(timeout)
+            item = self._deque.popleft()
+        if self.overflow == BLOCK:
+            self._not_full.set()
+        return item
+
+    def wake_up(self):
+        self._not_empty.set()
+
+    def clear(self):
+        self._deque.clear()
+        self._not_full.set()
+
+
+class Stage:
+    """
+    Thread consuming items from a bounded queue with handler
+    Exceptions raised by the handler are logged and do not stop the stage.
+    Optionally, the time from queuing to handling each item is recorded in a latency histogram.
+    """
+    GET_TIMEOUT = 0.5  # seconds
+
+    def __init__(self, name, handler, maxsize=1024, overflow=DROP_OLDEST, logger=None, latency=None):
+        self.name = name
+        self.handler = handler
+        self.latency = latency
+        self.queue = BoundedQueue(maxsize, overflow)
+        self.logger = logger if logger is not None else logging.getLogger(name)
+        self._thread = None
+        self._alive = False
+        self._last_overflow_warning = 0
+        self.processed = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._alive
+
+    @property
+    def thread(self):
+        return self._thread
+
+    def start(self):
+        if self._alive:
+            return
+        self._alive = True
+        self._thread = Thread(name=self.name, target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop stage once all items in queue are processed
+        """
+        if not self._alive:
+            return
+        self._alive = False
+        self.queue.wake_up()
+        if self._thread is not None and self._thread.is_alive() and self._thread is not current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self.logger.warning(f'Stage {self.name} did not join.')
+
+    def put(self, item) -> bool:
+        dropped = self.queue.dropped
+        queued = self.queue.put(item if self.latency is None else (time(), item))
+        if self.queue.dropped != dropped:
+            if time() - self._last_overflow_warning > 10:
+                self._last_overflow_warning = time()
+                self.logger.warning(f'Stage {self.name} queue full, dropped {self.queue.dropped} items so far.')
+        return queued
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(self.GET_TIMEOUT)
+            except IndexError:
+                if not self._alive:
+                    break  # Queue is drained
+                continue
+            self._process(item)
+
+    def _process(self, item):
+        if self.latency is None:
+            self._handle(item)
+        else:
+            queued_at, item = item
+            self._handle(item)
+            self.latency.record(time() - queued_at)
+        self.processed += 1
+
+    def _handle(self, item):
+        try:
+            self.handler(item)
+        except Exception as e:
+            self.logger.warning(e)
+
+    @property
+    def stats(self) -> dict:
+        return {'queued': len(self.queue), 'maxsize': self.queue.maxsize, 'occupancy': self.queue.occupancy,
+                'high_water_mark': self.queue.high_water_mark, 'dropped': self.queue.dropped,
+                'processed': self.processed}
+
+
+class LogWriter(Stage):
+    """
+    Stage writing rows of loggers queued by QueuedLogProxy with group commit
+    Rows are written to the buffer of the files as they are dequeued, and the files of all loggers registered are
+    flushed together every flush_interval seconds (or when their buffer is full). Files are opened, rotated, and
+    closed by this thread, so the acquisition thread never waits on the disk unless the queue is full.
+    """
+    def __init__(self, name, maxsize=4096, logger=None, latency=None, flush_interval=1.):
+        super().__init__(name, call_handler, maxsize, BLOCK, logger, latency)
+        self.flush_interval = flush_interval
+        self.logs = []
+        # Counters
+        self.flushes = 0
+        self.bytes_flushed = 0
+        self.max_bytes_per_flush = 0
+
+    def register(self, log):
+        """
+        Flush files of logger periodically, logger must implement flush (Log, ProdLogger, ...)
+        """
+        self.logs.append(log)
+
+    def run(self):
+        next_flush = time() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(max(0., min(self.GET_TIMEOUT, next_flush - time())))
+            except IndexError:
+                if not self._alive:
+                    break  # Queue is drained
+            else:
+                self._process(item)
+            if time() >= next_flush:
+                self.flush()
+                next_flush = time() + self.flush_interval
+        self.flush()
+
+    def flush(self):
+        n = 0
+        for log in self.logs:
+            try:
+                n += log.flush()
+            except (OSError, ValueError) as e:
+                self.logger.warning(e)
+        if n:
+            self.flushes += 1
+            self.bytes_flushed += n
+            if n > self.max_bytes_per_flush:
+                self.max_bytes_per_flush = n
+
+    @property
+    def stats(self) -> dict:
+        stats = super().stats
+        stats.update({'flushes': self.flushes, 'bytes_flushed': self.bytes_flushed,
+                      'bytes_per_flush': self.bytes_flushed / self.flushes if self.flushes else 0,
+                      'max_bytes_per_flush': self.max_bytes_per_flush})
+        return stats
+
+
+class QueuedLogProxy:
+    """
+    Forward write and close calls of a logger (Log, LogBinary, ProdLogger, ...) to a stage
+    Every other attribute is read from or written to the logger directly.
+    """
+    def __init__(self, log, stage: Stage):
+        object.__setattr__(self, 'log', log)
+        object.__setattr__(self, 'stage', stage)
+
+    def write(self, *args, **kwargs):
+        self.stage.put((self.log.write, args, kwargs))
+
+    def close(self):
+        self.stage.put((self.log.close, (), {}))
+
+    def __getattr__(self, name):
+        return getattr(self.log, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.log, name, value)
+
+
+def call_handler(item):
+    fun, args, kwargs = item
+    fun(*args, **kwargs)
@@ -0,0 +1,146 @@
+import logging
+import selectors
+from threading import Thread, RLock, current_thread
+from time import time, sleep
+
+
+class Reactor:
+    """
+    Read the interfaces of many instruments from a single thread
+    Interfaces are multiplexed with selectors (epoll on Linux, kqueue on macOS) instead of one blocking thread per
+    instrument. Interfaces must expose a file descriptor (serial ports on POSIX and sockets). Chunks are timestamped
+    by their interface, as with a reader thread, and dispatched to Instrument.dispatch_chunk (directly or through the
+    parser stage of the instrument pipeline). Instruments are given the opportunity to write to their interface and
+    check for data timeout every tick.
+    """
+    TICK = 0.5  # seconds
+
+    def __init__(self, name='Reactor'):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        self._selector = selectors.DefaultSelector()
+        self._lock = RLock()  # Held while dispatching, so no instrument is read once unregistered
+        self._instruments = {}
+        self._thread = None
+        self._alive = False
+        # Counters
+        self.wake_ups = 0
+        self.chunks = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._alive
+
+    @property
+    def thread(self):
+        return self._thread
+
+    def __len__(self):
+        return len(self._instruments)
+
+    def register(self, instrument):
+        """
+        Start reading interface of instrument, interface must be open and initialized
+        """
+        fd = instrument._interface.fileno()
+        if fd is None:
+            raise ValueError(f'Interface {instrument.interface_name} of {instrument.name} does not support reactor.')
+        with self._lock:
+            self._selector.register(fd, selectors.EVENT_READ, instrument)
+            self._instruments[instrument] = fd
+        self.start()
+
+    def unregister(self, instrument):
+        """
+        Stop reading interface of instrument, once returned the instrument interface is not read anymore
+        """
+        with self._lock:
+            fd = self._instruments.pop(instrument, None)
+            if fd is not None:
+                try:
+                    self._selector.unregister(fd)
+                except (KeyError, ValueError):
+                    pass
+
+    def start(self):
+        if self._alive:
+            return
+        self._alive = True
+        self._thread = Thread(name=self.name, target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        if not self._alive:
+            return
+        self._alive = False
+        if self._thread is not None and self._thread is not current_thread():
+            self._thread.join(timeout if timeout is not None else 2 * self.TICK)
+            if self._thread.is_alive():
+                self.logger.warning('Thread did not join.')
+
+    def run(self):
+        last_tick = time()
+        while self._alive:
+            if not self._instruments:
+                events = []
+                sleep(self.TICK)  # Some selectors fail when no file descriptor is registered
+            else:
+                try:
+                    events = self._selector.select(self.TICK)
+                except (OSError, ValueError) as e:  # File descriptor closed while selecting
+                    self.logger.debug(e)
+                    events = []
+            self.wake_ups += 1
+            with self._lock:
+                for key, _ in events:
+                    instrument = key.data
+                    if instrument not in self._instruments:
+                        continue  # Unregistered by another instrument dispatched in same wake up
+                    self._read(instrument)
+                timestamp = time()
+                if timestamp - last_tick >= self.TICK:
+                    last_tick = timestamp
+                    for instrument in list(self._instruments.keys()):
+                        self._tick(instrument, timestamp)
+
+    def _read(self, instrument):
+        try:
+            data = instrument._interface.read()
+            self.chunks += 1
+            instrument.dispatch_chunk(data, instrument._interface.timestamp)
+            instrument.write_to_interface()
+        except IOError as e:
+            self._interface_error(instrument, e)
+
+    def _tick(self, instrument, timestamp):
+        try:
+            instrument.check_data_timeout(timestamp)
+            if instrument.stats_interval:
+                instrument.write_stats()
+            instrument.write_to_interface()
+        except IOError as e:
+            self._interface_error(instrument, e)
+
+    def _interface_error(self, instrument, e):
+        instrument.logger.error(e)
+        if instrument.signal.alarm is not None:
+            instrument.signal.alarm.emit(True)
+        self.unregister(instrument)
+        try:
+            instrument.close(wait_thread_join=False)
+        except IOError as e:
+            instrument.logger.error(e)
+
+
+_reactor = None
+
+
+def get_reactor() -> Reactor:
+    """
+    Reactor shared by all instruments of the process, started on first registration
+    """
+    global _reactor
+    if _reactor is None:
+        _reactor = Reactor()
+    return _reactor
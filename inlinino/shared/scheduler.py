@@ -0,0 +1,98 @@
+import atexit
+import heapq
+import logging
+from itertools import count
+from threading import Thread, Condition
+from time import time
+
+
+class Scheduler:
+    """
+    Run functions at a given time from a single background thread
+    Used by loggers to prepare the next file before rotating and to close files off the thread writing rows.
+    Functions due are run in order, a function raising an exception is logged and does not stop the scheduler.
+    Once stopped (e.g. at exit), functions due are run and functions scheduled afterwards are run immediately.
+    """
+    def __init__(self, name='Scheduler'):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        self._condition = Condition()
+        self._queue = []
+        self._counter = count()  # Keep order of functions scheduled at same time
+        self._thread = None
+        self._alive = False
+        self._stopped = False
+
+    @property
+    def alive(self) -> bool:
+        return self._alive
+
+    def __len__(self):
+        return len(self._queue)
+
+    def call_at(self, when: float, fun, *args):
+        """
+        Run fun(*args) at time when (seconds since epoch)
+        """
+        if self._stopped:
+            self._call(fun, args)
+            return
+        with self._condition:
+            heapq.heappush(self._queue, (when, next(self._counter), fun, args))
+            self._condition.notify()
+        self.start()
+
+    def call_soon(self, fun, *args):
+        self.call_at(time(), fun, *args)
+
+    def start(self):
+        if self._alive or self._stopped:
+            return
+        self._alive = True
+        self._thread = Thread(name=self.name, target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Run functions due and stop thread, functions scheduled later are dropped
+        """
+        self._stopped = True
+        if not self._alive:
+            return
+        with self._condition:
+            self._alive = False
+            self._condition.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self.logger.warning('Thread did not join.')
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self._alive and (not self._queue or self._queue[0][0] > time()):
+                    self._condition.wait(self._queue[0][0] - time() if self._queue else None)
+                if not self._queue or self._queue[0][0] > time():
+                    return  # Stopped
+                _, _, fun, args = heapq.heappop(self._queue)
+            self._call(fun, args)
+
+    def _call(self, fun, args):
+        try:
+            fun(*args)
+        except Exception as e:
+            self.logger.error(f'{getattr(fun, "__qualname__", fun)}: {e}')
+
+
+_scheduler = None
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Scheduler shared by all loggers of the process, started on first call
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+        atexit.register(_scheduler.stop)
+    return _scheduler
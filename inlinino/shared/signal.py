@@ -0,0 +1,217 @@
+import logging
+from collections import deque
+from threading import Event, Lock
+from time import time
+
+from inlinino.shared.scheduler import get_scheduler
+
+
+class EventQueue:
+    """
+    Slots of queued connections waiting to be called by the thread processing the queue, like the Qt event loop
+    Emitting a signal appends the slot and its arguments to the queue (thread-safe), the thread owning the queue calls
+    them in order with process_events or run. A slot raising an exception is logged and does not stop the queue.
+    """
+    def __init__(self, name='EventQueue'):
+        self.logger = logging.getLogger(name)
+        self._queue = deque()
+        self._ready = Event()
+        self._alive = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def post(self, slot, args):
+        self._queue.append((slot, args))
+        self._ready.set()
+
+    def process_events(self, timeout=0) -> int:
+        """
+        Call slots queued, waiting up to timeout seconds if none are queued
+        Slots queued while processing are called on the next call.
+        :return: number of slots called
+        """
+        if not self._queue and timeout and not self._ready.wait(timeout):
+            return 0
+        self._ready.clear()
+        n = len(self._queue)
+        for _ in range(n):
+            slot, args = self._queue.popleft()
+            try:
+                slot(*args)
+            except Exception as e:
+                self.logger.error(f'{getattr(slot, "__qualname__", slot)}: {e}')
+        return n
+
+    def run(self):
+        """
+        Process events until stop is called (from a slot or another thread)
+        """
+        self._alive = True
+        while self._alive:
+            self.process_events(timeout=1)
+        self.process_events()
+
+    def stop(self):
+        self._alive = False
+        self._ready.set()
+
+
+class _QueuedSlot:
+    """
+    Slot of a queued connection, calling it posts the slot and its arguments to the event queue
+    """
+    __slots__ = ('slot', 'queue')
+
+    def __init__(self, slot, queue: EventQueue):
+        self.slot = slot
+        self.queue = queue
+
+    def __call__(self, *args):
+        self.queue.post(self.slot, args)
+
+    def __eq__(self, other):
+        return self.slot == (other.slot if isinstance(other, _QueuedSlot) else other)
+
+
+class BoundSignal:
+    """
+    Signal attached to an object instance, mimic emit and connect of a bound pyqtSignal
+    Slots are called directly in the thread emitting the signal, or when connected with a queue, by the thread
+    processing the queue (same as a queued connection of Qt, e.g. to update an interface from the main thread).
+    """
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot, queue: EventQueue = None):
+        self._slots.append(slot if queue is None else _QueuedSlot(slot, queue))
+
+    def disconnect(self, slot=None):
+        if slot is None:
+            self._slots = []
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in self._slots:
+            slot(*args)
+
+    def __getitem__(self, types):
+        # Overloaded signals (e.g. new_ts_data[object, float, bool]) share slots
+        return self
+
+
+class Signal:
+    """
+    Qt-free replacement for pyqtSignal, declared as class attribute
+    Signature is informative only as arguments are not checked, it is used to declare the signal of Qt adapters
+    (inlinino.qt_signal), overloaded signals are declared with lists of types (e.g. Signal([str], [str, str])).
+    """
+    def __init__(self, *types):
+        self.types = types
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        bound = BoundSignal()
+        instance.__dict__[self.name] = bound  # Cache bound signal so same one is returned on next access
+        return bound
+
+
+def list_signals(cls) -> dict:
+    """
+    Signals declared by class and its parents, a signal disabled by a child class (set to None) is None
+    """
+    names = [n for k in reversed(cls.__mro__) for n, v in vars(k).items() if isinstance(v, Signal)]
+    return {n: getattr(cls, n) for n in dict.fromkeys(names)}
+
+
+class _CounterSignal:
+    """
+    Stand-in for packet_received, packet_logged, and packet_corrupted, emit increments a counter of the tick
+    """
+    def __init__(self, batch, key):
+        self._batch = batch
+        self._key = key
+
+    def emit(self, *args):
+        self._batch.add(self._key)
+
+
+class _SnapshotSignal:
+    """
+    Stand-in for new_aux_data and new_meta_data, emit keeps the latest data for the tick
+    """
+    def __init__(self, batch, key):
+        self._batch = batch
+        self._key = key
+
+    def emit(self, data):
+        self._batch.add(self._key, data)
+
+
+def merge_metadata(previous, data):
+    """
+    Merge metadata updates, (None, None) entries keep the previous value of the entry
+    """
+    if previous is None or len(previous) != len(data):
+        return data
+    return [p if d[0] is None and d[1] is None else d for p, d in zip(previous, data)]
+
+
+class BatchedSignals:
+    """
+    Proxy of instrument signals publishing packet counters, aux data, and metadata in a single periodic signal
+    Emissions of packet_received, packet_logged, packet_corrupted, new_aux_data, and new_meta_data are accumulated
+    and published by stats_tick (dict) at most `rate` times per second, so the number of events sent to the user
+    interface does not depend on the packet rate. Counters are the number of packets since the previous tick, aux data
+    and metadata are the latest received (None if none received). Other signals are forwarded as is.
+    """
+    COUNTERS = ('packets_received', 'packets_logged', 'packets_corrupted')
+
+    def __init__(self, signal, rate=4, scheduler=None):
+        self._signal = signal
+        self.rate = rate  # Hz
+        self._scheduler = scheduler
+        self._lock = Lock()
+        self._tick = self._new_tick()
+        self._scheduled = False
+        self._published = 0
+        self.packet_received = _CounterSignal(self, 'packets_received')
+        self.packet_logged = _CounterSignal(self, 'packets_logged')
+        self.packet_corrupted = _CounterSignal(self, 'packets_corrupted')
+        self.new_aux_data = _SnapshotSignal(self, 'aux_data')
+        self.new_meta_data = _SnapshotSignal(self, 'meta_data')
+
+    def __getattr__(self, item):
+        return getattr(self._signal, item)
+
+    def _new_tick(self) -> dict:
+        return {'packets_received': 0, 'packets_logged': 0, 'packets_corrupted': 0,
+                'aux_data': None, 'meta_data': None}
+
+    def add(self, key, data=None):
+        with self._lock:
+            if key == 'meta_data':
+                self._tick[key] = merge_metadata(self._tick[key], data)
+            elif key == 'aux_data':
+                self._tick[key] = data
+            else:
+                self._tick[key] += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        if self._scheduler is None:
+            self._scheduler = get_scheduler()
+        self._scheduler.call_at(max(self._published + 1 / self.rate, time()), self.publish)
+
+    def publish(self):
+        with self._lock:
+            tick, self._tick = self._tick, self._new_tick()
+            self._scheduled = False
+            self._published = time()
+        self._signal.stats_tick.emit(tick)
@@ -0,0 +1,163 @@
+import json
+import os
+from time import time, gmtime, strftime
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with bounded relative error (HDR histogram style)
+    Latencies are recorded in microseconds into log-linear buckets: values below 2 * SUB_BUCKETS us have their own
+    bucket, then each power of two is split into SUB_BUCKETS linear buckets (relative error < 1 / SUB_BUCKETS).
+    Recording is constant time and memory is fixed, so histograms can be updated for every packet.
+    """
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 2 ** SUB_BUCKET_BITS
+    MAX_SHIFT = 32  # Largest bucket starts at ~2.5 days
+
+    def __init__(self):
+        self.counts = [0] * ((self.MAX_SHIFT + 2) * self.SUB_BUCKETS)
+        self.count = 0
+        self.total = 0.
+        self.min = None
+        self.max = None
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count, self.total, self.min, self.max = 0, 0., None, None
+
+    @classmethod
+    def bucket_index(cls, us: int) -> int:
+        if us < 2 * cls.SUB_BUCKETS:
+            return us
+        shift = us.bit_length() - cls.SUB_BUCKET_BITS - 1
+        if shift > cls.MAX_SHIFT:
+            return (cls.MAX_SHIFT + 2) * cls.SUB_BUCKETS - 1
+        return (shift + 1) * cls.SUB_BUCKETS + (us >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """
+        Middle of bucket in microseconds
+        """
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return ((index % cls.SUB_BUCKETS + cls.SUB_BUCKETS) << shift) + (1 << shift) / 2
+
+    def record(self, seconds: float):
+        us = int(seconds * 1e6)
+        if us < 0:
+            us = 0  # Clock adjusted or timestamp from another source
+        self.counts[self.bucket_index(us)] += 1
+        self.count += 1
+        self.total += us
+        if self.min is None or us < self.min:
+            self.min = us
+        if self.max is None or us > self.max:
+            self.max = us
+
+    def percentile(self, p: float) -> float:
+        """
+        Latency in seconds below which p percent of the latencies recorded fall
+        """
+        if self.count == 0:
+            return float('nan')
+        target, cumulative = max(1., p / 100 * self.count), 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if cumulative >= target:
+                return min(max(self.bucket_value(i), self.min), self.max) / 1e6
+        return self.max / 1e6
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e6 if self.count else float('nan')
+
+    def summary(self) -> dict:
+        """
+        Summary of histogram, latencies in milliseconds
+        """
+        if self.count == 0:
+            return {'count': 0}
+        return {'count': self.count, 'min': self.min / 1e3, 'mean': round(self.mean * 1e3, 3),
+                'p50': round(self.percentile(50) * 1e3, 3), 'p90': round(self.percentile(90) * 1e3, 3),
+                'p99': round(self.percentile(99) * 1e3, 3), 'p999': round(self.percentile(99.9) * 1e3, 3),
+                'max': self.max / 1e3}
+
+
+class InstrumentStats:
+    """
+    Counters and latency histograms of the stages a packet goes through
+        read_parse: chunk read from interface to packet parsed (splitting, pipeline queue)
+        parse_calibrate: parse method of instrument (unpacking and, depending on instrument, calibration)
+        calibrate_emit: handle_data method of instrument excluding log writes (calibration, signals)
+        emit_log: log write requested to log written (including logger queue of pipeline)
+    """
+    STAGES = ('read_parse', 'parse_calibrate', 'calibrate_emit', 'emit_log')
+
+    def __init__(self):
+        self.latency = {s: LatencyHistogram() for s in self.STAGES}
+        self.started = time()
+        self.bytes_read = 0
+        self.chunks_read = 0
+        self.frames = 0
+        self.buffer_high_water_mark = 0
+        self.bytes_dropped = 0
+        self.log_write_time = 0.  # Seconds spent writing logs from the thread parsing packets
+
+    def reset(self):
+        for h in self.latency.values():
+            h.reset()
+        self.started = time()
+        self.bytes_read, self.chunks_read, self.frames = 0, 0, 0
+        self.buffer_high_water_mark, self.bytes_dropped = 0, 0
+        self.log_write_time = 0.
+
+    def summary(self) -> dict:
+        elapsed = time() - self.started
+        return {'elapsed': elapsed,
+                'bytes_read': self.bytes_read,
+                'bytes_per_second': self.bytes_read / elapsed if elapsed > 0 else float('nan'),
+                'chunks_read': self.chunks_read,
+                'frames': self.frames,
+                'frames_per_second': self.frames / elapsed if elapsed > 0 else float('nan'),
+                'buffer_high_water_mark': self.buffer_high_water_mark,
+                'bytes_dropped': self.bytes_dropped,
+                'latency': {s: h.summary() for s, h in self.latency.items()}}
+
+
+class TimedLogProxy:
+    """
+    Forward calls to a logger (Log, LogBinary, ProdLogger, ...) recording the time spent in write
+    Every other attribute is read from or written to the logger directly.
+    """
+    def __init__(self, log, stats: InstrumentStats):
+        object.__setattr__(self, 'log', log)
+        object.__setattr__(self, 'stats', stats)
+
+    def write(self, *args, **kwargs):
+        start = time()
+        try:
+            self.log.write(*args, **kwargs)
+        finally:
+            elapsed = time() - start
+            self.stats.latency['emit_log'].record(elapsed)
+            self.stats.log_write_time += elapsed
+
+    def __getattr__(self, name):
+        return getattr(self.log, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.log, name, value)
+
+
+def write_stats(filename, name, stats: dict):
+    """
+    Append stats to file, one json object per line
+    """
+    path = os.path.dirname(filename)
+    if path and not os.path.exists(path):
+        os.makedirs(path)
+    with open(filename, 'a') as f:
+        f.write(json.dumps({'time': strftime('%Y-%m-%dT%H:%M:%SZ', gmtime()), 'instrument': name, **stats},
+                           default=str) + '\n')
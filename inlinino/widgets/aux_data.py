@@ -9,7 +9,7 @@ class AuxDataWidget(GenericWidget):
         self.variable_names = []
         self.variable_values = []
         super().__init__(instrument)
-        self.instrument.signal.new_aux_data.connect(self.on_new_aux_data)
+        self.instrument.signal.stats_tick.connect(self.on_stats_tick)
 
     def setup(self):
         # Reset fields
@@ -27,7 +27,11 @@ class AuxDataWidget(GenericWidget):
     def reset(self):
         self.setup()
 
-    @QtCore.pyqtSlot(list)
+    @QtCore.pyqtSlot(dict)
+    def on_stats_tick(self, tick):
+        if tick['aux_data'] is not None:
+            self.on_new_aux_data(tick['aux_data'])
+
     def on_new_aux_data(self, data):
         for i, v in enumerate(data):
             self.variable_values[i].setText(str(v))
@@ -6,7 +6,7 @@ from inlinino.widgets import GenericWidget
 class MetadataWidget(GenericWidget):
     def __init__(self, instrument):
         super().__init__(instrument)
-        self.instrument.signal.new_meta_data.connect(self.on_new)
+        self.instrument.signal.stats_tick.connect(self.on_stats_tick)
 
     def setup(self):
         items = []
@@ -25,7 +25,11 @@ class MetadataWidget(GenericWidget):
     def reset(self):
         self.clear()
 
-    @QtCore.pyqtSlot(list)
+    @QtCore.pyqtSlot(dict)
+    def on_stats_tick(self, tick):
+        if tick['meta_data'] is not None:
+            self.on_new(tick['meta_data'])
+
     def on_new(self, data):
         root = self.tree_widget_metadata.invisibleRootItem()
         for parent_idx, (parent_value, child_values) in enumerate(data):
@@ -0,0 +1,57 @@
+"""
+Benchmark ACS processing frame by frame with pyACS (legacy) versus micro-batches (frame_batch) calibrated at once by
+ACSCalibrator. Chunks of several frames are passed to the driver as if read from the interface (e.g. a pumped system
+with several ACS or a replay). Products are not logged while timing, as formatting csv rows costs more than parsing
+and calibrating frames, but products logged by both paths are checked to be the same.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_acs_batch.py
+"""
+import glob
+import logging
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+import mock_serial_sensor as mock
+from inlinino.app_signal import InstrumentSignals
+from inlinino.instruments.acs import ACS
+
+
+N_FRAMES = 2000
+N_FRAMES_LOGGED = 200
+CFG = {'model': 'ACS', 'serial_number': '301', 'module': 'acs', 'log_raw': False,
+       'device_file': 'cfg/acs301_20180129.dev'}
+
+
+def run(frame_batch, chunk_size, log_path, frames, log_products=False):
+    instrument = ACS('bench-acs', {**CFG, 'log_path': log_path, 'log_products': log_products,
+                                   'frame_batch': frame_batch}, InstrumentSignals())
+    instrument.log_start()
+    start = perf_counter()
+    for k in range(0, len(frames), chunk_size):
+        instrument.data_received(b''.join(frames[k:k+chunk_size]), 1e9 + k)
+    instrument.log_stop()
+    return len(frames) / (perf_counter() - start)
+
+
+def read_products(log_path):
+    rows = []
+    for filename in sorted(glob.glob(os.path.join(log_path, '*.csv'))):
+        with open(filename) as f:
+            rows.extend(f.readlines()[2:])
+    return rows
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    frames = [mock.mock_acs(k) for k in range(N_FRAMES)]
+    print(f"{'frames/chunk':>13} {'pyACS (frame/s)':>16} {'batch (frame/s)':>16} {'speedup':>8} {'same products':>14}")
+    for chunk_size in (1, 4, 16, 64):
+        with tempfile.TemporaryDirectory() as legacy_path, tempfile.TemporaryDirectory() as batch_path:
+            legacy = run(False, chunk_size, legacy_path, frames)
+            batch = run(True, chunk_size, batch_path, frames)
+            run(False, chunk_size, legacy_path, frames[:N_FRAMES_LOGGED], log_products=True)
+            run(True, chunk_size, batch_path, frames[:N_FRAMES_LOGGED], log_products=True)
+            same = read_products(legacy_path) == read_products(batch_path)
+        print(f'{chunk_size:>13} {legacy:16.0f} {batch:16.0f} {batch / legacy:7.1f}x {str(same):>14}')
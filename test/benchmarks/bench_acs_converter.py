@@ -0,0 +1,63 @@
+"""
+Benchmark conversion of raw ACS logs (.bin) to products: frames read with read_binary_log and calibrated one by one
+with pyACS (legacy, as when replaying files through the driver) versus acs_converter (memory map, vectorised search
+of frames, numpy.frombuffer, calibration by chunks, one process per file). Products are written in columnar format,
+as formatting csv rows costs more than the rest of the conversion.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_acs_converter.py [n_files] [frames_per_file]
+"""
+import logging
+import os
+import sys
+import tempfile
+from struct import pack
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+import mock_serial_sensor as mock
+from inlinino.instruments.acs import ACSParser
+from inlinino.instruments.acs_converter import convert
+from inlinino.log import LogColumnar
+from inlinino.shared.log_reader import read_binary_log
+
+
+DEVICE_FILE = 'cfg/acs301_20180129.dev'  # relative to inlinino package (working directory on import)
+N_FILES = 4
+FRAMES_PER_FILE = 14400  # an hour at 4 Hz
+
+
+def make_logs(path, n_files, n_frames):
+    pool = [mock.mock_acs(k) for k in range(256)]
+    for i in range(n_files):
+        with open(os.path.join(path, f'ACS301_20240101_{i:02d}0000.bin'), 'wb') as f:
+            t = 1704067200 + i * 3600
+            f.write(b''.join(pool[k % len(pool)] + pack('!d', t + k / 4) for k in range(n_frames)))
+
+
+def run_legacy(path, output_path):
+    parser = ACSParser(DEVICE_FILE)
+    start = perf_counter()
+    for filename in sorted(os.listdir(path)):
+        log = LogColumnar({'path': output_path, 'filename_prefix': 'ACS301'})
+        for packet, timestamp in read_binary_log(os.path.join(path, filename), parser.REGISTRATION_BYTES):
+            raw = parser.unpack_frame(packet)
+            cal = parser.calibrate_frame(raw, get_external_temperature=True)
+            log.write([raw.timestamp, cal.c, cal.a, cal.internal_temperature, cal.external_temperature,
+                       cal.flag_outside_calibration_range], timestamp)
+        log.close()
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else N_FILES
+    n_frames = int(sys.argv[2]) if len(sys.argv) > 2 else FRAMES_PER_FILE
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as output_path:
+        make_logs(path, n_files, n_frames)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 2 ** 20
+        print(f'{n_files} files, {n_files * n_frames} frames, {size:.1f} MB')
+        legacy = run_legacy(path, output_path)
+        print(f"{'legacy':>16}: {legacy:6.2f} s {size / legacy:7.1f} MB/s")
+        for workers in (1, None):
+            _, elapsed = convert([path], DEVICE_FILE, output_path, 'columnar', workers)
+            print(f"{'converter (%s)' % (workers or os.cpu_count()):>16}: {elapsed:6.2f} s {size / elapsed:7.1f} MB/s "
+                  f"{legacy / elapsed:6.1f}x")
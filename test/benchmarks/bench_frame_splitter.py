@@ -0,0 +1,54 @@
+"""
+Benchmark splitting of terminated frames (NMEA, TSG, ...) as done in Instrument.data_received
+Compare legacy bytearray.split loop with FrameSplitter in packets per second.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_frame_splitter.py
+"""
+from time import perf_counter
+
+from inlinino.shared.frame_splitter import FrameSplitter
+
+
+TERMINATOR = b'\r\n'
+FRAME = b'$GPGGA,145015.00,4050.1234,N,07020.1234,W,1,12,1.5,10,M,5,M,0.0,99999'
+N_REPEAT = 5
+
+
+def legacy(buffer, data):
+    buffer.extend(data)
+    n = 0
+    while TERMINATOR in buffer:
+        packet, buffer = buffer.split(TERMINATOR, 1)
+        bytes(packet)
+        n += 1
+    return n, buffer
+
+
+def splitter(buffer, data, frame_splitter):
+    n = 0
+    for packet in frame_splitter.split(buffer, data):
+        n += 1
+    return n, buffer
+
+
+def run(fun, chunks, *args):
+    best = float('inf')
+    for _ in range(N_REPEAT):
+        buffer, n = bytearray(), 0
+        start = perf_counter()
+        for chunk in chunks:
+            k, buffer = fun(buffer, chunk, *args)
+            n += k
+        best = min(best, perf_counter() - start)
+    return n / best
+
+
+if __name__ == '__main__':
+    print(f"{'frames/read':>12} {'legacy (pkt/s)':>16} {'splitter (pkt/s)':>18} {'speedup':>8}")
+    for frames_per_read in (1, 10, 100, 500, 2000):
+        stream = (FRAME + TERMINATOR) * frames_per_read
+        # Cut reads in the middle of a frame to exercise incomplete frames
+        cut = len(stream) - len(FRAME) // 2
+        chunks = [stream[:cut], stream[cut:]] * max(1, 2000 // frames_per_read)
+        a = run(legacy, chunks)
+        b = run(splitter, chunks, FrameSplitter(TERMINATOR))
+        print(f'{frames_per_read:>12} {a:>16.0f} {b:>18.0f} {b / a:>7.1f}x')
@@ -0,0 +1,40 @@
+"""
+Benchmark the timeseries history of MainWindow (HistoryBuffer) on a day of 20 Hz ACS data (4 channels displayed).
+Report the cost of adding a sample, and the number of points and time needed to get a whole day, an hour, and a minute
+to plot on a 1000 pixels wide figure, compared to plotting the same range at full resolution.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_history_buffer.py
+"""
+import logging
+from time import perf_counter
+
+import numpy as np
+
+from inlinino import HistoryBuffer
+
+
+RATE = 20  # Hz
+DURATION = 24 * 3600  # seconds
+N_CHANNELS = 4
+MAX_POINTS = 2000  # Two points per pixel
+N_REPEAT = 20
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    n = RATE * DURATION
+    timestamp = 1623900000 + np.arange(n) / RATE
+    data = np.random.default_rng(0).random((n, N_CHANNELS))
+    history = HistoryBuffer(2048, N_CHANNELS, 8)  # Same as MainWindow
+    start = perf_counter()
+    for k in range(n):
+        history.extend(timestamp[k], data[k])
+    print(f'extend: {(perf_counter() - start) / n * 1e6:.1f} us/sample ({n} samples)')
+    print(f"{'range':>7} {'samples':>9} {'level':>6} {'points':>7} {'get (ms)':>9}")
+    for name, seconds in (('day', DURATION), ('hour', 3600), ('minute', 60)):
+        t0 = timestamp[-1] - seconds
+        start = perf_counter()
+        for _ in range(N_REPEAT):
+            t, y = history.get(t0, max_points=MAX_POINTS)
+        elapsed = (perf_counter() - start) / N_REPEAT
+        print(f'{name:>7} {seconds * RATE:9d} {history.select_level(t0, max_points=MAX_POINTS):6d} {len(t):7d} '
+              f'{elapsed * 1e3:9.2f}')
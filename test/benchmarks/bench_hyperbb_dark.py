@@ -0,0 +1,81 @@
+"""
+Benchmark dark offsets of HyperBBParser.calibrate: three scipy interp2d (legacy) versus the DarkOffsetTable lookup.
+Offsets are first checked against interp2d on the sample calibration files, frame by frame, for gains and wavelengths
+on the calibration grid, between nodes of the grid, and outside of the grid.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_hyperbb_dark.py
+"""
+import logging
+import warnings
+from time import perf_counter
+
+import numpy as np
+from scipy.io import loadmat
+from scipy.interpolate import interp2d
+
+from inlinino.instruments.hyperbb import DarkOffsetTable
+
+
+PLAQUE_FILE = 'cfg/HBB8005_CalPlaque_20210315.mat'  # relative to inlinino package (working directory on import)
+N_FRAMES = 20000
+SCAN_LENGTH = 136  # frames per wavelength scan of mock_hyperbb
+MODES = ('on grid', 'off grid', 'random')
+
+
+def load(filename=PLAQUE_FILE):
+    cal = loadmat(filename, simplify_cells=True)['cal']
+    dark = [cal[f'darkCalScat{i}'] for i in (1, 2, 3)]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        legacy = [interp2d(cal['darkCalPmtGain'], cal['darkCalWavelength'], d, kind='linear') for d in dark]
+    return legacy, DarkOffsetTable(cal['darkCalPmtGain'], cal['darkCalWavelength'], *dark)
+
+
+def frames(table, n, mode, rng):
+    # on grid: gains and wavelengths of calibration, off grid: few gains and wavelengths between nodes of calibration
+    # (e.g. mock_hyperbb), random: any gain and wavelength (lookup table is full after CACHE_SIZE frames)
+    if mode == 'on grid':
+        return rng.choice(table.gain, n), rng.choice(table.wavelength, n)
+    if mode == 'off grid':
+        return rng.choice(table.gain[:-1] + 50, n), rng.choice(np.arange(431, 700, 2), n)
+    return (rng.uniform(table.gain[0] - 200, table.gain[-1] + 200, n),
+            rng.uniform(table.wavelength[0] - 10, table.wavelength[-1] + 10, n))
+
+
+def check(legacy, table, rng):
+    error = 0
+    for mode in MODES:
+        gain, wl = frames(table, 2000, mode, rng)
+        expected = np.array([[f(g, w)[0] for f in legacy] for g, w in zip(gain, wl)])
+        error = max(error, np.max(np.abs(table(gain, wl) - expected)))  # batch
+        for k in range(0, len(gain), 100):
+            error = max(error, np.max(np.abs(table(gain[k:k+1], wl[k:k+1])[0] - expected[k])))  # frame by frame
+    return error
+
+
+def run_legacy(legacy, gain, wl):
+    start = perf_counter()
+    for g, w in zip(gain, wl):
+        for f in legacy:
+            f(np.array([g]), np.array([w]))
+    return len(gain) / (perf_counter() - start)
+
+
+def run_table(table, gain, wl, batch=1):
+    start = perf_counter()
+    for k in range(0, len(gain), batch):
+        table(gain[k:k+batch], wl[k:k+batch])
+    return len(gain) / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    legacy, table = load()
+    print(f'max absolute difference with interp2d: {check(legacy, table, rng):.3g}')
+    print(f"{'frames':>9} {'interp2d (frame/s)':>19} {'table (frame/s)':>16} {'scan (frame/s)':>15} {'speedup':>8}")
+    for mode in MODES:
+        _, table = load()  # empty lookup table of off-grid values
+        gain, wl = frames(table, N_FRAMES, mode, rng)
+        old, new = run_legacy(legacy, gain, wl), run_table(table, gain, wl)
+        scan = run_table(table, gain, wl, SCAN_LENGTH)
+        print(f"{mode:>9} {old:19.0f} {new:16.0f} {scan:15.0f} {new / old:7.1f}x")
@@ -0,0 +1,41 @@
+"""
+Benchmark HyperBB processing frame by frame (legacy) versus whole scans (scan_batch), with products logged.
+Frames of mock_hyperbb are parsed and handled by the driver as if received from the instrument.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_hyperbb_scan.py
+"""
+import logging
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+import mock_serial_sensor as mock
+from inlinino.app_signal import InstrumentSignals
+from inlinino.instruments.hyperbb import HyperBB
+
+
+N_SCANS = 50
+CFG = {'model': 'Mock', 'serial_number': '0001', 'module': 'hyperbb', 'log_raw': False, 'log_products': True,
+       'plaque_file': 'cfg/HBB8005_CalPlaque_20210315.mat', 'temperature_file': 'cfg/HBB8005_CalTemp_20210315.mat'}
+
+
+def run(scan_batch, log_path):
+    instrument = HyperBB('bench-hyperbb', {**CFG, 'log_path': log_path, 'scan_batch': scan_batch},
+                         InstrumentSignals())
+    wavelengths = [int(wl) for wl in instrument._parser.wavelength]
+    frames = [mock.mock_hyperbb(k, wavelengths)[:-1] for k in range(N_SCANS * len(wavelengths))]
+    instrument.log_start()
+    start = perf_counter()
+    for k, frame in enumerate(frames):
+        instrument.handle_packet(frame, k)
+    instrument.log_stop()
+    return len(frames) / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as log_path:
+        frame, scan = run(False, log_path), run(True, log_path)
+    print(f"{'frame by frame (frame/s)':>25} {'whole scan (frame/s)':>21} {'speedup':>8}")
+    print(f'{frame:25.0f} {scan:21.0f} {scan / frame:7.1f}x')
@@ -0,0 +1,65 @@
+"""
+Benchmark temperature correction of HyperBBParser.calibrate: polyval grid and interp2d built on every call (legacy)
+versus the TemperatureCorrectionTable precomputed once, for single frames (HyperBB.handle_data) and whole scans.
+The correction is first checked against the legacy implementation on the sample calibration file, frame by frame.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_hyperbb_temperature.py
+"""
+import logging
+import warnings
+from time import perf_counter
+
+import numpy as np
+from scipy.io import loadmat
+from scipy.interpolate import interp2d
+
+from inlinino.instruments.hyperbb import TemperatureCorrectionTable
+
+
+TEMPERATURE_FILE = 'cfg/HBB8005_CalTemp_20210315.mat'  # relative to inlinino package (working directory on import)
+N_FRAMES = 5000
+
+
+def legacy(wavelength, coefficients, wl, t):
+    # Former HyperBBParser.compute_temperature_coefficients
+    led_t = np.arange(np.min(t), np.max(t) + 0.1001, 0.1)
+    t_correction = np.empty((len(wavelength), len(led_t)))
+    for k in range(len(wavelength)):
+        t_correction[k, :] = np.polyval(coefficients[k, :], led_t)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        t_correction = interp2d(led_t, wavelength, t_correction, kind='linear')(t, wl)
+    return np.diag(t_correction) if t_correction.ndim > 1 else t_correction
+
+
+def frames(wavelength, n, rng):
+    return rng.choice(wavelength, n), rng.uniform(15, 45, n)
+
+
+def run_legacy(wavelength, coefficients, wl, t):
+    start = perf_counter()
+    for k in range(len(wl)):
+        legacy(wavelength, coefficients, wl[k:k+1], t[k:k+1])
+    return len(wl) / (perf_counter() - start)
+
+
+def run_table(table, wl, t, batch=1):
+    start = perf_counter()
+    for k in range(0, len(wl), batch):
+        table(wl[k:k+batch], t[k:k+batch])
+    return len(wl) / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    cal = loadmat(TEMPERATURE_FILE, simplify_cells=True)['cal_temp']
+    wavelength, coefficients = cal['wl'], cal['coeff']
+    table = TemperatureCorrectionTable(wavelength, coefficients)
+    wl, t = frames(wavelength, 1000, rng)
+    expected = np.array([legacy(wavelength, coefficients, wl[k:k+1], t[k:k+1])[0] for k in range(len(wl))])
+    print(f'max relative difference with legacy: {np.max(np.abs(table(wl, t) / expected - 1)):.3g}')
+    wl, t = frames(wavelength, N_FRAMES, rng)
+    old, new = run_legacy(wavelength, coefficients, wl, t), run_table(table, wl, t)
+    scan = run_table(table, wl, t, len(wavelength))
+    print(f"{'legacy (frame/s)':>17} {'table (frame/s)':>16} {'scan (frame/s)':>15} {'speedup':>8}")
+    print(f'{old:17.0f} {new:16.0f} {scan:15.0f} {new / old:7.1f}x')
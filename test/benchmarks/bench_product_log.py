@@ -0,0 +1,71 @@
+"""
+Benchmark product loggers writing spectra: csv (Log, spectra formatted with np.array2string) and columnar (LogColumnar,
+spectra written as float32 blocks). Rows mimic ACS (2 x 86 wavelengths) and HyperNav (2048 pixels) products.
+Report rows written per second, size of files, and rows read per second (spectra parsed cell by cell for csv).
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_product_log.py
+"""
+import logging
+import os
+import shutil
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from inlinino.log import Log, LogColumnar
+from inlinino.shared.log_reader import read_columnar_log
+
+
+N_ROWS = 2000
+START = 1623900000.0123
+LAYOUTS = {
+    'acs': (['acs_timestamp', 'c', 'a', 'T_int', 'T_ext', 'flag'], ['ms', '1/m', '1/m', 'deg_C', 'deg_C', 'bool'],
+            ['%d', '%s', '%s', '%.2f', '%.2f', '%s'], 4,
+            lambda log, k, s: [k * 250, log.format_array(s[0]), log.format_array(s[1]), 20.5, 21.1, False]),
+    'hypernav': (['SIDE', 'SAMPLE', 'LU', 'TEMP_SPEC'], ['', '', 'counts', 'degC'],
+                 ['%d', '%d', '%s', '%.5f'], 1,
+                 lambda log, k, s: [0, k, log.format_array(s[0]), 21.04]),
+}
+WIDTHS = {'acs': (2, 86), 'hypernav': (1, 2048)}
+
+
+def write(log_class, layout, path, spectra):
+    names, units, precision, rate, row = LAYOUTS[layout]
+    log = log_class({'path': path, 'filename_prefix': layout, 'length': 24 * 60, 'variable_names': names,
+                     'variable_units': units, 'variable_precision': precision})
+    start = perf_counter()
+    for k in range(N_ROWS):
+        log.write(row(log, k, spectra[k]), START + k / rate)
+    log.close()
+    elapsed = perf_counter() - start
+    return os.path.join(path, os.listdir(path)[0]), elapsed
+
+
+def read(filename):
+    start = perf_counter()
+    if filename.endswith('.csv'):
+        with open(filename) as f:
+            lines = f.readlines()[2:]
+        for line in lines:  # Parse spectra written as '[v0 v1 ...]'
+            for cell in line.split(','):
+                if cell.startswith('['):
+                    np.array(cell[1:-1].split(), dtype=np.float32)
+    else:
+        read_columnar_log(filename)
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)  # Silence messages of loggers opening files
+    print(f"{'layout':>9} {'format':>9} {'write (rows/s)':>15} {'size (kB)':>10} {'read (rows/s)':>14}")
+    for layout, (n, width) in WIDTHS.items():
+        spectra = np.random.default_rng(0).random((N_ROWS, n, width)).astype(np.float32)
+        for log_class in (Log, LogColumnar):
+            path = tempfile.mkdtemp()
+            try:
+                filename, elapsed_write = write(log_class, layout, path, spectra)
+                size, elapsed_read = os.path.getsize(filename), read(filename)
+            finally:
+                shutil.rmtree(path)
+            print(f'{layout:>9} {log_class.FILE_EXT:>9} {N_ROWS / elapsed_write:15.0f} {size / 1e3:10.0f} '
+                  f'{N_ROWS / elapsed_read:14.0f}')
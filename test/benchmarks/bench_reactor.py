@@ -0,0 +1,113 @@
+"""
+Benchmark reading many serial instruments with one thread per instrument versus a single reactor thread
+Mock sensors write NMEA like frames on pseudo-terminals (Linux and macOS only), each read by a generic instrument.
+Report packets received, process CPU usage, and number of threads for each mode.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_reactor.py [n_sensors] [rate_hz] [duration_s]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import tty
+from time import perf_counter, process_time, sleep
+
+from inlinino.app_signal import InstrumentSignals
+from inlinino.instruments import Instrument
+
+
+FRAME = b'$GPGGA,145015.00,4050.1234,N,07020.1234,W,1,12,1.5,10,M,5,M,0.0,99999\r\n'
+
+
+def get_cfg(index, log_path, reactor):
+    return {'model': 'Mock', 'serial_number': str(index), 'module': 'generic',
+            'separator': b',', 'terminator': b'\r\n', 'log_path': log_path, 'log_raw': False, 'log_products': False,
+            'variable_columns': [2, 4], 'variable_types': ['float', 'float'], 'variable_names': ['lat', 'lon'],
+            'variable_units': ['deg', 'deg'], 'variable_precision': ['%.4f', '%.4f'], 'reactor': reactor}
+
+
+class PacketCounter(InstrumentSignals):
+    def __init__(self):
+        self.count = 0
+        self.stats_tick.connect(self.on_stats_tick)
+
+    def on_stats_tick(self, tick):
+        self.count += tick['packets_received']
+
+
+class MockSensors(threading.Thread):
+    """
+    Write frames at a fixed rate on the master side of pseudo-terminals
+    """
+    def __init__(self, n, rate):
+        super().__init__(daemon=True)
+        self.ptys = [os.openpty() for _ in range(n)]
+        for _, slave in self.ptys:
+            tty.setraw(slave)
+        self.period = 1 / rate
+        self.sent = 0
+        self.alive = True
+
+    @property
+    def ports(self):
+        return [os.ttyname(slave) for _, slave in self.ptys]
+
+    def run(self):
+        next_write = perf_counter()
+        while self.alive:
+            for master, _ in self.ptys:
+                os.write(master, FRAME)
+            self.sent += 1
+            next_write += self.period
+            sleep(max(0., next_write - perf_counter()))
+
+    def close(self):
+        self.alive = False
+        self.join()
+        for master, slave in self.ptys:
+            os.close(master)
+            os.close(slave)
+
+
+def run(n, rate, duration, reactor):
+    log_path = tempfile.mkdtemp()
+    sensors = MockSensors(n, rate)
+    instruments = []
+    for i, port in enumerate(sensors.ports):
+        instrument = Instrument(f'mock-{i}', get_cfg(i, log_path, reactor), PacketCounter())
+        instrument.open(port=port, baudrate=115200, timeout=1)
+        instruments.append(instrument)
+    sensors.start()
+    sleep(0.5)  # warm up
+    for instrument in instruments:
+        instrument.signal.publish()  # Count packets received since last tick
+    received, sent = sum(i.signal.count for i in instruments), sensors.sent
+    threads = threading.active_count()
+    cpu, start = process_time(), perf_counter()
+    sleep(duration)
+    cpu, elapsed = process_time() - cpu, perf_counter() - start
+    for instrument in instruments:
+        instrument.signal.publish()
+    received = sum(i.signal.count for i in instruments) - received
+    sent = (sensors.sent - sent) * n
+    for instrument in instruments:
+        instrument.close()
+    sensors.close()
+    return {'sent': sent, 'received': received, 'cpu': cpu / elapsed * 100, 'threads': threads}
+
+
+def main():
+    if not hasattr(os, 'openpty'):
+        sys.exit('Pseudo-terminals are not available on this platform.')
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    logging.getLogger().setLevel(logging.WARNING)  # Silence setup messages of each instrument
+    print(f'{n} sensors at {rate:g} Hz during {duration:g} seconds')
+    for name, reactor in (('threads', False), ('reactor', True)):
+        r = run(n, rate, duration, reactor)
+        print(f'{name:>8}: {r["received"]}/{r["sent"]} packets, cpu {r["cpu"]:.1f}%, {r["threads"]} threads')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark buffers of the timeseries plot (MainWindow.on_new_ts_data): one 1-D buffer per channel shifted with
+np.roll on every packet (legacy) versus a single 2-D RingBuffer (time x channel) with a write index.
+Each packet extends the buffers and reads back the most recent BUFFER_LENGTH values of every channel.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_ring_buffer.py
+"""
+import logging
+from time import perf_counter
+
+import numpy as np
+
+from inlinino import RingBuffer
+
+
+BUFFER_LENGTH = 240  # Same as MainWindow
+N_PACKETS = 20000
+
+
+class RollBuffer:
+    # Legacy implementation of RingBuffer
+    def __init__(self, length):
+        self.data = np.empty(length)
+        self.data[:] = np.NAN
+
+    def extend(self, x):
+        x = np.array(x, copy=False)
+        step = x.size
+        self.data = np.roll(self.data, -step)
+        self.data[-step:] = x
+
+    def get(self, n=1):
+        return self.data[-1 * n:]
+
+
+def run_legacy(packets):
+    timestamps, buffers = RollBuffer(BUFFER_LENGTH), [RollBuffer(BUFFER_LENGTH) for _ in range(packets.shape[1])]
+    start = perf_counter()
+    for k, data in enumerate(packets):
+        timestamps.extend(k)
+        for i in range(len(data)):
+            buffers[i].extend(data[i])
+        timestamps.get(BUFFER_LENGTH)
+        for i in range(len(data)):
+            buffers[i].get(BUFFER_LENGTH)
+    return N_PACKETS / (perf_counter() - start)
+
+
+def run_ring(packets):
+    timestamps, buffer = RingBuffer(BUFFER_LENGTH), RingBuffer(BUFFER_LENGTH, width=packets.shape[1])
+    start = perf_counter()
+    for k, data in enumerate(packets):
+        timestamps.extend(k)
+        buffer.extend(data)
+        timestamps.get(BUFFER_LENGTH)
+        values = buffer.get(BUFFER_LENGTH)
+        for i in range(len(data)):
+            values[:, i]
+    return N_PACKETS / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'channels':>9} {'np.roll (pkt/s)':>16} {'ring (pkt/s)':>13} {'speedup':>8}")
+    for n in (1, 5, 20, 50):
+        packets = np.random.default_rng(0).random((N_PACKETS, n))
+        legacy, ring = run_legacy(packets), run_ring(packets)
+        print(f'{n:>9d} {legacy:16.0f} {ring:13.0f} {ring / legacy:7.1f}x')
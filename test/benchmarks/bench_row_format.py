@@ -0,0 +1,73 @@
+"""
+Benchmark formatting of product rows by Log.write for the column layouts of Suna (286 columns, mixed types) and
+HyperBB (33 columns, numpy array). Compare formatting each value with its precision (legacy) with the row format
+compiled from variable_precision, the output of both methods is checked to be identical.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_row_format.py
+"""
+import io
+import logging
+from time import perf_counter
+
+import numpy as np
+
+from inlinino.log import Log
+from inlinino.instruments.suna import SunaV2
+
+
+N_ROWS = 20000
+N_REPEAT = 3
+START = 1623900000.0123
+
+
+def suna_layout():
+    rng = np.random.default_rng(0)
+    values = []
+    for t in SunaV2.VARIABLE_TYPES:
+        if t is str:
+            values.append('SATSLF1504')
+        elif t is int:
+            values.append(int(rng.integers(0, 65535)))
+        else:
+            values.append(float(rng.random() * 100))
+    return SunaV2.VARIABLE_PRECISION, lambda k: values
+
+
+def hyperbb_layout():
+    rng = np.random.default_rng(0)
+    raw = rng.integers(0, 65535, 31).astype(float)
+    products = rng.random(2) * 1e-3
+    return ['%s'] * 31 + ['%.5e', '%.5e'], lambda k: np.concatenate((raw, products))
+
+
+def legacy_row(precision, data):
+    return ',' + ','.join(p % d for p, d in zip(precision, data)) + '\n'
+
+
+def run(precision, row, compiled):
+    log = Log({'variable_precision': precision})
+    log._smart_open = lambda timestamp: None  # Format in memory, no file rotation
+    best = float('inf')
+    for _ in range(N_REPEAT):
+        log._file = io.StringIO()
+        start = perf_counter()
+        if compiled:
+            for k in range(N_ROWS):
+                log.write(row(k), START + k / 4)
+        else:
+            for k in range(N_ROWS):
+                log._file.write(log._timestamp_encoder.text(START + k / 4) + legacy_row(precision, row(k)))
+        best = min(best, perf_counter() - start)
+    return log._file.getvalue(), N_ROWS / best
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'layout':>8} {'columns':>8} {'legacy (rows/s)':>16} {'compiled (rows/s)':>18} {'speedup':>8}")
+    for name, layout in (('suna', suna_layout), ('hyperbb', hyperbb_layout)):
+        precision, row = layout()
+        legacy, legacy_rate = run(precision, row, False)
+        compiled, compiled_rate = run(precision, row, True)
+        if legacy != compiled:
+            raise RuntimeError(f'Rows of {name} formatted differently.')
+        print(f'{name:>8} {len(precision):>8d} {legacy_rate:16.0f} {compiled_rate:18.0f} '
+              f'{compiled_rate / legacy_rate:7.1f}x')
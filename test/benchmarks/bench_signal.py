@@ -0,0 +1,66 @@
+"""
+Benchmark dispatch of instrument signals (new_ts_data) by the pure python backend (inlinino.app_signal) and its Qt
+adapter (inlinino.qt_signal). Signals are emitted by a worker thread as instruments do, and slots are called either
+directly in that thread, or by the main thread processing the event queue (queued connection, Qt event loop).
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_signal.py
+"""
+import logging
+from threading import Thread
+from time import perf_counter
+
+from inlinino.app_signal import InstrumentSignals
+from inlinino.shared.signal import EventQueue
+
+
+N_EMIT = 200000
+DATA = [1., 2., 3.]
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def slot(self, data, timestamp):
+        self.count += 1
+
+
+def emit(signal):
+    for k in range(N_EMIT):
+        signal.new_ts_data.emit(DATA, float(k))
+
+
+def run(signal, queue=None, process_events=None):
+    """
+    :param queue: event queue of queued connection (python backend)
+    :param process_events: function processing queued slots in main thread, None to call slots directly
+    :return: signals emitted per second, from first emit to last slot called
+    """
+    counter = Counter()
+    if queue is None:
+        signal.new_ts_data.connect(counter.slot)  # Qt connection is queued as slot is not in emitting thread
+    else:
+        signal.new_ts_data.connect(counter.slot, queue=queue)
+    start = perf_counter()
+    worker = Thread(target=emit, args=(signal,))
+    worker.start()
+    if process_events is not None:
+        while counter.count < N_EMIT:
+            process_events()
+    worker.join()
+    return N_EMIT / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"{'backend':>7} {'connection':>10} {'signals/s':>10}")
+    print(f"{'python':>7} {'direct':>10} {run(InstrumentSignals()):10.0f}")
+    queue = EventQueue()
+    print(f"{'python':>7} {'queued':>10} {run(InstrumentSignals(), queue, lambda: queue.process_events(0.01)):10.0f}")
+    try:
+        import pyqtgraph as pg
+        from inlinino.qt_signal import InstrumentSignals as QtInstrumentSignals
+    except ImportError:
+        print(f"{'qt':>7} unavailable")
+    else:
+        app = pg.mkQApp()
+        print(f"{'qt':>7} {'queued':>10} {run(QtInstrumentSignals(), None, app.processEvents):10.0f}")
@@ -0,0 +1,78 @@
+"""
+Benchmark startup time and memory of Inlinino when loading one instrument: importing only its driver from the registry
+(lazy) versus importing every driver as the user interface used to (eager).
+Each measure runs in a new python process, from the start of the process to the driver imported (import), or to the
+main window shown (gui, skipped if PyQt is not available). Drivers with missing optional dependencies are skipped.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_startup.py [module ...]
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+N_REPEAT = 3
+MODULES = ['taratsg', 'nmea', 'acs', 'hyperbb', 'hypernav']
+
+SCRIPT = """
+import json, sys
+from time import perf_counter
+start = perf_counter()
+import logging
+from inlinino.registry import INSTRUMENT_MODULES, WIDGET_MODULES, get_instrument_class, get_widget_class
+from inlinino.headless import get_rss
+logging.getLogger().setLevel(logging.WARNING)
+module, eager, gui = sys.argv[1], sys.argv[2] == 'eager', sys.argv[3] == 'gui'
+get_instrument_class(module)
+skipped = []
+if eager:
+    for m in INSTRUMENT_MODULES.keys():
+        try:
+            get_instrument_class(m)
+        except ImportError:
+            skipped.append(m)
+    if gui:
+        for w in WIDGET_MODULES.keys():
+            try:
+                get_widget_class(w)
+            except ImportError:
+                skipped.append(w)
+if gui:
+    from inlinino.gui import App
+    app = App([])
+    app.splash_screen.close()
+    app.main_window.show()
+    app.processEvents()
+print(json.dumps({'time': perf_counter() - start, 'rss': get_rss(), 'skipped': skipped}))
+"""
+
+
+def measure(module, mode, target):
+    """
+    :return: best time (s) and rss (bytes) of N_REPEAT processes, None if process failed
+    """
+    best = None
+    for _ in range(N_REPEAT):
+        p = subprocess.run([sys.executable, '-c', SCRIPT, module, mode, target], capture_output=True, text=True,
+                           env={**os.environ, 'QT_QPA_PLATFORM': os.environ.get('QT_QPA_PLATFORM', 'offscreen')})
+        if p.returncode != 0:
+            return None
+        r = json.loads(p.stdout.strip().splitlines()[-1])
+        if best is None or r['time'] < best['time']:
+            best = r
+    return best
+
+
+if __name__ == '__main__':
+    modules = sys.argv[1:] if len(sys.argv) > 1 else MODULES
+    print(f"{'module':>9} {'target':>7} {'lazy (ms)':>10} {'eager (ms)':>11} {'lazy RSS (MB)':>14} "
+          f"{'eager RSS (MB)':>15}")
+    for target in ('import', 'gui'):
+        for module in modules:
+            lazy, eager = measure(module, 'lazy', target), measure(module, 'eager', target)
+            if lazy is None or eager is None:
+                print(f'{module:>9} {target:>7} unavailable')
+                continue
+            print(f"{module:>9} {target:>7} {lazy['time'] * 1e3:10.0f} {eager['time'] * 1e3:11.0f} "
+                  f"{lazy['rss'] / 2 ** 20:14.1f} {eager['rss'] / 2 ** 20:15.1f}" +
+                  (f"  (eager skipped {', '.join(eager['skipped'])})" if eager['skipped'] else ''))
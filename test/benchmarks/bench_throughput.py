@@ -0,0 +1,172 @@
+"""
+Benchmark end-to-end throughput of instrument drivers with mock sensors on pseudo-terminals (Linux and macOS only)
+For each module, frames are streamed back to back at increasing baud rates, and the highest baud rate the driver keeps
+up with is reported. A driver falls behind when the buffer of Instrument.run overflows, when the pseudo-terminal is
+full (bytes dropped as on a UART overrun), or when packets are lost. Packets per second, bytes per second, and CPU
+usage of the thread reading the instrument are reported at the nominal baud rate of each instrument and at the
+highest baud rate sustained. Results are written to a JSON report to track regressions.
+Usage (from repository root):
+    PYTHONPATH=. python test/benchmarks/bench_throughput.py [report.json] [duration_s] [module ...]
+"""
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from functools import partial
+from time import perf_counter, process_time, sleep, strftime, gmtime
+
+WORKING_DIRECTORY = os.getcwd()  # inlinino changes working directory on import
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+import mock_serial_sensor as mock
+from inlinino.app_signal import InstrumentSignals, HyperNavSignals
+from inlinino.headless import get_thread_cpu_time
+from inlinino.registry import get_instrument_class
+
+
+BAUDRATES = [9600, 19200, 38400, 57600, 115200, 230400, 460800, 921600, 1843200, 3686400]
+FRAME_POOL_SIZE = 64  # frames pre-generated so mock sensors are not limited by frame generation
+LOSS_TOLERANCE = 0.02  # fraction of packets that can be missed
+
+# module: (cfg, nominal baud rate, packets per frame, frame generator)
+MODULES = {
+    'acs': ({'device_file': 'cfg/acs301_20180129.dev'}, 115200, 1, mock.mock_acs),
+    'hypernav': ({'prt_sbs_sn': 1, 'sbd_sbs_sn': 2, 'px_reg_path_prt': '', 'px_reg_path_sbd': ''},
+                 115200, 1, partial(mock.mock_hypernav, sbs_sn=1)),
+    'hyperbb': ({'plaque_file': 'cfg/HBB8005_CalPlaque_20210315.mat',
+                 'temperature_file': 'cfg/HBB8005_CalTemp_20210315.mat'}, 9600, 1, mock.mock_hyperbb),
+    'sunav2': ({'calibration_file': ''}, 57600, 1, mock.mock_suna),
+    'nmea': ({'variable_names': ['datetime', 'latitude', 'longitude', 'altitude', 'gps_qual', 'num_sats'],
+              'variable_units': ['', 'degN', 'degE', 'm', '', 'count'],
+              'variable_types': ['str', 'float', 'float', 'float', 'int', 'float'],
+              'variable_precision': ['%s', '%.6f', '%.6f', '%.2f', '%s', '%.1f']}, 4800, 2, mock.mock_tara_nmea),
+    'taratsg': ({}, 9600, 1, mock.mock_tara_tsg),
+    'dataq': ({'channels_enabled': [0, 1, 2, 3]}, 115200, 1, mock.mock_dataq),
+}
+
+
+class WarningCounter(logging.Handler):
+    """
+    Count warnings of instrument, including buffer overflows of Instrument.run
+    """
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+        self.overflows = 0
+
+    def reset(self):
+        self.count, self.overflows = 0, 0
+
+    def emit(self, record):
+        self.count += 1
+        if 'Buffer exceeded maximum length' in record.getMessage():
+            self.overflows += 1
+
+
+def get_cfg(module, log_path):
+    cfg, _, _, _ = MODULES[module]
+    return {'model': 'Mock', 'serial_number': '0001', 'module': module, 'manufacturer': 'Mock',
+            'log_path': log_path, 'log_raw': True, 'log_products': True, **cfg}
+
+
+def get_frame_generator(module, instrument):
+    _, _, _, frame = MODULES[module]
+    if module == 'hyperbb':  # Scan wavelengths of calibration
+        frame = partial(frame, wavelengths=[int(wl) for wl in instrument._parser.wavelength])
+    pool = [frame(k) for k in range(FRAME_POOL_SIZE)]
+    return lambda k: pool[k % len(pool)]
+
+
+def run(module, baudrate, duration, log_path):
+    """
+    Stream frames back to back at baudrate to one instrument
+    :return: dict of results
+    """
+    signal = HyperNavSignals() if module == 'hypernav' else InstrumentSignals()
+    received = []
+    signal.stats_tick.connect(lambda tick: received.append(tick['packets_received']))
+    instrument_class = get_instrument_class(module)
+    logger = logging.getLogger(instrument_class.__name__)  # Logger of instrument
+    warnings = WarningCounter()
+    logger.addHandler(warnings)
+    logger.propagate = False  # Count warnings instead of printing them
+    instrument = instrument_class(f'bench-{module}', get_cfg(module, log_path), signal)
+    sensor = mock.MockSerialSensor(get_frame_generator(module, instrument), baudrate=baudrate,
+                                   respond=mock.echo_commands if module == 'dataq' else None,
+                                   start_command=b'start' if module == 'dataq' else None)
+    sensor.start()
+    instrument.open(port=sensor.port, baudrate=baudrate, timeout=1)
+    sensor.streaming.wait(10)
+    sleep(0.5)  # warm up
+    sensor.reset_counters()
+    instrument.signal.publish()  # Count packets received since last tick
+    packets = sum(received)
+    warnings.reset()
+    native_id = instrument._thread.native_id if instrument._thread is not None else None
+    thread_cpu, cpu, start = get_thread_cpu_time(native_id), process_time(), perf_counter()
+    sleep(duration)
+    elapsed = perf_counter() - start
+    if thread_cpu is not None:
+        thread_cpu = get_thread_cpu_time(native_id) - thread_cpu
+    cpu = process_time() - cpu
+    instrument.signal.publish()
+    packets = sum(received) - packets
+    sensor.stop()
+    instrument.close()
+    sensor.close()
+    logger.removeHandler(warnings)
+    logger.propagate = True
+    packets_per_frame = MODULES[module][2]
+    packets_sent = sensor.frames_sent * packets_per_frame
+    in_flight = 2 * packets_per_frame  # frame being sent and frame being read
+    return {'baudrate': baudrate,
+            'packets_sent': packets_sent,
+            'packets_received': packets,
+            'packets_per_second': packets / elapsed,
+            'bytes_per_second': sensor.bytes_sent / elapsed,
+            'bytes_dropped': sensor.bytes_dropped,
+            'buffer_overflows': warnings.overflows,
+            'warnings': warnings.count,
+            'cpu_thread': None if thread_cpu is None else thread_cpu / elapsed * 100,
+            'cpu_process': cpu / elapsed * 100,
+            'kept_up': (warnings.overflows == 0 and sensor.bytes_dropped == 0 and
+                        packets >= (packets_sent - in_flight) * (1 - LOSS_TOLERANCE))}
+
+
+def benchmark(module, duration, log_path):
+    nominal = run(module, MODULES[module][1], duration, log_path)
+    sweep, max_baudrate = [], None
+    for baudrate in BAUDRATES:
+        r = run(module, baudrate, duration, log_path)
+        sweep.append(r)
+        print(f'{module:>9} {baudrate:>8d} bd: {r["packets_per_second"]:8.1f} pkt/s {r["bytes_per_second"]:10.0f} B/s'
+              f' cpu {r["cpu_thread"] or r["cpu_process"]:5.1f}% {"" if r["kept_up"] else "fell behind"}')
+        if not r['kept_up']:
+            break
+        max_baudrate = baudrate
+    return {'nominal': nominal, 'max_baudrate': max_baudrate, 'sweep': sweep}
+
+
+def main():
+    if not hasattr(os, 'openpty'):
+        sys.exit('Pseudo-terminals are not available on this platform.')
+    filename = os.path.join(WORKING_DIRECTORY, sys.argv[1] if len(sys.argv) > 1 else 'bench_throughput.json')
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    modules = sys.argv[3:] if len(sys.argv) > 3 else list(MODULES.keys())
+    logging.getLogger().setLevel(logging.WARNING)  # Silence setup messages of each instrument
+    log_path = tempfile.mkdtemp()
+    report = {'date': strftime('%Y-%m-%dT%H:%M:%SZ', gmtime()),
+              'platform': platform.platform(), 'python': platform.python_version(), 'cpu_count': os.cpu_count(),
+              'duration': duration, 'modules': {}}
+    for module in modules:
+        report['modules'][module] = benchmark(module, duration, log_path)
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Max baud rate sustained: ' +
+          ', '.join(f'{m} {r["max_baudrate"]}' for m, r in report['modules'].items()))
+    print(f'Report written to {filename}')
+
+
+if __name__ == '__main__':
+    main()
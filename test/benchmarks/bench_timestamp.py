@@ -0,0 +1,48 @@
+"""
+Benchmark formatting of timestamps written for each row by Log, LogText, and RawLogger (Satlantic DATETAG/TIMETAG)
+Compare strftime on every row with TimestampEncoder, which caches the date and time of the current second.
+Timestamps increase at the rate of the instrument, the output of both methods is checked to be identical.
+Usage (from repository root): PYTHONPATH=. python test/benchmarks/bench_timestamp.py
+"""
+from struct import pack
+from time import perf_counter, strftime, gmtime
+
+from inlinino.log import TimestampEncoder
+
+
+N_ROWS = 100000
+N_REPEAT = 5
+START = 1623900000.0123
+
+
+def legacy_text(timestamp):
+    return strftime('%Y/%m/%d %H:%M:%S', gmtime(timestamp)) + ("%.3f" % timestamp)[-4:]
+
+
+def legacy_satlantic(timestamp):
+    s, ms = divmod(timestamp, 1)
+    return pack('!ii', int(strftime('%Y%j', gmtime(s))),
+                int('{}{:03d}'.format(strftime('%H%M%S', gmtime(s)), int(ms * 1000))))[1:]
+
+
+def run(fun, timestamps):
+    best = float('inf')
+    for _ in range(N_REPEAT):
+        start = perf_counter()
+        for t in timestamps:
+            fun(t)
+        best = min(best, perf_counter() - start)
+    return len(timestamps) / best
+
+
+if __name__ == '__main__':
+    print(f"{'rate (Hz)':>10} {'format':>10} {'strftime (rows/s)':>18} {'encoder (rows/s)':>17} {'speedup':>8}")
+    for rate in (1, 20, 100):
+        timestamps = [START + k / rate for k in range(N_ROWS)]
+        for name, legacy, method in (('text', legacy_text, 'text'), ('satlantic', legacy_satlantic, 'satlantic')):
+            encode = getattr(TimestampEncoder(), method)
+            if any(legacy(t) != encode(t) for t in timestamps):
+                raise ValueError(f'{name} timestamps differ from legacy formatting')
+            a = run(legacy, timestamps)
+            b = run(getattr(TimestampEncoder(), method), timestamps)
+            print(f'{rate:>10} {name:>10} {a:>18.0f} {b:>17.0f} {b / a:>7.1f}x')
@@ -0,0 +1,68 @@
+"""
+Check FrameSplitter (inlinino.shared.frame_splitter) against bytes.split of the whole stream.
+Usage (from repository root): python -m pytest test/test_frame_splitter.py
+"""
+import random
+
+import pytest
+
+from inlinino.shared.frame_splitter import FrameSplitter
+
+
+def split_chunks(terminator, chunks):
+    splitter, buffer, frames = FrameSplitter(terminator), bytearray(), []
+    for chunk in chunks:
+        frames.extend(splitter.split(buffer, chunk))
+    return frames, bytes(buffer)
+
+
+def test_single_chunk():
+    assert split_chunks(b'\r\n', [b'a,1\r\nb,2\r\nc']) == ([b'a,1', b'b,2'], b'c')
+
+
+def test_frame_split_across_chunks():
+    frames, buffer = split_chunks(b'\r\n', [b'$GPGGA,14', b'5015.00,40', b'50.1234\r\n'])
+    assert (frames, buffer) == ([b'$GPGGA,145015.00,4050.1234'], b'')
+
+
+def test_terminator_split_across_chunks():
+    assert split_chunks(b'\r\n', [b'a,1\r', b'\nb,2\r', b'\n']) == ([b'a,1', b'b,2'], b'')
+    assert split_chunks(b'\r\n\r\n', [b'a\r\n', b'\r', b'\nb\r\n\r', b'\n']) == ([b'a', b'b'], b'')
+
+
+def test_empty_chunks():
+    frames, buffer = split_chunks(b'\r\n', [b'', b'a,1', b'', b'\r', b'', b'\n', b''])
+    assert (frames, buffer) == ([b'a,1'], b'')
+    assert split_chunks(b'\r\n', [b'\r\n\r\n']) == ([b'', b''], b'')
+
+
+def test_no_terminator_in_chunk():
+    # Fast path: chunks without last byte of terminator return no frame and are kept in buffer
+    splitter, buffer = FrameSplitter(b'\r\n'), bytearray()
+    for chunk in (b'abc', b'\rdef', b'ghi'):
+        assert splitter.split(buffer, chunk) == []
+    assert buffer == b'abc\rdefghi'
+    assert splitter.split(buffer, b'\r\n') == [b'abc\rdefghi']
+    assert buffer == b''
+
+
+def test_buffer_modified_outside():
+    # Buffer emptied (e.g. on overflow) or replaced by caller, scan restarts from beginning of buffer
+    splitter, buffer = FrameSplitter(b'\n'), bytearray()
+    assert splitter.split(buffer, b'abcdef') == []
+    buffer.clear()
+    assert splitter.split(buffer, b'gh\n') == [b'gh']
+    buffer.extend(b'ij\nk')
+    assert splitter.split(buffer, b'l\n') == [b'ij', b'kl']
+
+
+@pytest.mark.parametrize('terminator', [b'\n', b'\r\n', b'\xff\x00\xff\x00'])
+def test_random_chunks(terminator):
+    rng = random.Random(0)
+    alphabet = b'ab,' + terminator
+    for _ in range(200):
+        stream = bytes(rng.choice(alphabet) for _ in range(300))
+        cuts = sorted(rng.sample(range(1, len(stream)), 30))
+        chunks = [stream[i:j] for i, j in zip([0] + cuts, cuts + [len(stream)])]
+        expected = stream.split(terminator)
+        assert split_chunks(terminator, chunks) == (expected[:-1], expected[-1])
@@ -0,0 +1,116 @@
+"""
+Check lookup tables of HyperBBParser.calibrate against the scipy interp2d implementation they replace, on the sample
+calibration files: dark offsets (DarkOffsetTable) and temperature correction of the LED (TemperatureCorrectionTable).
+Usage (from repository root): python -m pytest test/test_hyperbb_calibration.py
+"""
+import os
+import warnings
+
+import numpy as np
+import pytest
+from scipy.io import loadmat
+from scipy.interpolate import interp2d
+
+CFG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'inlinino', 'cfg')
+PLAQUE_FILE = os.path.join(CFG_PATH, 'HBB8005_CalPlaque_20210315.mat')
+TEMPERATURE_FILE = os.path.join(CFG_PATH, 'HBB8005_CalTemp_20210315.mat')
+
+from inlinino.instruments.hyperbb import DarkOffsetTable, TemperatureCorrectionTable  # changes working directory
+
+DARK_TOLERANCE = 1e-9  # counts
+TEMPERATURE_TOLERANCE = 1e-6  # relative
+
+
+def interp2d_quiet(*args, **kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        return interp2d(*args, **kwargs)
+
+
+@pytest.fixture(scope='module')
+def plaque():
+    cal = loadmat(PLAQUE_FILE, simplify_cells=True)['cal']
+    dark = [cal[f'darkCalScat{i}'] for i in (1, 2, 3)]
+    legacy = [interp2d_quiet(cal['darkCalPmtGain'], cal['darkCalWavelength'], d, kind='linear') for d in dark]
+    return cal, dark, legacy
+
+
+@pytest.fixture(scope='module')
+def temperature():
+    cal = loadmat(TEMPERATURE_FILE, simplify_cells=True)['cal_temp']
+    return cal['wl'], cal['coeff']
+
+
+def dark_frames(gain, wavelength, mode):
+    if mode == 'on grid':
+        g, w = np.meshgrid(gain, wavelength)
+    elif mode == 'off grid':  # middle of cells of calibration
+        g, w = np.meshgrid((gain[:-1] + gain[1:]) / 2, (wavelength[:-1] + wavelength[1:]) / 2)
+    else:  # outside of calibration, on each side
+        g, w = np.meshgrid(np.r_[gain[0] - 100, gain, gain[-1] + 100],
+                           np.r_[wavelength[0] - 10, wavelength[-1] + 10])
+    return g.reshape(-1), w.reshape(-1)
+
+
+@pytest.mark.parametrize('mode', ['on grid', 'off grid', 'out of range'])
+def test_dark_offset_table(plaque, mode):
+    cal, dark, legacy = plaque
+    table = DarkOffsetTable(cal['darkCalPmtGain'], cal['darkCalWavelength'], *dark)
+    gain, wl = dark_frames(table.gain, table.wavelength, mode)
+    expected = np.array([[f(g, w)[0] for f in legacy] for g, w in zip(gain, wl)])
+    # Frame by frame (HyperBB.handle_frame), first lookup interpolates off-grid values, second one reads them back
+    for _ in range(2):
+        for k in range(len(gain)):
+            np.testing.assert_allclose(table(gain[k:k+1], wl[k:k+1])[0], expected[k], rtol=0, atol=DARK_TOLERANCE)
+    # Whole scan (HyperBB.handle_scan)
+    np.testing.assert_allclose(table(gain, wl), expected, rtol=0, atol=DARK_TOLERANCE)
+
+
+def legacy_temperature_correction(wavelength, coefficients, wl, t):
+    # Former HyperBBParser.compute_temperature_coefficients
+    led_t = np.arange(np.min(t), np.max(t) + 0.1001, 0.1)
+    t_correction = np.empty((len(wavelength), len(led_t)))
+    for k in range(len(wavelength)):
+        t_correction[k, :] = np.polyval(coefficients[k, :], led_t)
+    t_correction = interp2d_quiet(led_t, wavelength, t_correction, kind='linear')(t, wl)
+    return np.diag(t_correction) if t_correction.ndim > 1 else t_correction
+
+
+@pytest.mark.parametrize('mode', ['on grid', 'off grid'])
+def test_temperature_correction_table(temperature, mode):
+    wavelength, coefficients = temperature
+    table = TemperatureCorrectionTable(wavelength, coefficients)
+    rng = np.random.default_rng(0)
+    wl = wavelength if mode == 'on grid' else (wavelength[:-1] + wavelength[1:]) / 2
+    wl = np.repeat(wl, 5)
+    t = rng.uniform(15, 45, len(wl))
+    expected = np.array([legacy_temperature_correction(wavelength, coefficients, wl[k:k+1], t[k:k+1])[0]
+                         for k in range(len(wl))])
+    for k in range(len(wl)):
+        np.testing.assert_allclose(table(wl[k:k+1], t[k:k+1]), expected[k:k+1], rtol=TEMPERATURE_TOLERANCE)
+    np.testing.assert_allclose(table(wl, t), expected, rtol=TEMPERATURE_TOLERANCE)
+
+
+def test_temperature_correction_out_of_range(temperature):
+    # Temperatures outside of the table are computed from the coefficients, as the legacy implementation did
+    wavelength, coefficients = temperature
+    table = TemperatureCorrectionTable(wavelength, coefficients)
+    wl = np.repeat(wavelength[[0, len(wavelength) // 2, -1]], 3)
+    t = np.tile([table.t[0] - 15.3, table.t[-1] + 0.05, table.t[-1] + 20.7], 3)
+    expected = np.array([legacy_temperature_correction(wavelength, coefficients, wl[k:k+1], t[k:k+1])[0]
+                         for k in range(len(wl))])
+    np.testing.assert_allclose(table(wl, t), expected, rtol=TEMPERATURE_TOLERANCE)
+    np.testing.assert_allclose(table(wl[:1], t[:1]), expected[:1], rtol=TEMPERATURE_TOLERANCE)
+
+
+def test_temperature_correction_edge_wavelength(temperature):
+    # Span of calibration not a multiple of the wavelength resolution, last wavelength is still in the table
+    wavelength, coefficients = temperature
+    wavelength = np.array(wavelength, dtype=float)
+    wavelength[-1] += 0.5
+    table = TemperatureCorrectionTable(wavelength, coefficients)
+    wl = np.array([wavelength[-2], wavelength[-1] - 0.7, wavelength[-1] - 0.2, wavelength[-1], wavelength[-1] + 3])
+    t = np.array([20.0, 25.3, 30.1, 35.4, 40.2])
+    expected = np.array([legacy_temperature_correction(wavelength, coefficients, wl[k:k+1], t[k:k+1])[0]
+                         for k in range(len(wl))])
+    np.testing.assert_allclose(table(wl, t), expected, rtol=TEMPERATURE_TOLERANCE)
@@ -0,0 +1,129 @@
+"""
+Check BoundedQueue and Stage (inlinino.shared.pipeline): overflow policies, blocking put, and draining on stop.
+Usage (from repository root): python -m pytest test/test_pipeline.py
+"""
+import threading
+from time import sleep, time
+
+import pytest
+
+from inlinino.shared.pipeline import BoundedQueue, Stage, DROP_OLDEST, DROP_NEWEST, BLOCK
+
+
+def drain(queue):
+    items = []
+    while len(queue):
+        items.append(queue.get(0))
+    return items
+
+
+def test_invalid_queue():
+    with pytest.raises(ValueError):
+        BoundedQueue(4, 'drop_all')
+    with pytest.raises(ValueError):
+        BoundedQueue(0)
+
+
+def test_drop_oldest():
+    queue = BoundedQueue(4, DROP_OLDEST)
+    for k in range(10):
+        assert queue.put(k)
+    assert (queue.put_count, queue.dropped, queue.high_water_mark) == (10, 6, 4)
+    assert drain(queue) == [6, 7, 8, 9]
+
+
+def test_drop_newest():
+    queue = BoundedQueue(4, DROP_NEWEST)
+    assert [queue.put(k) for k in range(6)] == [True] * 4 + [False] * 2
+    assert (queue.put_count, queue.dropped, queue.high_water_mark) == (4, 2, 4)
+    assert drain(queue) == [0, 1, 2, 3]
+
+
+def test_high_water_mark():
+    queue = BoundedQueue(8)
+    for k in range(3):
+        queue.put(k)
+    queue.get()
+    queue.put(3)
+    assert queue.high_water_mark == 3 and queue.occupancy == 3 / 8
+
+
+def test_get_timeout():
+    queue = BoundedQueue(4)
+    start = time()
+    with pytest.raises(IndexError):
+        queue.get(0.05)
+    assert time() - start >= 0.04
+
+
+def test_get_woken_up_by_put():
+    queue = BoundedQueue(4)
+    threading.Timer(0.05, queue.put, (1,)).start()
+    assert queue.get(2) == 1
+
+
+def test_block_put_timeout():
+    queue = BoundedQueue(2, BLOCK)
+    queue.put(0), queue.put(1)
+    start = time()
+    assert not queue.put(2, timeout=0.05)
+    assert 0.04 <= time() - start < 1
+    assert queue.dropped == 1 and drain(queue) == [0, 1]
+
+
+def test_block_put_released_by_get():
+    queue = BoundedQueue(2, BLOCK)
+    queue.put(0), queue.put(1)
+    threading.Timer(0.05, queue.get).start()
+    start = time()
+    assert queue.put(2, timeout=2)
+    assert time() - start < 1
+    assert queue.dropped == 0 and drain(queue) == [1, 2]
+
+
+def test_block_producer_consumer():
+    # Single producer and single consumer, nothing lost nor reordered with a small queue
+    queue, received, n = BoundedQueue(4, BLOCK), [], 5000
+
+    def consume():
+        while len(received) < n:
+            try:
+                received.append(queue.get(1))
+            except IndexError:
+                return
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for k in range(n):
+        assert queue.put(k, timeout=2)
+    consumer.join(5)
+    assert received == list(range(n)) and queue.dropped == 0 and queue.high_water_mark <= 4
+
+
+def test_stage_stop_drains_queue():
+    handled = []
+
+    def handler(item):
+        sleep(0.001)
+        handled.append(item)
+    stage = Stage('test', handler, maxsize=256, overflow=BLOCK)
+    stage.start()
+    for k in range(100):
+        stage.put(k)
+    stage.stop(timeout=5)
+    assert not stage.alive and not stage.thread.is_alive()
+    assert handled == list(range(100)) and stage.processed == 100 and len(stage.queue) == 0
+
+
+def test_stage_handler_exception():
+    handled = []
+
+    def handler(item):
+        if item == 1:
+            raise ValueError('invalid item')
+        handled.append(item)
+    stage = Stage('test', handler)
+    stage.start()
+    for k in range(3):
+        stage.put(k)
+    stage.stop(timeout=5)
+    assert handled == [0, 2] and stage.processed == 3